@@ -1,9 +1,15 @@
+import json
 import os
-import requests
 import base64
 import uuid
 from dotenv import load_dotenv
 from ..utils.logger import logger
+from .http_session import get_session
+from .token_manager import TokenManager, normalize_expires_at
+
+DEFAULT_MODEL = "GigaChat"
+SYSTEM_PROMPT = "Ты - профессиональный аналитик данных. Твоя задача - анализировать табличные данные и предоставлять краткие, информативные выводы."
+GENERATION_PARAMS = {"temperature": 0.7, "max_tokens": 1000}
 
 
 class GigaChatAPI:
@@ -14,14 +20,34 @@ class GigaChatAPI:
         logger.debug(f"  Token loaded: {bool(self.auth_token)}")
         if not self.auth_token:
             logger.warning("  ⚠️ GIGACHAT_TOKEN not found in environment variables!")
-        self.access_token = None
         # Allow overriding base URL via env var; default to official GigaChat endpoint
         self.base_url = os.getenv('GIGACHAT_BASE_URL', 'https://gigachat.devices.sberbank.ru/api/v1')
+        self.timeout = float(os.getenv('GIGACHAT_TIMEOUT', '30'))
+        self.session = get_session('GIGACHAT')
         logger.info(f"  Base URL: {self.base_url}")
-        self._get_access_token()
+        # Токен получаем в фоне, чтобы не блокировать импорт приложения сетевым запросом
+        self.token_manager = TokenManager(
+            self._fetch_access_token,
+            refresh_margin=float(os.getenv('GIGACHAT_TOKEN_REFRESH_MARGIN', '60')),
+            retry_delay=float(os.getenv('GIGACHAT_TOKEN_RETRY_DELAY', '60')),
+            name="GigaChat access token",
+        )
+        self.token_manager.start()
+
+    @property
+    def access_token(self):
+        return self.token_manager.token
 
     def _get_access_token(self):
-        """Получить access token для GigaChat API"""
+        """Принудительно обновить access token для GigaChat API"""
+        return self.token_manager.refresh()
+
+    def _fetch_access_token(self):
+        """Получить access token для GigaChat API.
+
+        Returns:
+            (access_token, expires_at) — expires_at в секундах или None
+        """
         logger.info("Attempting to get access token...")
         # First, if the official `gigachat` python package is installed, try to use it to get a token
         try:
@@ -35,13 +61,15 @@ class GigaChatAPI:
                         token_resp = giga.get_token()
                         # token_resp may be dict-like
                         if isinstance(token_resp, dict):
-                            self.access_token = token_resp.get('access_token')
+                            access_token = token_resp.get('access_token')
+                            expires_at = token_resp.get('expires_at')
                         else:
                             # try attribute
-                            self.access_token = getattr(token_resp, 'access_token', None)
-                        if self.access_token:
+                            access_token = getattr(token_resp, 'access_token', None)
+                            expires_at = getattr(token_resp, 'expires_at', None)
+                        if access_token:
                             logger.info("✅ Access token obtained via gigachat library")
-                            return
+                            return access_token, normalize_expires_at(expires_at)
                 except Exception as e:
                     logger.debug(f"gigachat library token exchange failed: {e}")
         except Exception:
@@ -50,8 +78,7 @@ class GigaChatAPI:
         # Fallback: if a pre-obtained token is provided in GIGACHAT_TOKEN, use it
         if self.auth_token:
             logger.info("Using provided GIGACHAT_TOKEN as access token fallback")
-            self.access_token = self.auth_token
-            return
+            return self.auth_token, None
 
         # As a last resort, try the OAuth endpoint if configured (keep for compatibility)
         auth_url = os.getenv('GIGACHAT_OAUTH_URL', 'https://ngw.devices.sberbank.ru:9443/api/v2/oauth')
@@ -63,82 +90,54 @@ class GigaChatAPI:
         try:
             logger.debug(f"Sending OAuth request to: {auth_url}")
             payload = "scope=GIGACHAT_API_PERS"
-            response = requests.post(auth_url, headers=headers, data=payload, verify=False, timeout=10)
+            response = self.session.post(auth_url, headers=headers, data=payload, verify=False, timeout=10)
             logger.debug(f"OAuth response status: {response.status_code}")
             logger.debug(f"OAuth response: {response.text[:200]}")
             if response.status_code == 200:
                 token_data = response.json()
-                self.access_token = token_data.get('access_token')
-                if self.access_token:
+                access_token = token_data.get('access_token')
+                if access_token:
                     logger.info("✅ Access token obtained via OAuth endpoint")
-                    return
+                    return access_token, normalize_expires_at(token_data.get('expires_at'))
             logger.warning(f"OAuth fallback failed with status {response.status_code}: {response.text[:500]}")
         except Exception as e:
             logger.warning(f"OAuth fallback failed: {e}")
+        return None, None
 
-    def send_analysis_request(self, data, session_id=None):
-        logger.info(f"Sending analysis request to GigaChat (data size: {len(data)} chars) session_id={session_id}")
-        
-        if not self.access_token:
-            logger.info("No access token, attempting to obtain...")
-            self._get_access_token()
-        
-        if not self.access_token:
-            error_msg = "No access token available"
-            logger.error(f"❌ {error_msg}")
-            raise Exception(error_msg)
-            
+    def _headers(self, access_token, session_id=None):
         headers = {
-            "Authorization": f"Bearer {self.access_token}",
+            "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json",
             "RqUID": str(uuid.uuid4())
         }
         if session_id is not None:
             headers["X-Session-ID"] = session_id
+        return headers
 
-        # Пробуем разные модели
-        models = ["GigaChat", "GigaChat-Pro", "GigaChat-3.5"]
-        
+    def _payload(self, data, stream=False):
         payload = {
-            "model": "GigaChat",
+            "model": DEFAULT_MODEL,
             "messages": [
                 {
                     "role": "system",
-                    "content": "Ты - профессиональный аналитик данных. Твоя задача - анализировать табличные данные и предоставлять краткие, информативные выводы."
+                    "content": SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
                     "content": f"Проанализируй следующие данные:\n{data}"
                 }
             ],
-            "temperature": 0.7,
-            "max_tokens": 1000
+            **GENERATION_PARAMS
         }
+        if stream:
+            payload["stream"] = True
+        return payload
 
-        url = f"{self.base_url}/chat/completions"
-        logger.debug(f"Request URL: {url}")
-        logger.debug(f"Payload size: {len(str(payload))} chars")
-        logger.debug(f"Headers: Authorization={bool(headers.get('Authorization'))}, RqUID={headers.get('RqUID')}")
-        
-        try:
-            logger.info("Sending POST request to GigaChat API...")
-            # Временно отключаем проверку SSL-сертификата. Внимание: это небезопасно!
-            response = requests.post(url, headers=headers, json=payload, verify=False, timeout=30)
-            logger.info(f"Response status: {response.status_code}")
-            logger.debug(f"Response headers: {dict(response.headers)}")
-            
-            # Логируем часть ответа для отладки
-            if response.status_code != 200:
-                logger.debug(f"Response body (first 500 chars): {response.text[:500]}")
-            
-            return self._process_response(response)
-        except requests.Timeout:
-            error_msg = "GigaChat API request timeout"
-            logger.error(f"❌ {error_msg}")
-            raise Exception(error_msg)
-        except Exception as e:
-            logger.error(f"❌ Request failed: {type(e).__name__}: {e}", exc_info=True)
-            raise
+    @staticmethod
+    def _stream_text(event):
+        """Текст фрагмента потока ``chat/completions`` (``choices[0].delta.content``)."""
+        choices = json.loads(event).get("choices") or [{}]
+        return (choices[0].get("delta") or {}).get("content")
 
     def _process_response(self, response):
         logger.debug(f"Processing response: status={response.status_code}")
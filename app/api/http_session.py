@@ -0,0 +1,86 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from ..utils.logger import logger
+
+# Один пул соединений на провайдера, общий для всех экземпляров клиента
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _env_bool(name, default):
+    return str(os.getenv(name, default)).lower() in ('1', 'true', 'yes')
+
+
+def create_session(prefix):
+    """Создаёт requests.Session с пулом keep-alive соединений и retry/backoff.
+
+    Настройки читаются из переменных окружения с префиксом провайдера:
+    ``<PREFIX>_POOL_SIZE``, ``<PREFIX>_KEEP_ALIVE``, ``<PREFIX>_RETRIES``,
+    ``<PREFIX>_BACKOFF``.
+    """
+    pool_size = int(os.getenv(f'{prefix}_POOL_SIZE', '10'))
+    keep_alive = _env_bool(f'{prefix}_KEEP_ALIVE', 'true')
+    retries = int(os.getenv(f'{prefix}_RETRIES', '2'))
+    backoff = float(os.getenv(f'{prefix}_BACKOFF', '0.5'))
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({'GET', 'POST'}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry, pool_block=False)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+
+    logger.info(f"HTTP session for {prefix}: pool_size={pool_size}, keep_alive={keep_alive}, retries={retries}, backoff={backoff}")
+    return session
+
+
+def create_async_client(prefix, timeout):
+    """Создаёт httpx.AsyncClient с теми же настройками пула, что и ``create_session``.
+
+    httpx повторяет только неудачные подключения (``<PREFIX>_RETRIES``);
+    клиент привязан к циклу событий, в котором используется.
+    """
+    import httpx
+
+    pool_size = int(os.getenv(f'{prefix}_POOL_SIZE', '10'))
+    keep_alive = _env_bool(f'{prefix}_KEEP_ALIVE', 'true')
+    retries = int(os.getenv(f'{prefix}_RETRIES', '2'))
+    limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size if keep_alive else 0)
+    # Временно отключаем проверку SSL-сертификата. Внимание: это небезопасно!
+    transport = httpx.AsyncHTTPTransport(retries=retries, limits=limits, verify=False)
+    headers = {} if keep_alive else {'Connection': 'close'}
+    logger.info(f"Async HTTP client for {prefix}: pool_size={pool_size}, keep_alive={keep_alive}, retries={retries}")
+    return httpx.AsyncClient(transport=transport, timeout=timeout, headers=headers)
+
+
+def get_session(prefix):
+    """Возвращает общий для провайдера HTTP-сеанс (создаётся при первом обращении)."""
+    with _sessions_lock:
+        session = _sessions.get(prefix)
+        if session is None:
+            session = create_session(prefix)
+            _sessions[prefix] = session
+        return session
+
+
+def close_sessions():
+    """Закрывает все пулы соединений (используется в тестах и бенчмарках)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,274 @@
+import asyncio
+import os
+from ..utils.logger import logger
+from .giga_chat import DEFAULT_MODEL, GENERATION_PARAMS, SYSTEM_PROMPT
+from .http_session import create_async_client
+from .sse import aiter_sse_data
+
+
+class ProviderConfigError(Exception):
+    """Провайдер не настроен (отключён, нет ключа или токена): запрос не отправлялся.
+
+    Не считается сбоем провайдера и не открывает ``CircuitBreaker``.
+    """
+
+
+class LLMProvider:
+    """Асинхронный провайдер нейросети: единый интерфейс для GigaChat и Proxy API.
+
+    ``complete(prompt)`` возвращает весь ответ, ``stream(prompt)`` — фрагменты
+    по мере генерации (по умолчанию весь ответ одним фрагментом). Не больше
+    ``max_concurrency`` запросов к провайдеру выполняются одновременно
+    (``semaphore()``). ``cache_model``/``cache_params`` входят в ключ кэша ответов.
+    """
+
+    name = None
+    cache_model = None
+    cache_params = None
+
+    def __init__(self, timeout=30.0, max_concurrency=4):
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+
+    @property
+    def enabled(self):
+        return True
+
+    def semaphore(self):
+        # Создаётся в цикле событий, где выполняются запросы
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def complete(self, prompt, session_id=None):
+        raise NotImplementedError
+
+    async def stream(self, prompt, session_id=None):
+        yield await self.complete(prompt, session_id=session_id)
+
+    async def aclose(self):
+        pass
+
+
+def _max_concurrency(prefix):
+    return int(os.getenv(f'{prefix}_MAX_CONCURRENCY', '4'))
+
+
+class GigaChatProvider(LLMProvider):
+    """GigaChat REST API (``/chat/completions``) на ``httpx.AsyncClient``.
+
+    Токен и формат запроса берутся из ``GigaChatAPI``; при 401 токен
+    обновляется и запрос повторяется один раз.
+    """
+
+    name = "giga_chat"
+    cache_model = DEFAULT_MODEL
+    cache_params = {**GENERATION_PARAMS, "system": SYSTEM_PROMPT}
+
+    def __init__(self, api, max_concurrency=None):
+        super().__init__(api.timeout, max_concurrency or _max_concurrency('GIGACHAT'))
+        self.api = api
+        self._client = None
+
+    def _http(self):
+        if self._client is None:
+            self._client = create_async_client('GIGACHAT', self.timeout)
+        return self._client
+
+    async def _token(self, stale=None):
+        # Обновление токена — блокирующий сетевой вызов, выполняется вне цикла событий
+        if stale is not None:
+            self.api.token_manager.invalidate(stale)
+        token = await asyncio.to_thread(self.api.token_manager.get_token)
+        if not token:
+            raise ProviderConfigError("No access token available")
+        return token
+
+    def _request(self, token, prompt, session_id, stream):
+        return self._http().build_request(
+            "POST", f"{self.api.base_url}/chat/completions",
+            headers=self.api._headers(token, session_id), json=self.api._payload(prompt, stream=stream),
+        )
+
+    async def _send(self, prompt, session_id, stream=False):
+        token = await self._token()
+        response = await self._http().send(self._request(token, prompt, session_id, stream), stream=stream)
+        if response.status_code == 401:
+            logger.warning("GigaChat returned 401, refreshing access token and retrying once")
+            await response.aclose()
+            token = await self._token(stale=token)
+            response = await self._http().send(self._request(token, prompt, session_id, stream), stream=stream)
+        if response.status_code != 200:
+            await response.aread()
+            await response.aclose()
+            self.api._process_response(response)
+        return response
+
+    async def complete(self, prompt, session_id=None):
+        response = await self._send(prompt, session_id)
+        return self.api._process_response(response)
+
+    async def stream(self, prompt, session_id=None):
+        response = await self._send(prompt, session_id, stream=True)
+        try:
+            async for event in aiter_sse_data(response):
+                content = self.api._stream_text(event)
+                if content:
+                    yield content
+        finally:
+            await response.aclose()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class GigaChatLibProvider(LLMProvider):
+    """GigaChat через официальный пакет ``gigachat`` (``achat``/``astream``)."""
+
+    name = "giga_chat"
+    cache_model = DEFAULT_MODEL
+    cache_params = {**GENERATION_PARAMS, "system": SYSTEM_PROMPT}
+
+    def __init__(self, client, timeout=30.0, max_concurrency=None):
+        super().__init__(timeout, max_concurrency or _max_concurrency('GIGACHAT'))
+        self.client = client
+
+    def _chat(self, prompt, session_id=None):
+        """Запрос для пакета `gigachat`.
+
+        При наличии `session_id` пытаемся установить его в context библиотеки (если она поддерживает).
+        """
+        from gigachat.models import Chat, Messages
+
+        if session_id:
+            try:
+                import gigachat.context as _gctx
+                if hasattr(_gctx, 'session_id_cvar'):
+                    _gctx.session_id_cvar.set(session_id)
+                    logger.debug(f"Set gigachat.context.session_id_cvar to {session_id}")
+            except Exception:
+                logger.debug("gigachat.context not available to set session_id")
+
+        messages = [
+            Messages(role="system", content=SYSTEM_PROMPT),
+            Messages(role="user", content=f"Проанализируй следующие данные:\n{prompt}")
+        ]
+        return Chat(messages=messages, **GENERATION_PARAMS)
+
+    async def complete(self, prompt, session_id=None):
+        resp = await self.client.achat(self._chat(prompt, session_id))
+        # Expect similar structure as in bot: resp.choices[0].message.content
+        try:
+            return resp.choices[0].message.content
+        except Exception:
+            return str(resp)
+
+    async def stream(self, prompt, session_id=None):
+        async for chunk in self.client.astream(self._chat(prompt, session_id)):
+            try:
+                content = chunk.choices[0].delta.content
+            except Exception:
+                content = None
+            if content:
+                yield content
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class ProxyProvider(LLMProvider):
+    """Proxy API на ``httpx.AsyncClient`` (формат запроса — ``ProxyAPI``)."""
+
+    name = "proxy_api"
+
+    def __init__(self, api, max_concurrency=None):
+        super().__init__(api.timeout, max_concurrency or _max_concurrency('PROXY'))
+        self.api = api
+        self.cache_model = api.base_url
+        self._client = None
+
+    @property
+    def enabled(self):
+        return self.api.enabled
+
+    def _http(self):
+        if self._client is None:
+            self._client = create_async_client('PROXY', self.timeout)
+        return self._client
+
+    async def complete(self, prompt, session_id=None):
+        headers, payload = self.api._prepare(prompt)
+        response = await self._http().post(self.api.base_url, headers=headers, json=payload)
+        return self.api._process_response(response)
+
+    async def stream(self, prompt, session_id=None):
+        headers, payload = self.api._prepare(prompt, stream=True)
+        request = self._http().build_request("POST", self.api.base_url, headers=headers, json=payload)
+        response = await self._http().send(request, stream=True)
+        try:
+            if "text/event-stream" not in response.headers.get("Content-Type", ""):
+                # Прокси ответил обычным JSON — весь ответ одним фрагментом
+                await response.aread()
+                yield self.api._process_response(response)
+                return
+            async for event in aiter_sse_data(response):
+                text = self.api._stream_text(event)
+                if text:
+                    yield text
+        finally:
+            await response.aclose()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class FallbackProvider(LLMProvider):
+    """Несколько реализаций одного провайдера по приоритету (например, пакет ``gigachat``, затем REST API).
+
+    Запрос уходит следующей реализации, если предыдущая завершилась ошибкой;
+    поток переключается, только если ошибка случилась до первого фрагмента.
+    """
+
+    def __init__(self, providers):
+        first = providers[0]
+        super().__init__(first.timeout, first.max_concurrency)
+        self.providers = providers
+        self.name = first.name
+        self.cache_model = first.cache_model
+        self.cache_params = first.cache_params
+
+    @property
+    def enabled(self):
+        return any(provider.enabled for provider in self.providers)
+
+    async def complete(self, prompt, session_id=None):
+        for provider in self.providers[:-1]:
+            try:
+                return await provider.complete(prompt, session_id=session_id)
+            except Exception as e:
+                logger.warning(f"  ⚠️ {type(provider).__name__} failed ({type(e).__name__}: {e}), falling back")
+        return await self.providers[-1].complete(prompt, session_id=session_id)
+
+    async def stream(self, prompt, session_id=None):
+        for provider in self.providers[:-1]:
+            started = False
+            try:
+                async for text in provider.stream(prompt, session_id=session_id):
+                    started = True
+                    yield text
+                return
+            except Exception as e:
+                if started:
+                    raise
+                logger.warning(f"  ⚠️ {type(provider).__name__} stream failed ({type(e).__name__}: {e}), falling back")
+        async for text in self.providers[-1].stream(prompt, session_id=session_id):
+            yield text
+
+    async def aclose(self):
+        for provider in self.providers:
+            await provider.aclose()
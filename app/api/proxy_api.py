@@ -1,7 +1,8 @@
+import json
 import os
-import requests
 from dotenv import load_dotenv
 from ..utils.logger import logger
+from .llm_provider import ProviderConfigError
 
 
 class ProxyAPI:
@@ -16,20 +17,20 @@ class ProxyAPI:
         enabled_raw = os.getenv('PROXY_ENABLED', 'true')
         self.enabled = str(enabled_raw).lower() in ('1', 'true', 'yes')
         self.base_url = os.getenv('PROXY_BASE_URL', 'https://api.proxy.ai/analyze')
+        self.timeout = float(os.getenv('PROXY_TIMEOUT', '30'))
         logger.info(f"  Base URL: {self.base_url}; Enabled: {self.enabled}")
 
-    def send_analysis_request(self, data):
-        logger.info(f"Sending analysis request to ProxyAPI (data size: {len(data)} chars); enabled={self.enabled}")
-
+    def _prepare(self, data, stream=False):
+        """Заголовки и тело запроса; исключение, если вызовы отключены или нет ключа."""
         if not self.enabled:
             error_msg = "Proxy API calls are disabled by configuration"
             logger.warning(f"❌ {error_msg}")
-            raise Exception(error_msg)
+            raise ProviderConfigError(error_msg)
 
         if not self.api_key:
             error_msg = "No API key available"
             logger.error(f"❌ {error_msg}")
-            raise Exception(error_msg)
+            raise ProviderConfigError(error_msg)
             
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -39,23 +40,24 @@ class ProxyAPI:
         payload = {
             "query": f"Проанализируй следующие данные:\n{data}"
         }
+        if stream:
+            payload["stream"] = True
+            headers["Accept"] = "text/event-stream"
 
         logger.debug(f"Request URL: {self.base_url}")
         logger.debug(f"Payload size: {len(str(payload))} chars")
-        
+        return headers, payload
+
+    @staticmethod
+    def _stream_text(event):
+        """Текст события потока: JSON с полем ``delta``/``result``/``content`` либо просто текст."""
         try:
-            logger.info("Sending POST request to ProxyAPI...")
-            # Временно отключаем проверку SSL-сертификата. Внимание: это небезопасно!
-            response = requests.post(self.base_url, headers=headers, json=payload, verify=False, timeout=30)
-            logger.info(f"Response status: {response.status_code}")
-            return self._process_response(response)
-        except requests.Timeout:
-            error_msg = "ProxyAPI request timeout"
-            logger.error(f"❌ {error_msg}")
-            raise Exception(error_msg)
-        except Exception as e:
-            logger.error(f"❌ Request failed: {type(e).__name__}: {e}", exc_info=True)
-            raise
+            message = json.loads(event)
+        except ValueError:
+            message = event
+        if isinstance(message, dict):
+            message = message.get("delta") or message.get("result") or message.get("content")
+        return str(message) if message else None
 
     def _process_response(self, response):
         logger.debug(f"Processing response: status={response.status_code}")
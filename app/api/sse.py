@@ -0,0 +1,51 @@
+import json
+
+
+_DONE = object()
+
+
+class _EventParser:
+    """Собирает поля ``data:`` событий Server-Sent Events по строкам потока.
+
+    Многострочные ``data:`` одного события склеиваются через перевод строки;
+    маркер ``[DONE]`` (формат OpenAI-совместимых API) завершает поток.
+    """
+
+    def __init__(self):
+        self.lines = []
+
+    def feed(self, line):
+        """Данные завершённого события, ``_DONE`` или None, если событие ещё не закончилось."""
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if line:
+            if line.startswith("data:"):
+                self.lines.append(line[5:].lstrip(" "))
+            return None
+        return self.flush()
+
+    def flush(self):
+        if not self.lines:
+            return None
+        data = "\n".join(self.lines)
+        self.lines = []
+        return _DONE if data.strip() == "[DONE]" else data
+
+
+async def aiter_sse_data(response):
+    """Поля ``data:`` событий из потокового ответа httpx (``response.aiter_lines()``, см. ``_EventParser``)."""
+    parser = _EventParser()
+    async for line in response.aiter_lines():
+        data = parser.feed(line)
+        if data is _DONE:
+            return
+        if data is not None:
+            yield data
+    data = parser.flush()
+    if data is not None and data is not _DONE:
+        yield data
+
+
+def format_event(event, data):
+    """Событие Server-Sent Events: ``event: <имя>`` и JSON в ``data:``."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
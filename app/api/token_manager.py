@@ -0,0 +1,122 @@
+import threading
+import time
+from ..utils.logger import logger
+
+
+class TokenManager:
+    """Кэш access token с учётом срока действия и фоновым обновлением.
+
+    ``fetch_token`` возвращает кортеж ``(token, expires_at)``, где
+    ``expires_at`` — unix-время в секундах (или ``None``, если срок неизвестен).
+    Одновременные запросы на обновление объединяются в один вызов
+    ``fetch_token`` (single-flight), а за ``refresh_margin`` секунд до истечения
+    токен обновляется в фоновом потоке.
+    """
+
+    def __init__(self, fetch_token, refresh_margin=60.0, retry_delay=30.0, name="token"):
+        self._fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self.retry_delay = retry_delay
+        self.name = name
+        self._token = None
+        self._expires_at = None
+        self._inflight = False
+        self._cond = threading.Condition()
+        self._timer = None
+
+    @property
+    def token(self):
+        """Текущий токен без обращения к сети (может быть ``None``)."""
+        return self._token
+
+    @property
+    def expires_at(self):
+        return self._expires_at
+
+    def _is_valid(self):
+        if not self._token:
+            return False
+        if self._expires_at is None:
+            return True
+        return time.time() < self._expires_at - 1.0
+
+    def start(self):
+        """Запускает получение токена в фоне, не блокируя вызывающий поток."""
+        thread = threading.Thread(target=self._background_refresh, name=f"{self.name}-prefetch", daemon=True)
+        thread.start()
+        return thread
+
+    def get_token(self):
+        """Возвращает действующий токен, при необходимости обновляя его."""
+        if self._is_valid():
+            return self._token
+        return self.refresh()
+
+    def invalidate(self, stale_token=None):
+        """Помечает токен недействительным (например, после ответа 401)."""
+        with self._cond:
+            if stale_token is None or self._token == stale_token:
+                self._token = None
+                self._expires_at = None
+
+    def refresh(self):
+        """Получает новый токен; параллельные вызовы ждут один общий запрос."""
+        with self._cond:
+            if self._inflight:
+                while self._inflight:
+                    self._cond.wait()
+                return self._token
+            self._inflight = True
+
+        token, expires_at = None, None
+        try:
+            logger.info(f"Refreshing {self.name}...")
+            token, expires_at = self._fetch_token()
+        except Exception as e:
+            logger.warning(f"{self.name} refresh failed: {type(e).__name__}: {e}")
+        finally:
+            with self._cond:
+                if token:
+                    self._token = token
+                    self._expires_at = expires_at
+                self._inflight = False
+                self._cond.notify_all()
+
+        self._schedule_refresh(success=bool(token))
+        return self._token
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"Background {self.name} refresh failed: {e}")
+
+    def _schedule_refresh(self, success):
+        if success and self._expires_at is None:
+            return
+        if success:
+            delay = max(1.0, self._expires_at - time.time() - self.refresh_margin)
+        else:
+            delay = self.retry_delay
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+        logger.debug(f"Next {self.name} refresh in {delay:.0f}s")
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+def normalize_expires_at(value):
+    """Приводит ``expires_at`` из ответа OAuth (мс или с) к секундам."""
+    if value in (None, ""):
+        return None
+    value = float(value)
+    # GigaChat отдаёт expires_at в миллисекундах
+    if value > 1e11:
+        value = value / 1000.0
+    return value
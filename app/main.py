@@ -1,10 +1,21 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from .services.analysis_service import AnalysisService
+from .services.job_queue import JobQueue
+from .services.dataset_store import DatasetStore
+from .services.statistics import statistics_view
+from .services.table_query import parse_filters, parse_sort
+from .services.pagination import make_cursor, read_cursor, view_key
+from .services.downsampling import downsample_positions
+from .services.chart_cache import ChartCache, create_chart_cache
+from .services.prompt_builder import build_table_prompt, build_text_prompt
+from .api.sse import format_event
 from .utils.file_handler import validate_file
 from .utils.logger import logger
+from .utils.serialization import column_to_list, dumps, frame_to_columns, frame_to_records
 from flask import render_template
 import os
+import uuid
 import logging
 import pandas as pd
 import numpy as np
@@ -14,21 +25,201 @@ app = Flask(__name__)
 CORS(app)
 analysis_service = AnalysisService()
 
-# In-memory data store
-data_store = {
-    "dataframe": None,
-    "text_data": None,
-    "filename": None,
-    "data_type": None  # 'table' or 'text'
-}
+
+def _load_dataset(record):
+    """Данные набора из реестра по ключу columnar store (таблица — memory-mapped) и его статистика."""
+    store = analysis_service.columnar_store
+    key = record["content_hash"]
+    if store is None or not key:
+        return None
+    data = store.open_table(key) if os.path.exists(store.table_path(key)) else store.load(key)
+    if data is None:
+        return None
+    return data, store.load_stats(key)
+
+
+# Реестр загруженных наборов данных (по dataset_id и сессии); метаданные — в SQLite,
+# общей для всех воркеров, данные восстанавливаются из columnar store
+dataset_store = DatasetStore(
+    memory_limit=int(float(os.getenv('DATASET_MEMORY_LIMIT_MB', '512')) * 1024 * 1024),
+    registry_path=os.getenv('DATASET_REGISTRY_PATH', 'jobs/datasets.sqlite'),
+    loader=_load_dataset
+)
+
+# Кэш готовых ответов /api/charts; записи набора сбрасываются при его замене или удалении
+chart_cache = create_chart_cache()
+if chart_cache is not None:
+    dataset_store.on_remove(chart_cache.invalidate)
+
+
+def _session_id():
+    """Сессия клиента: заголовок X-Session-ID или параметр session_id."""
+    return request.headers.get('X-Session-ID') or request.args.get('session_id') or 'default'
+
+
+def _resolve_dataset(payload=None):
+    """Набор данных из параметра dataset_id (query или JSON), иначе последний набор сессии."""
+    dataset_id = request.args.get('dataset_id')
+    if not dataset_id and isinstance(payload, dict):
+        dataset_id = payload.get('dataset_id')
+    return dataset_store.resolve(dataset_id, _session_id())
 
 @app.route('/')
 def home():
     logger.info("Home page requested")
     return render_template('index.html')
 
+def _store_ingested(ingested, filename, file_path, session_id, dataset_id=None):
+    """Регистрирует распарсенные данные в dataset_store и возвращает краткую сводку.
+
+    С ``dataset_id`` заменяет данные существующего набора вместо создания нового.
+    """
+    data = ingested["data"]
+    dataset = None
+    if dataset_id:
+        dataset = dataset_store.replace(dataset_id, session_id, filename, data, file_path=file_path,
+                                        schema=ingested["schema"], content_hash=ingested.get("content_hash"),
+                                        stats=ingested.get("stats"), line_index=ingested.get("line_index"))
+    if dataset is None:
+        dataset = dataset_store.add(session_id, filename, data, file_path=file_path,
+                                    schema=ingested["schema"], content_hash=ingested.get("content_hash"),
+                                    stats=ingested.get("stats"), line_index=ingested.get("line_index"))
+
+    if dataset.data_type == "table":
+        logger.info(f"✅ Data stored successfully (dataset {dataset.dataset_id})")
+        logger.info(f"   Rows: {dataset.num_rows}")
+        logger.info(f"   Columns: {dataset.columns}")
+        return {
+            "dataset_id": dataset.dataset_id,
+            "version": dataset.version,
+            "from_cache": ingested.get("from_cache", False),
+            "filename": filename,
+            "data_type": "table",
+            "rows": dataset.num_rows,
+            "columns": dataset.columns,
+            "schema": ingested["schema"]
+        }
+
+    # Handle non-dataframe data (e.g., from PDF)
+    text_data = dataset.text_data
+    text_length = len(text_data) if isinstance(text_data, str) else 0
+
+    logger.info("⚠️ File processed but data is not a DataFrame")
+    logger.info(f"   Data type: {type(data)}")
+    logger.info(f"   Text length: {text_length} characters")
+
+    return {
+        "dataset_id": dataset.dataset_id,
+        "version": dataset.version,
+        "from_cache": ingested.get("from_cache", False),
+        "filename": filename,
+        "message": "File processed successfully",
+        "data_type": "text",
+        "content_length": text_length,
+        "schema": ingested["schema"]
+    }
+
+
+def _ingest_upload(file_path, filename, session_id, replace_id=None, stream=None, options=None, progress=None):
+    """Парсит загруженный файл и регистрирует наборы данных.
+
+    Каждый лист многолистовой книги Excel (если ``sheet`` не указан)
+    становится отдельным набором: сводка первого листа возвращается на
+    верхнем уровне, сводки всех листов — в ``datasets``. Так же и каждая
+    таблица PDF (``pdf_mode=tables``); на верхнем уровне — самая большая.
+
+    Returns:
+        (сводка, результат ``ingest_file`` для первого набора)
+    """
+    options = dict(options or {})
+    sheets = [] if options.get("sheet") is not None else analysis_service.list_sheets(file_path)
+    if len(sheets) <= 1:
+        ingested = analysis_service.ingest_file(file_path, progress=progress, stream=stream, options=options)
+        if "tables" not in ingested:
+            return _store_ingested(ingested, filename, file_path, session_id, replace_id), ingested
+        logger.info(f"📑 PDF has {len(ingested['tables'])} tables, registering each as a dataset")
+        summaries = []
+        for index, table in enumerate(ingested["tables"]):
+            summary = _store_ingested(table, f"{filename} [table {index + 1}]", file_path, session_id,
+                                      replace_id if index == 0 else None)
+            summary["table"] = index + 1
+            summaries.append(summary)
+        return {**summaries[ingested["primary"]], "datasets": summaries}, ingested
+
+    logger.info(f"📑 Workbook has {len(sheets)} sheets, ingesting each as a dataset")
+    summaries, first = [], None
+    for index, sheet in enumerate(sheets):
+        ingested = analysis_service.ingest_file(file_path, progress=progress, options={**options, "sheet": sheet})
+        summary = _store_ingested(ingested, f"{filename} [{sheet}]", file_path, session_id,
+                                  replace_id if index == 0 else None)
+        summary["sheet"] = sheet
+        summaries.append(summary)
+        if first is None:
+            first = ingested
+    return {**summaries[0], "datasets": summaries}, first
+
+
+def _run_upload_job(job_id, payload, progress):
+    """Фоновая обработка загруженного файла целиком: парсинг, затем анализ нейросетями."""
+    file_path = payload["file_path"]
+    logger.info(f"📄 Ingesting file for job {job_id}...")
+    summary, ingested = _ingest_upload(file_path, payload["filename"], payload.get("session_id") or 'default',
+                                       payload.get("dataset_id"), payload.get("stream"),
+                                       payload.get("options"), progress)
+    if payload.get("analyze", True):
+        summary.update(analysis_service.analyze_data(
+            ingested["data"], session_id=payload.get("session_id"), progress=progress,
+            profile=ingested.get("stats")
+        ))
+    return summary
+
+
+def _run_analysis_job(job_id, payload, progress):
+    """Фоновый анализ уже загруженных данных нейросетями."""
+    dataset = dataset_store.get(payload.get("dataset_id"))
+    if dataset is not None and dataset.file_path == payload["file_path"]:
+        data, profile = dataset.data, dataset.profile()
+    else:
+        # После перезапуска или вытеснения данных в памяти нет — повторно читаем файл
+        logger.info(f"Data for {payload['file_path']} not in memory, re-ingesting for job {job_id}")
+        ingested = analysis_service.ingest_file(payload["file_path"], progress=progress,
+                                                options=payload.get("options"))
+        data, profile = ingested["data"], ingested.get("stats")
+    logger.info(f"🤖 Starting AI analysis for job {job_id}...")
+    if payload.get("mode") == "map_reduce":
+        return analysis_service.analyze_map_reduce(data, session_id=payload.get("session_id"), progress=progress,
+                                                   profile=profile, providers=payload.get("providers"))
+    return analysis_service.analyze_data(data, session_id=payload.get("session_id"), progress=progress,
+                                         profile=profile)
+
+
+def _flag(value, default):
+    if value is None:
+        return default
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+AUTO_ANALYZE = _flag(os.getenv('AUTO_ANALYZE'), True)
+
+job_queue = JobQueue(
+    db_path=os.getenv('JOB_DB_PATH', 'jobs/jobs.sqlite'),
+    workers=int(os.getenv('JOB_WORKERS', '2')),
+    lease_seconds=float(os.getenv('JOB_LEASE_SECONDS', '60'))
+)
+job_queue.register("upload", _run_upload_job)
+job_queue.register("analysis", _run_analysis_job)
+job_queue.start()
+
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
+    """Сохраняет и парсит файл; анализ нейросетями выполняется отдельно в фоне.
+
+    Ответ приходит сразу после парсинга (строки, колонки, схема) и содержит
+    ``analysis_job_id``, если анализ поставлен в очередь (``analyze``, по
+    умолчанию ``AUTO_ANALYZE``). С ``async=true`` в фон уходит и парсинг:
+    ответ 202 с ``job_id``, состояние — через ``/api/jobs/<job_id>``.
+    """
     logger.info("=" * 80)
     logger.info("📁 UPLOAD REQUEST RECEIVED")
     logger.info(f"Content-Type: {request.content_type}")
@@ -41,6 +232,19 @@ def upload_file():
     file = request.files['file']
     logger.info(f"📄 File received: {file.filename}")
     logger.info(f"   Size: {file.content_length} bytes")
+
+    analyze = _flag(request.values.get('analyze'), AUTO_ANALYZE)
+    run_async = _flag(request.values.get('async'), False)
+    # stream=true — потоковая загрузка CSV чанками (по умолчанию — по размеру файла)
+    stream = _flag(request.values.get('stream'), None)
+    session_id = _session_id()
+    replace_id = request.values.get('dataset_id')
+    # Опции парсера: pdf_mode=tables — таблицы PDF как DataFrame; sheet=/usecols= — лист и колонки Excel
+    options = {
+        "mode": request.values.get('pdf_mode'),
+        "sheet": request.values.get('sheet'),
+        "usecols": request.values.get('usecols')
+    }
     
     try:
         logger.info("🔍 Validating file...")
@@ -48,53 +252,43 @@ def upload_file():
         logger.info("✅ File validation passed")
         
         logger.info("💾 Saving file to uploads folder...")
-        file_path = os.path.join("uploads", file.filename)
         os.makedirs("uploads", exist_ok=True)
+        # Уникальный префикс, чтобы задачи в очереди не перезаписывали файлы друг друга
+        file_path = os.path.join("uploads", f"{uuid.uuid4().hex[:8]}_{os.path.basename(file.filename)}")
         file.save(file_path)
         logger.info(f"✅ File saved to: {file_path}")
-        logger.info(f"   File exists: {os.path.exists(file_path)}")
         logger.info(f"   File size: {os.path.getsize(file_path)} bytes")
 
-        logger.info("🤖 Starting file analysis...")
-        analysis_result = analysis_service.analyze_file(file_path)
-        logger.info("✅ File analysis completed")
-        
-        if isinstance(analysis_result.get("data"), pd.DataFrame):
-            data_store["dataframe"] = analysis_result["data"]
-            data_store["text_data"] = None
-            data_store["data_type"] = "table"
-            data_store["filename"] = file.filename
-            df = data_store["dataframe"]
-            logger.info(f"✅ Data stored successfully")
-            logger.info(f"   Rows: {len(df)}")
-            logger.info(f"   Columns: {list(df.columns)}")
-            return jsonify({
-                "status": "success",
+        if run_async:
+            job_id = job_queue.submit("upload", {
+                "file_path": file_path,
                 "filename": file.filename,
-                "rows": len(df),
-                "columns": list(df.columns)
+                "session_id": session_id,
+                "dataset_id": replace_id,
+                "analyze": analyze,
+                "stream": stream,
+                "options": options
             })
-        else:
-            # Handle non-dataframe data (e.g., from PDF)
-            data_store["dataframe"] = None
-            data_store["text_data"] = analysis_result.get("data")
-            data_store["data_type"] = "text"
-            data_store["filename"] = file.filename
-            
-            text_data = data_store["text_data"]
-            text_length = len(text_data) if isinstance(text_data, str) else 0
-            
-            logger.info("⚠️ File processed but data is not a DataFrame")
-            logger.info(f"   Data type: {type(analysis_result.get('data'))}")
-            logger.info(f"   Text length: {text_length} characters")
-            
             return jsonify({
-                "status": "success",
+                "status": "accepted",
                 "filename": file.filename,
-                "message": "File processed successfully",
-                "data_type": "text",
-                "content_length": text_length
+                "job_id": job_id,
+                "status_url": f"/api/jobs/{job_id}"
+            }), 202
+
+        summary, _ = _ingest_upload(file_path, file.filename, session_id, replace_id, stream, options)
+
+        if analyze:
+            job_id = job_queue.submit("analysis", {
+                "dataset_id": summary["dataset_id"],
+                "file_path": file_path,
+                "session_id": session_id,
+                "options": options
             })
+            summary["analysis_job_id"] = job_id
+            summary["analysis_status_url"] = f"/api/jobs/{job_id}"
+
+        return jsonify({"status": "success", **summary})
 
     except Exception as e:
         logger.error(f"❌ Error during file upload: {type(e).__name__}: {str(e)}", exc_info=True)
@@ -103,79 +297,156 @@ def upload_file():
             "message": f"An error occurred: {str(e)}"
         }), 500
 
+
+@app.route('/api/analyze', methods=['POST'])
+def analyze_current_data():
+    """Ставит в очередь анализ нейросетями для уже загруженного набора данных.
+
+    ``mode``: ``single`` (по умолчанию) — один запрос по выборке таблицы,
+    ``map_reduce`` — анализ всей таблицы по фрагментам с итоговой сводкой.
+    ``providers``: ``["giga_chat"]``, ``["proxy_api"]`` или оба (по умолчанию).
+    """
+    payload = request.get_json(silent=True) or {}
+    mode = payload.get('mode', 'single')
+    if mode not in ('single', 'map_reduce'):
+        return jsonify({"status": "error", "message": f"Unknown analysis mode: {mode}"}), 400
+    providers = payload.get('providers')
+    if providers is not None and (not isinstance(providers, list) or not providers
+                                  or not set(providers) <= {'giga_chat', 'proxy_api'}):
+        return jsonify({"status": "error", "message": "providers must be a list of 'giga_chat', 'proxy_api'"}), 400
+    dataset = _resolve_dataset(payload)
+    if dataset is None or not dataset.file_path:
+        return jsonify({"status": "error", "message": "No data loaded. Please upload a file first."}), 404
+    job_id = job_queue.submit("analysis", {
+        "dataset_id": dataset.dataset_id,
+        "file_path": dataset.file_path,
+        "session_id": _session_id(),
+        "mode": mode,
+        "providers": providers
+    })
+    return jsonify({
+        "status": "accepted",
+        "dataset_id": dataset.dataset_id,
+        "job_id": job_id,
+        "status_url": f"/api/jobs/{job_id}"
+    }), 202
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Статус фоновой задачи: status, stage, progress и результат."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Отмена фоновой задачи: из очереди — сразу, выполняющейся — на ближайшем этапе."""
+    status = job_queue.cancel(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"job_id": job_id, "status": status}), 202 if status == JobQueue.STATUS_CANCELLING else 200
+
+@app.route('/api/datasets', methods=['GET'])
+def list_datasets():
+    """Наборы данных текущей сессии и использование памяти реестром."""
+    return jsonify({
+        "datasets": dataset_store.list(_session_id()),
+        "store": dataset_store.stats()
+    })
+
+
+@app.route('/api/datasets/<dataset_id>', methods=['DELETE'])
+def delete_dataset(dataset_id):
+    if not dataset_store.remove(dataset_id, _session_id()):
+        return jsonify({"error": "Dataset not found"}), 404
+    return jsonify({"status": "success", "dataset_id": dataset_id})
+
+
 @app.route('/api/data', methods=['GET'])
 def get_data():
     logger.debug("Data request received")
-    data_type = data_store.get("data_type")
+    dataset = _resolve_dataset()
+    if dataset is None:
+        logger.warning("No data available in data store")
+        return jsonify({"error": "No data available"}), 404
+    data_type = dataset.data_type
     
     if data_type == "table":
-        df = data_store.get("dataframe")
-        if df is None:
-            logger.warning("No table data available in data store")
-            return jsonify({"error": "No data available"}), 404
-
         offset = int(request.args.get('offset', 0))
         limit = int(request.args.get('limit', 100))
-        logger.debug(f"Returning table data slice: offset={offset}, limit={limit}")
-        
-        df_slice = df.iloc[offset:offset+limit]
-
-        # Replace NaN with None and convert numpy types to Python native types
-        def sanitize_row(row):
-            sanitized = {}
-            for k, v in row.items():
-                if pd.isna(v):
-                    sanitized[k] = None
-                elif isinstance(v, (np.integer,)):
-                    sanitized[k] = int(v)
-                elif isinstance(v, (np.floating,)):
-                    sanitized[k] = float(v)
-                elif isinstance(v, (np.bool_,)):
-                    sanitized[k] = bool(v)
-                elif hasattr(v, 'item') and isinstance(v, np.generic):
-                    try:
-                        sanitized[k] = v.item()
-                    except Exception:
-                        sanitized[k] = str(v)
-                else:
-                    sanitized[k] = v
-            return sanitized
-
-        rows = [sanitize_row(r) for r in df_slice.to_dict(orient='records')]
-
-        return jsonify({
+        columns = [name for name in request.args.get('columns', '').split(',') if name] or None
+
+        try:
+            filters = parse_filters(request.args.getlist('filter'))
+            sort = parse_sort(request.args.get('sort'))
+            key = view_key(filters, sort)
+            # Курсор фиксирует позицию в конкретной версии набора и представлении
+            if request.args.get('cursor'):
+                offset = read_cursor(request.args['cursor'], dataset.version, key)
+            logger.debug(f"Returning table data slice: offset={offset}, limit={limit}")
+
+            # Позиции строк фильтра/сортировки кэшируются в наборе, страница берётся за O(limit)
+            positions = dataset.view(filters, sort)
+            if positions is None:
+                # Срез читается без материализации всей таблицы (важно для потоковых наборов)
+                df_slice = dataset.slice(offset, limit, columns)
+                total_rows = dataset.num_rows
+            else:
+                df_slice = dataset.take(positions[offset:offset + limit], columns)
+                total_rows = len(positions)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Колоночная векторная сериализация вместо поячеечного sanitize_row
+        payload = {
+            "dataset_id": dataset.dataset_id,
             "data_type": "table",
-            "columns": list(df.columns),
-            "rows": rows,
-            "total_rows": len(df)
-        })
+            "columns": columns or dataset.columns,
+            "total_rows": total_rows,
+            "dataset_rows": dataset.num_rows,
+            "next_cursor": (make_cursor(dataset.version, offset + limit, key)
+                            if offset + limit < total_rows else None)
+        }
+        if request.args.get('format') == 'columns':
+            payload["format"] = "columns"
+            payload["data"] = frame_to_columns(df_slice)
+        else:
+            payload["rows"] = frame_to_records(df_slice)
+
+        return Response(dumps(payload), mimetype='application/json')
     
     elif data_type == "text":
-        text_data = data_store.get("text_data")
-        if text_data is None:
+        if dataset.text_data is None:
             logger.warning("No text data available in data store")
             return jsonify({"error": "No data available"}), 404
-        
-        logger.debug(f"Returning text data (length: {len(text_data)} chars)")
-        
-        # Split text into lines for display as table rows
-        lines = text_data.split('\n')
+
+        # Индекс строк строится один раз; текст не разбивается заново на каждый запрос
+        index = dataset.line_index()
         offset = int(request.args.get('offset', 0))
         limit = int(request.args.get('limit', 100))
-        
-        # Take a slice of lines
-        sliced_lines = lines[offset:offset+limit]
-        
+        key = view_key("lines")
+        if request.args.get('cursor'):
+            try:
+                offset = read_cursor(request.args['cursor'], dataset.version, key)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+        logger.debug(f"Returning text lines: offset={offset}, limit={limit} of {len(index)}")
+
         # Convert lines to table format (each line is a row with a single column "Content")
-        rows = [{"Content": line[:1000]} for line in sliced_lines if line.strip()]  # Limit line length to 1000 chars
+        rows = [{"Content": line[:1000]} for line in index.lines(offset, limit) if line.strip()]  # Limit line length to 1000 chars
         
         logger.debug(f"Converted {len(rows)} text lines to table rows")
         
         return jsonify({
+            "dataset_id": dataset.dataset_id,
             "data_type": "text",
             "columns": ["Content"],
             "rows": rows,
-            "total_rows": len(lines)
+            "total_rows": len(index),
+            "next_cursor": make_cursor(dataset.version, offset + limit, key) if offset + limit < len(index) else None
         })
     
     else:
@@ -185,59 +456,45 @@ def get_data():
 @app.route('/api/analysis', methods=['GET'])
 def get_analysis():
     logger.info("Analysis request received")
-    data_type = data_store.get("data_type")
-    
-    if data_type == "table":
-        df = data_store.get("dataframe")
-        if df is None:
-            logger.warning("No table data available for analysis")
-            return jsonify({"error": "No data available"}), 404
-
-        numeric_cols = df.select_dtypes(include=['number']).columns
-        # Compute sums and sanitize values to be JSON-serializable
-        raw_sums = df[numeric_cols].sum()
-        column_sums = {}
-        for col in numeric_cols:
-            v = raw_sums[col]
-            if pd.isna(v):
-                column_sums[col] = None
-            else:
-                try:
-                    fv = float(v)
-                    if fv.is_integer():
-                        column_sums[col] = int(fv)
-                    else:
-                        column_sums[col] = fv
-                except Exception:
-                    try:
-                        column_sums[col] = int(v)
-                    except Exception:
-                        column_sums[col] = str(v)
-
-        unique_counts = {col: int(df[col].nunique()) for col in df.columns}
-
-        logger.info(f"Analysis complete: {len(numeric_cols)} numeric columns")
+    dataset = _resolve_dataset()
+    if dataset is None:
+        logger.warning("No data available for analysis")
+        return jsonify({"error": "No data available"}), 404
+    data_type = dataset.data_type
 
+    if data_type == "table":
+        # Профиль считается один раз на версию набора (при загрузке), здесь только отдаётся
+        profile = dataset.profile()
+        view = statistics_view(profile, exact=_flag(request.args.get('exact'), True))
+        logger.info(f"Serving column profile: {len(profile['columns'])} columns (exact={view['exact']})")
         return jsonify({
+            "dataset_id": dataset.dataset_id,
+            "version": dataset.version,
             "data_type": "table",
-            "column_sums": column_sums,
-            "unique_counts": unique_counts
+            "rows": profile["rows"],
+            "exact": view["exact"],
+            "column_sums": profile["column_sums"],
+            "unique_counts": view["unique_counts"],
+            "quantiles": view["quantiles"],
+            "columns": profile["columns"]
         })
     
     elif data_type == "text":
-        text_data = data_store.get("text_data")
+        text_data = dataset.text_data
         if text_data is None:
             logger.warning("No text data available for analysis")
             return jsonify({"error": "No data available"}), 404
         
-        # Basic text analysis
-        word_count = len(text_data.split())
-        char_count = len(text_data)
-        line_count = len(text_data.split('\n'))
+        # Счётчики текста считаются один раз на версию набора, строки — по индексу строк
+        text_stats = dataset.text_stats()
+        word_count = text_stats["words"]
+        char_count = text_stats["chars"]
+        line_count = text_stats["lines"]
         
         logger.info(f"Text analysis complete: {char_count} chars, {word_count} words")
         
         return jsonify({
+            "dataset_id": dataset.dataset_id,
             "data_type": "text",
             "column_sums": {
                 "Всего символов": char_count,
@@ -253,6 +510,14 @@ def get_analysis():
         logger.warning("No data available for analysis")
         return jsonify({"error": "No data available"}), 404
 
+def _sse_response(events):
+    """Ответ text/event-stream из генератора ``(event, data)`` (см. ``AnalysisService.stream_providers``)."""
+    body = stream_with_context(format_event(event, data) for event, data in events)
+    # X-Accel-Buffering: nginx не должен копить поток в буфере
+    return Response(body, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 @app.route('/api/table-analysis', methods=['POST'])
 def table_analysis():
     """
@@ -260,7 +525,8 @@ def table_analysis():
     
     Ожидаемый JSON-запрос:
     {
-        "rows_count": 15  (опционально, по умолчанию 15)
+        "rows_count": 15,  (опционально, по умолчанию 15)
+        "dataset_id": "..."  (опционально, по умолчанию последний набор сессии)
     }
     
     Возвращает:
@@ -270,40 +536,41 @@ def table_analysis():
         "proxy_result": "результат от Proxy API",
         "errors": {}
     }
+
+    С ``?stream=true`` (или ``"stream": true``) ответы обоих провайдеров
+    передаются параллельно по мере генерации как Server-Sent Events:
+    ``delta`` ({provider, text}), ``done`` ({provider, result}),
+    ``error`` ({provider, error}) и финальное ``end`` ({errors}).
     """
     logger.info("=" * 80)
     logger.info("📊 TABLE ANALYSIS REQUEST RECEIVED")
     
+    # Получаем параметры запроса
+    request_data = request.get_json(silent=True) or {}
+
     # Проверяем наличие данных
-    data_type = data_store.get("data_type")
-    if not data_type:
+    dataset = _resolve_dataset(request_data)
+    if dataset is None:
         logger.error("❌ No data available in data store")
         return jsonify({
             "status": "error",
             "message": "No data loaded. Please upload a file first."
         }), 404
-    
-    # Получаем параметры запроса
-    request_data = request.get_json() or {}
+    data_type = dataset.data_type
+    text_data = dataset.text_data
+
     rows_count = int(request_data.get('rows_count', 15))
     logger.info(f"  Rows count to analyze: {rows_count}")
     
     try:
         # Получаем данные в зависимости от типа
         if data_type == "table":
-            df = data_store.get("dataframe")
-            if df is None:
-                logger.error("❌ DataFrame is None")
-                return jsonify({
-                    "status": "error",
-                    "message": "Table data not available"
-                }), 404
-            
-            logger.info(f"  DataFrame size: {len(df)} rows, {len(df.columns)} columns")
-            data_to_analyze = df
+            logger.info(f"  DataFrame size: {dataset.num_rows} rows, {len(dataset.columns)} columns")
+            # Анализируются только первые строки — всю таблицу не материализуем
+            data_to_analyze = dataset.slice(0, rows_count)
+            profile = dataset.profile()
             
         elif data_type == "text":
-            text_data = data_store.get("text_data")
             if text_data is None:
                 logger.error("❌ Text data is None")
                 return jsonify({
@@ -311,10 +578,17 @@ def table_analysis():
                     "message": "Text data not available"
                 }), 404
             
-            # Преобразуем текст в список строк
-            lines = text_data.split('\n')
-            data_to_analyze = [{"line": i+1, "content": line} for i, line in enumerate(lines) if line.strip()]
-            logger.info(f"  Text data converted to {len(data_to_analyze)} rows")
+            # Анализируются только первые непустые строки: берутся по индексу строк, текст не разбивается
+            index = dataset.line_index()
+            data_to_analyze = []
+            for position in range(len(index)):
+                if len(data_to_analyze) >= rows_count:
+                    break
+                line = index.line(position)
+                if line.strip():
+                    data_to_analyze.append({"line": position + 1, "content": line})
+            logger.info(f"  First {len(data_to_analyze)} non-empty lines of {len(index)} taken for analysis")
+            profile = {"rows": len(index)}  # в промпте — число строк всего документа
         else:
             logger.error(f"❌ Unknown data type: {data_type}")
             return jsonify({
@@ -322,9 +596,16 @@ def table_analysis():
                 "message": f"Unknown data type: {data_type}"
             }), 400
         
+        if _flag(request.args.get('stream', request_data.get('stream')), False):
+            prompt = analysis_service.table_analysis_prompt(data_to_analyze, rows_count=rows_count, profile=profile)
+            logger.info("  🤖 Streaming analysis from neural networks...")
+            return _sse_response(analysis_service.stream_providers(prompt, session_id=_session_id()))
+
         # Отправляем на анализ
         logger.info(f"  🤖 Sending data to analysis service...")
-        analysis_results = analysis_service.analyze_table_first_rows(data_to_analyze, rows_count=rows_count)
+        analysis_results = analysis_service.analyze_table_first_rows(
+            data_to_analyze, rows_count=rows_count, profile=profile
+        )
         
         logger.info("  ✅ Analysis completed successfully")
         logger.debug(f"  GigaChat result: {bool(analysis_results.get('giga_result'))}")
@@ -333,6 +614,7 @@ def table_analysis():
         
         return jsonify({
             "status": "success",
+            "dataset_id": dataset.dataset_id,
             "giga_result": analysis_results.get("giga_result"),
             "proxy_result": analysis_results.get("proxy_result"),
             "errors": analysis_results.get("errors", {})
@@ -347,8 +629,9 @@ def table_analysis():
 
 @app.route('/api/ai_analyze', methods=['POST'])
 def ai_analyze():
-    df = data_store.get("dataframe")
-    if df is None:
+    """Анализ присланных строк GigaChat; с ``?stream=true`` — поток Server-Sent Events."""
+    dataset = _resolve_dataset()
+    if dataset is None or dataset.data_type != "table":
         return jsonify({"error": "No data available"}), 404
         
     data_sample = request.get_json()
@@ -358,9 +641,13 @@ def ai_analyze():
     try:
         # Convert sample to string for the AI
         sample_str = pd.DataFrame(data_sample).to_string()
+
+        if _flag(request.args.get('stream'), False):
+            return _sse_response(analysis_service.stream_providers(sample_str, session_id=_session_id(),
+                                                                   only=["giga_chat"]))
         
         # For now, let's just use the GigaChat API as an example
-        giga_result = analysis_service.giga_api.send_analysis_request(sample_str)
+        giga_result = analysis_service.ask_gigachat(sample_str)
         
         return jsonify({"answer": giga_result})
     except Exception as e:
@@ -399,24 +686,17 @@ def proxy_analyze():
     # limit to first 50 rows
     limited = rows[:50]
 
-    # Normalize rows to string table: if dict -> convert to line with key: value; if string -> use as-is
-    lines = []
-    for r in limited:
-        if isinstance(r, dict):
-            parts = []
-            for k, v in r.items():
-                parts.append(f"{k}: {v}")
-            lines.append(" | ".join(parts))
-        else:
-            lines.append(str(r))
-
-    table_str = "\n".join(lines)
+    # Строки-словари -> компактная таблица со схемой; строки-тексты передаются как есть (в пределах бюджета)
+    if all(isinstance(r, dict) for r in limited):
+        table_str = build_table_prompt(pd.DataFrame(limited), head=True)
+    else:
+        table_str = build_text_prompt("\n".join(str(r) for r in limited))
 
     system_prompt = (
         "Ты - аналитическая система с большим опытом. Твоя задача - анализировать\n"
         "табличные данные, делать выводы и находить аномалии или интересные тенденции.\n"
         "Фронт должен отображать этот ответ в блоке \"Анализ от нейросети [имя Ai]\"\n\n"
-        f"Вот первые {len(lines)} строк таблицы:\n{table_str}"
+        f"Вот первые {len(limited)} строк таблицы:\n{table_str}"
     )
 
     # Use ProxyAPI if available
@@ -426,7 +706,7 @@ def proxy_analyze():
 
     try:
         logger.info("Sending analysis request to ProxyAPI")
-        proxy_result = analysis_service.proxy_api.send_analysis_request(system_prompt)
+        proxy_result = analysis_service.ask_proxy(system_prompt)
         logger.info("ProxyAPI analysis completed")
 
         return jsonify({
@@ -440,48 +720,115 @@ def proxy_analyze():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@app.route('/api/providers', methods=['GET'])
+def get_providers():
+    """Состояние провайдеров нейросетей: выключатель (closed/open/half_open), p95 задержки и текущий таймаут."""
+    return jsonify(analysis_service.llm.stats())
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Счётчики попаданий/промахов кэша ответов нейросетей и кэша графиков."""
+    cache = analysis_service.response_cache
+    charts = chart_cache.stats() if chart_cache is not None else None
+    if cache is None:
+        return jsonify({"enabled": False, "charts": charts})
+    return jsonify({"enabled": True, **cache.stats(), "charts": charts})
+
+
+@app.route('/api/cache', methods=['DELETE'])
+def clear_cache():
+    cache = analysis_service.response_cache
+    if cache is not None:
+        cache.clear()
+        logger.info("LLM response cache cleared")
+    if chart_cache is not None:
+        chart_cache.clear()
+    return jsonify({"status": "success"})
+
+
 @app.route('/api/chart_types', methods=['GET'])
 def get_chart_types():
     # Hardcoded for now, can be dynamic based on data
     return jsonify({"chart_types": ["bar", "line"]})
 
+# Максимум точек на ряд графика по умолчанию (0 — без прореживания)
+CHART_MAX_POINTS = int(os.getenv('CHART_MAX_POINTS', '2000'))
+
+
+def _render_charts(df, chart_type, columns, max_points, method):
+    """Тело ответа /api/charts (JSON bytes) для выбранных числовых колонок."""
+    numeric_cols = list(df.select_dtypes(include=['number']).columns) if chart_type in ('bar', 'line') else []
+    if columns:
+        by_name = {str(col): col for col in numeric_cols}
+        unknown = [name for name in columns if name not in by_name]
+        if unknown:
+            raise ValueError(f"Unknown or non-numeric columns: {', '.join(unknown)}")
+        numeric_cols = [by_name[name] for name in columns]
+    series = {col: df[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in numeric_cols}
+    label_positions, picks = downsample_positions(series, len(df), max_points, method)
+
+    kind = "Bar" if chart_type == 'bar' else "Line"
+    charts = [{
+        "type": chart_type,
+        "title": f"{kind} Chart for {col}",
+        "datasets": [{
+            "label": str(col),
+            "data": column_to_list(df[col].iloc[picks[col]])
+        }]
+    } for col in numeric_cols]
+
+    downsampled = len(label_positions) < len(df)
+    if downsampled:
+        logger.info(f"Charts downsampled ({method}): {len(df)} -> {len(label_positions)} points per series")
+
+    # Подписи оси X общие для всех графиков и передаются один раз
+    return dumps({
+        "labels": df.index[label_positions].astype(str).tolist() if charts else [],
+        "total_points": len(df),
+        "method": method if downsampled else None,
+        "charts": charts
+    })
+
+
 @app.route('/api/charts', methods=['GET'])
 def get_charts():
-    df = data_store.get("dataframe")
+    dataset = _resolve_dataset()
     chart_type = request.args.get('chart_type')
 
-    if df is None:
+    if dataset is None or dataset.data_type != "table":
         return jsonify({"error": "No data available"}), 404
     if not chart_type:
         return jsonify({"error": "chart_type parameter is required"}), 400
 
-    charts = []
-    numeric_cols = df.select_dtypes(include=['number']).columns
-    
-    if chart_type == 'bar':
-        for col in numeric_cols:
-            charts.append({
-                "type": "bar",
-                "title": f"Bar Chart for {col}",
-                "labels": df.index.astype(str).tolist(),
-                "datasets": [{
-                    "label": col,
-                    "data": [None if pd.isna(x) else (int(x) if isinstance(x, (np.integer,)) or (isinstance(x, (int,)) and float(x).is_integer()) else float(x) if isinstance(x, (np.floating,)) or isinstance(x, (float,)) else x) for x in df[col].tolist()]
-                }]
-            })
-    elif chart_type == 'line':
-        for col in numeric_cols:
-            charts.append({
-                "type": "line",
-                "title": f"Line Chart for {col}",
-                "labels": df.index.astype(str).tolist(),
-                "datasets": [{
-                    "label": col,
-                    "data": [None if pd.isna(x) else (int(x) if isinstance(x, (np.integer,)) or (isinstance(x, (int,)) and float(x).is_integer()) else float(x) if isinstance(x, (np.floating,)) or isinstance(x, (float,)) else x) for x in df[col].tolist()]
-                }]
-            })
-
-    return jsonify(charts)
+    try:
+        max_points = int(request.args.get('max_points', CHART_MAX_POINTS))
+    except ValueError:
+        return jsonify({"error": "max_points must be an integer"}), 400
+    # Линии сохраняют форму через LTTB, столбцы — через min/max корзин
+    method = request.args.get('method') or ('minmax' if chart_type == 'bar' else 'lttb')
+    columns = tuple(name for name in request.args.get('columns', '').split(',') if name)
+
+    # Версия набора в ключе: после замены данных ETag и запись кэша меняются
+    key = (dataset.dataset_id, dataset.version, chart_type, columns, max_points, method)
+    etag = ChartCache.etag(key)
+    if request.if_none_match.contains(etag):
+        if chart_cache is not None:
+            chart_cache.not_modified()
+        response = Response(status=304)
+    else:
+        body = chart_cache.get(key) if chart_cache is not None else None
+        if body is None:
+            try:
+                body = _render_charts(dataset.chart_frame(columns), chart_type, columns, max_points, method)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            if chart_cache is not None:
+                chart_cache.set(key, body)
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 if __name__ == '__main__':
     if not os.path.exists("uploads"):
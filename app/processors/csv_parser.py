@@ -1,11 +1,11 @@
 import pandas as pd
 from ..utils.logger import logger
 
-def parse_csv(file_path):
+def parse_csv(file_path, sep=','):
     logger.info(f"Parsing CSV file: {file_path}")
     try:
         logger.debug(f"  Reading CSV with pandas...")
-        df = pd.read_csv(file_path)
+        df = pd.read_csv(file_path, sep=sep)
         logger.info(f"  ✅ CSV parsed successfully")
         logger.debug(f"     Shape: {df.shape}")
         logger.debug(f"     Columns: {list(df.columns)}")
@@ -13,4 +13,9 @@ def parse_csv(file_path):
     except Exception as e:
         error_msg = f"Ошибка при чтении CSV: {str(e)}"
         logger.error(f"  ❌ {error_msg}", exc_info=True)
-        raise ValueError(error_msg)
\ No newline at end of file
+        raise ValueError(error_msg)
+
+
+def parse_tsv(file_path):
+    """TSV — CSV с табуляцией в качестве разделителя."""
+    return parse_csv(file_path, sep='\t')
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+from ..services.statistics import StatsAccumulator, table_quantiles
+from ..utils.logger import logger
+
+_INT_RANGES = {name: (np.iinfo(name.lower()).min, np.iinfo(name.lower()).max) for name in ("Int8", "Int16", "Int32", "Int64")}
+
+
+_BOOL_VALUES = {True: True, False: False, "True": True, "False": False, "true": True, "false": False}
+
+
+class SchemaViolation(Exception):
+    """Значения чанка не помещаются в выведенный тип колонки."""
+
+    def __init__(self, column, kind, widen_to):
+        super().__init__(f"Column {column!r} does not fit inferred type {kind}")
+        self.column = column
+        self.kind = kind
+        self.widen_to = widen_to
+
+
+def infer_csv_schema(file_path, sample_rows=10_000):
+    """Выводит типы колонок по первым ``sample_rows`` строкам с понижением разрядности.
+
+    Целые — самый узкий nullable Int, вмещающий значения выборки; дробные —
+    float64; булевы — boolean; остальное — string. Строковые колонки с низкой
+    кардинальностью помечаются как категориальные (для загрузки в память).
+    """
+    sample = pd.read_csv(file_path, nrows=sample_rows, low_memory=False)
+    schema, categorical = {}, []
+    for col in sample.columns:
+        series = sample[col]
+        if pd.api.types.is_bool_dtype(series):
+            kind = "boolean"
+        elif pd.api.types.is_integer_dtype(series) or (
+            pd.api.types.is_float_dtype(series) and series.dropna().apply(float.is_integer).all() and series.notna().any()
+        ):
+            lo, hi = series.min(), series.max()
+            kind = next((name for name, (mn, mx) in _INT_RANGES.items() if mn <= lo and hi <= mx), "float64")
+        elif pd.api.types.is_float_dtype(series):
+            kind = "float64"
+        else:
+            kind = "string"
+            valid = series.dropna()
+            if len(valid) and valid.nunique() <= max(1, len(valid) // 2):
+                categorical.append(str(col))
+        schema[str(col)] = kind
+    logger.debug(f"  Inferred CSV schema from {len(sample)} sample rows: {schema}")
+    return schema, categorical
+
+
+def _coerce_chunk(chunk, schema):
+    """Приводит чанк к схеме; при несовпадении бросает SchemaViolation."""
+    out = {}
+    for col, kind in schema.items():
+        series = chunk[col]
+        if kind == "string":
+            out[col] = series.astype("string")
+            continue
+        if kind == "boolean":
+            if not pd.api.types.is_bool_dtype(series):
+                valid = series.dropna()
+                if not valid.isin(list(_BOOL_VALUES)).all():
+                    raise SchemaViolation(col, kind, "string")
+                series = series.map(_BOOL_VALUES, na_action="ignore")
+            out[col] = series.astype("boolean")
+            continue
+        numeric = pd.to_numeric(series, errors="coerce")
+        if (numeric.isna() & series.notna()).any():
+            raise SchemaViolation(col, kind, "string")
+        if kind in _INT_RANGES:
+            valid = numeric.dropna()
+            lo, hi = _INT_RANGES[kind]
+            if len(valid) and not (valid % 1 == 0).all():
+                raise SchemaViolation(col, kind, "float64")
+            if len(valid) and (valid.min() < lo or valid.max() > hi):
+                # Сразу переходим к самому узкому типу, вмещающему значения чанка
+                vmin, vmax = valid.min(), valid.max()
+                widen_to = next((name for name, (mn, mx) in _INT_RANGES.items()
+                                 if mn <= vmin and vmax <= mx and mx > hi), "float64")
+                raise SchemaViolation(col, kind, widen_to)
+        out[col] = numeric.astype(kind)
+    return pd.DataFrame(out)
+
+
+def stream_csv(file_path, store, key, chunk_rows=100_000, sample_rows=10_000,
+               distinct_limit=100_000, exact=True, exact_quantiles=False, progress=None):
+    """Потоковая загрузка CSV в columnar store чанками по ``chunk_rows`` строк.
+
+    В памяти одновременно находится только один чанк, а статистика для
+    /api/analysis считается по ходу чтения. Если чанк не помещается в
+    выведенную по выборке схему, тип колонки расширяется и загрузка
+    начинается заново. При ``exact=False`` точные множества уникальных
+    значений не строятся — число уникальных берётся из HyperLogLog.
+    Квантили по умолчанию — из скетчей KLL фиксированного размера; точные
+    квантили (``exact_quantiles=True``) требуют отдельного прохода по
+    записанной таблице, который читает каждую числовую колонку целиком.
+
+    Returns:
+        dict со статистикой (см. ``StatsAccumulator.result``) и схемой
+    """
+    logger.info(f"Streaming CSV file: {file_path} (chunk_rows={chunk_rows})")
+    schema, categorical = infer_csv_schema(file_path, sample_rows)
+    read_dtypes = {col: "string" for col, kind in schema.items() if kind == "string"}
+    if not exact:
+        distinct_limit = 0
+
+    while True:
+        stats = StatsAccumulator(distinct_limit=distinct_limit)
+        try:
+            with store.table_writer(key, metadata={"categorical": categorical}) as writer:
+                for index, chunk in enumerate(pd.read_csv(file_path, chunksize=chunk_rows,
+                                                          dtype=read_dtypes, low_memory=False)):
+                    chunk.columns = [str(c) for c in chunk.columns]
+                    typed = _coerce_chunk(chunk, schema)
+                    writer.write(typed)
+                    stats.update(typed)
+                    if progress:
+                        progress("parsing", min(35, 10 + index))
+                    logger.debug(f"  Chunk {index + 1}: {stats.rows} rows streamed")
+            break
+        except SchemaViolation as e:
+            logger.info(f"  {e}; widening to {e.widen_to} and restarting")
+            schema[e.column] = e.widen_to
+            if e.widen_to == "string":
+                read_dtypes[e.column] = "string"
+
+    numeric_cols = [col for col, acc in stats.columns.items() if acc.numeric]
+    if numeric_cols and exact_quantiles:
+        # Точным квантилям нужны все значения — считаем их по уже записанному memory-mapped файлу
+        for col, values in table_quantiles(store.open_table(key), numeric_cols).items():
+            stats.columns[col].quantiles = values
+
+    logger.info(f"  ✅ CSV streamed: {stats.rows} rows, {len(schema)} columns")
+    result = stats.result()
+    result["schema"] = schema
+    result["exact"] = exact
+    result["exact_quantiles"] = exact_quantiles
+    return result
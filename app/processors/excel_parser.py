@@ -1,11 +1,141 @@
+import os
 import pandas as pd
 from ..utils.logger import logger
 
-def parse_excel(file_path):
+# python-calamine (Rust) читает xlsx/xls в разы быстрее openpyxl; необязателен
+try:
+    from python_calamine import CalamineWorkbook
+    _HAS_CALAMINE = True
+except Exception:
+    _HAS_CALAMINE = False
+
+# Строк в одном чанке при потоковом чтении через openpyxl
+EXCEL_CHUNK_ROWS = int(os.getenv('EXCEL_CHUNK_ROWS', '50000'))
+
+
+def list_sheets(file_path):
+    """Имена листов книги без чтения данных."""
+    if _HAS_CALAMINE:
+        return list(CalamineWorkbook.from_path(file_path).sheet_names)
+    if file_path.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+        workbook = load_workbook(file_path, read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+    return list(pd.ExcelFile(file_path).sheet_names)
+
+
+def _resolve_sheet(sheet, sheet_names):
+    """Лист по имени, а если такого имени нет — по номеру (с нуля)."""
+    if sheet is None:
+        return sheet_names[0]
+    if sheet in sheet_names:
+        return sheet
+    if str(sheet).isdigit() and int(sheet) < len(sheet_names):
+        return sheet_names[int(sheet)]
+    raise ValueError(f"Sheet not found: {sheet}. Available: {', '.join(sheet_names)}")
+
+
+def _column_names(header):
+    names = []
+    for index, value in enumerate(header):
+        name = f"Unnamed: {index}" if value is None else str(value)
+        base, suffix = name, 1
+        while name in names:
+            name = f"{base}.{suffix}"
+            suffix += 1
+        names.append(name)
+    return names
+
+
+def _usecols_indices(usecols, names):
+    """``usecols`` — имена колонок и/или буквы Excel ("A:C,F") -> номера колонок."""
+    from openpyxl.utils import column_index_from_string
+    if isinstance(usecols, str):
+        usecols = [part.strip() for part in usecols.split(',') if part.strip()]
+    indices = []
+    for item in usecols:
+        if item in names:
+            indices.append(names.index(item))
+        elif ':' in item:
+            first, last = (column_index_from_string(part.strip().upper()) - 1 for part in item.split(':'))
+            indices.extend(range(first, last + 1))
+        elif item.isalpha():
+            indices.append(column_index_from_string(item.upper()) - 1)
+        else:
+            raise ValueError(f"Unknown column in usecols: {item}")
+    return sorted(set(i for i in indices if i < len(names)))
+
+
+def _frame_from_rows(rows, usecols):
+    """Строки листа (первая — заголовок) -> DataFrame; данные собираются чанками."""
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame()
+    names = _column_names(header)
+    indices = _usecols_indices(usecols, names) if usecols else list(range(len(names)))
+    columns = [names[i] for i in indices]
+
+    chunks, buffer = [], []
+    for row in rows:
+        # Пустая ячейка: None у openpyxl, "" у calamine
+        values = [None if i >= len(row) or row[i] == "" else row[i] for i in indices]
+        if all(value is None for value in values):
+            continue
+        buffer.append(values)
+        if len(buffer) >= EXCEL_CHUNK_ROWS:
+            chunks.append(pd.DataFrame(buffer, columns=columns).infer_objects())
+            buffer = []
+    if buffer or not chunks:
+        chunks.append(pd.DataFrame(buffer, columns=columns).infer_objects())
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+def _read_openpyxl(file_path, sheet, usecols):
+    # read_only: строки читаются потоком из XML листа, книга целиком не строится
+    from openpyxl import load_workbook
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        name = _resolve_sheet(sheet, workbook.sheetnames)
+        logger.debug(f"  Streaming sheet '{name}' with openpyxl read_only")
+        return _frame_from_rows(workbook[name].iter_rows(values_only=True), usecols)
+    finally:
+        workbook.close()
+
+
+def _read_calamine(file_path, sheet, usecols):
+    # iter_rows отдаёт строки по одной: в Python не строится список всех строк листа,
+    # DataFrame собирается чанками (сам лист calamine держит в памяти Rust)
+    workbook = CalamineWorkbook.from_path(file_path)
+    name = _resolve_sheet(sheet, list(workbook.sheet_names))
+    logger.debug(f"  Streaming sheet '{name}' rows with calamine")
+    return _frame_from_rows(workbook.get_sheet_by_name(name).iter_rows(), usecols)
+
+
+def parse_excel(file_path, sheet=None, usecols=None):
+    """Лист книги Excel как DataFrame (по умолчанию — первый лист).
+
+    ``sheet`` — имя или номер листа, ``usecols`` — имена колонок или буквы
+    Excel через запятую ("A:C,F"). Строки читаются потоком через calamine
+    (``iter_rows``), если он установлен, иначе через openpyxl ``read_only``,
+    и собираются в DataFrame чанками; .xls без calamine читается через
+    ``pd.read_excel``.
+    """
     logger.info(f"Parsing Excel file: {file_path}")
     try:
-        logger.debug(f"  Reading Excel with pandas...")
-        df = pd.read_excel(file_path)
+        if _HAS_CALAMINE:
+            df = _read_calamine(file_path, sheet, usecols)
+        elif file_path.lower().endswith('.xlsx'):
+            df = _read_openpyxl(file_path, sheet, usecols)
+        else:
+            logger.debug("  Reading Excel with pandas...")
+            name = _resolve_sheet(sheet, list_sheets(file_path))
+            if isinstance(usecols, str) and ':' not in usecols:
+                usecols = [part.strip() for part in usecols.split(',')]
+            df = pd.read_excel(file_path, sheet_name=name, usecols=usecols)
         logger.info(f"  ✅ Excel parsed successfully")
         logger.debug(f"     Shape: {df.shape}")
         logger.debug(f"     Columns: {list(df.columns)}")
@@ -13,4 +143,4 @@ def parse_excel(file_path):
     except Exception as e:
         error_msg = f"Ошибка при чтении Excel: {str(e)}"
         logger.error(f"  ❌ {error_msg}", exc_info=True)
-        raise ValueError(error_msg)
\ No newline at end of file
+        raise ValueError(error_msg)
@@ -0,0 +1,31 @@
+import json
+import pandas as pd
+from ..utils.logger import logger
+
+
+def _nested_to_json(value):
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value
+
+
+def parse_jsonl(file_path):
+    """JSON Lines (один JSON-объект на строку) как DataFrame.
+
+    Вложенные объекты разворачиваются в колонки ``родитель.поле``
+    (``pd.json_normalize``), а массивы сохраняются строкой JSON — в таблице
+    остаются только скалярные значения, как у CSV.
+    """
+    logger.info(f"Parsing JSON Lines file: {file_path}")
+    try:
+        with open(file_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        df = pd.json_normalize(records, sep=".")
+        for col in df.columns[df.dtypes == object]:
+            if df[col].map(lambda value: isinstance(value, (list, dict))).any():
+                df[col] = df[col].map(_nested_to_json)
+        logger.info("  ✅ JSON Lines parsed successfully")
+        logger.debug(f"     Shape: {df.shape}")
+        return df
+    except Exception as e:
+        error_msg = f"Ошибка при чтении JSON Lines: {str(e)}"
+        logger.error(f"  ❌ {error_msg}", exc_info=True)
+        raise ValueError(error_msg)
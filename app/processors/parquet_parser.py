@@ -0,0 +1,18 @@
+from ..utils.logger import logger
+
+
+def parse_parquet(file_path, usecols=None):
+    """Parquet как DataFrame; ``usecols`` ("a,b") читает только нужные колонки."""
+    logger.info(f"Parsing Parquet file: {file_path}")
+    try:
+        import pyarrow.parquet as pq
+        if isinstance(usecols, str):
+            usecols = [name.strip() for name in usecols.split(',') if name.strip()]
+        df = pq.read_table(file_path, columns=usecols or None).to_pandas()
+        logger.info("  ✅ Parquet parsed successfully")
+        logger.debug(f"     Shape: {df.shape}")
+        return df
+    except Exception as e:
+        error_msg = f"Ошибка при чтении Parquet: {str(e)}"
+        logger.error(f"  ❌ {error_msg}", exc_info=True)
+        raise ValueError(error_msg)
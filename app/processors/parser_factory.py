@@ -1,8 +1,109 @@
-from app.processors.csv_parser import parse_csv
-from app.processors.excel_parser import parse_excel
-from app.processors.pdf_parser import parse_pdf
+import importlib
+import inspect
+import os
 from ..utils.logger import logger
 
+# Сторонние парсеры подключаются через entry points этой группы:
+#   [project.entry-points."dataanalytics.parsers"]
+#   ndjson = "my_package.parsers:parse_ndjson"
+# Имя entry point — расширение файла, значение — функция ``parse(file_path, **options)``.
+ENTRY_POINT_GROUP = "dataanalytics.parsers"
+
+# Расширение -> функция парсера или строка "модуль:функция" (импортируется при первом использовании)
+_PARSERS = {}
+# MIME-тип -> расширение: для файлов без известного расширения (см. ``sniff_mime_type``)
+_MIME_TYPES = {}
+_plugins_loaded = False
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def register_parser(extensions, target, mime_types=()):
+    """Регистрирует парсер для расширений (и MIME-типов).
+
+    ``target`` — функция или строка ``"модуль:функция"``: модуль парсера
+    (а с ним pandas, pdfplumber и т.п.) импортируется только при первом
+    разборе файла этого типа.
+    """
+    if isinstance(extensions, str):
+        extensions = (extensions,)
+    for ext in extensions:
+        _PARSERS[ext.lower().lstrip('.')] = target
+    for mime_type in mime_types:
+        _MIME_TYPES[mime_type] = extensions[0].lower().lstrip('.')
+
+
+def _load_plugins():
+    """Парсеры из entry points: список читается один раз и только при первом обращении."""
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    try:
+        from importlib.metadata import entry_points
+        plugins = entry_points(group=ENTRY_POINT_GROUP)
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to read parser entry points: {e}")
+        return
+    # Плагин с тем же расширением заменяет встроенный парсер
+    for plugin in plugins:
+        logger.info(f"🔌 Parser plugin registered: .{plugin.name} -> {plugin.value}")
+        register_parser(plugin.name, plugin.value)
+
+
+def supported_extensions():
+    _load_plugins()
+    return set(_PARSERS)
+
+
+def supported_mime_types():
+    return set(_MIME_TYPES)
+
+
+def _resolve(target):
+    if callable(target):
+        return target
+    module_name, _, attr = target.partition(':')
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def sniff_mime_type(head):
+    """MIME-тип по первым байтам файла (``None`` — формат не распознан)."""
+    if head.startswith(b"%PDF"):
+        return "application/pdf"
+    if head.startswith(b"PAR1"):
+        return "application/vnd.apache.parquet"
+    if head.startswith(b"\xd0\xcf\x11\xe0"):
+        return "application/vnd.ms-excel"
+    if head.startswith(b"PK\x03\x04"):
+        # xlsx — zip-архив с частями книги в xl/
+        return XLSX_MIME if b"[Content_Types].xml" in head or b"xl/" in head else None
+    if b"\x00" in head:
+        return None
+    lines = [line for line in head.decode("utf-8", errors="ignore").splitlines() if line.strip()]
+    if not lines:
+        return None
+    if lines[0].lstrip().startswith("{"):
+        return "application/x-ndjson"
+    if "\t" in lines[0]:
+        return "text/tab-separated-values"
+    if "," in lines[0] or ";" in lines[0]:
+        return "text/csv"
+    return None
+
+
+def resolve_file_type(file_path):
+    """Тип файла для выбора парсера: по расширению, а если оно неизвестно — по содержимому."""
+    ext = os.path.splitext(file_path)[1].lower().lstrip('.')
+    if ext in supported_extensions():
+        return ext
+    with open(file_path, 'rb') as f:
+        mime_type = sniff_mime_type(f.read(8192))
+    if mime_type in _MIME_TYPES:
+        logger.info(f"  🔎 Detected {mime_type} by content for {os.path.basename(file_path)}")
+        return _MIME_TYPES[mime_type]
+    raise ValueError(f"Unsupported file type: {ext or os.path.basename(file_path)}")
+
 
 class FileParser:
     def __init__(self, file_type):
@@ -12,24 +113,27 @@ class FileParser:
 
     def _get_parser(self):
         logger.debug(f"  Getting parser for file type: {self.file_type}")
-        if self.file_type == 'csv':
-            logger.debug("  Parser selected: CSV")
-            return parse_csv
-        elif self.file_type in ['xls', 'xlsx']:
-            logger.debug("  Parser selected: Excel")
-            return parse_excel
-        elif self.file_type == 'pdf':
-            logger.debug("  Parser selected: PDF")
-            return parse_pdf
-        else:
+        _load_plugins()
+        target = _PARSERS.get(self.file_type)
+        if target is None:
             error_msg = f"Unsupported file type: {self.file_type}"
             logger.error(f"  ❌ {error_msg}")
             raise ValueError(error_msg)
+        parser = _resolve(target)
+        # Импорт выполнен — дальше используется сама функция
+        _PARSERS[self.file_type] = parser
+        logger.debug(f"  Parser selected: {parser.__module__}.{parser.__name__}")
+        return parser
+
+    def accepted_options(self, options):
+        """Опции загрузки, которые понимает парсер (например, ``mode`` для PDF)."""
+        params = inspect.signature(self.parser).parameters
+        return {key: value for key, value in (options or {}).items() if key in params and value is not None}
 
-    def parse(self, file_path):
+    def parse(self, file_path, **options):
         logger.info(f"Parsing file: {file_path} using {self.file_type} parser")
         try:
-            result = self.parser(file_path)
+            result = self.parser(file_path, **self.accepted_options(options))
             logger.info(f"✅ File parsed successfully")
             return result
         except Exception as e:
@@ -40,3 +144,12 @@ class FileParser:
 def get_parser(file_type: str) -> FileParser:
     logger.debug(f"get_parser called with type: {file_type}")
     return FileParser(file_type)
+
+
+register_parser('csv', 'app.processors.csv_parser:parse_csv', ('text/csv',))
+register_parser('tsv', 'app.processors.csv_parser:parse_tsv', ('text/tab-separated-values',))
+register_parser('xlsx', 'app.processors.excel_parser:parse_excel', (XLSX_MIME,))
+register_parser('xls', 'app.processors.excel_parser:parse_excel', ('application/vnd.ms-excel',))
+register_parser('pdf', 'app.processors.pdf_parser:parse_pdf', ('application/pdf',))
+register_parser(('jsonl', 'ndjson'), 'app.processors.jsonl_parser:parse_jsonl', ('application/x-ndjson',))
+register_parser('parquet', 'app.processors.parquet_parser:parse_parquet', ('application/vnd.apache.parquet',))
@@ -1,21 +1,179 @@
+import functools
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pdfplumber
 from ..utils.logger import logger
+from .pdf_tables import tables_to_frames
 
-def parse_pdf(file_path):
-    logger.info(f"Parsing PDF file: {file_path}")
+# Параллельное извлечение текста: процессы обрабатывают диапазоны страниц
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = int(os.getenv('PDF_PAGES_PER_TASK', '16'))
+# Для коротких документов запуск процессов дороже самого извлечения
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '32'))
+# text — текст документа, tables — таблицы документа как DataFrame
+PDF_MODE = os.getenv('PDF_MODE', 'text')
+
+
+def _extract_pages(file_path, start, stop, tables=False):
+    """Страницы [start, stop) — выполняется в процессе пула (см. ``_page_content``)."""
+    with pdfplumber.open(file_path) as pdf:
+        return [_page_content(page, tables) for page in pdf.pages[start:stop]]
+
+
+def _page_content(page, tables=False):
+    """Текст страницы (без текста -> ""), а с ``tables=True`` — пара (текст, таблицы).
+
+    Таблицы — списки строк ячеек из ``page.extract_tables()``.
+    """
+    text = page.extract_text() or ""
+    found = [table for table in page.extract_tables() if table] if tables else None
+    # Освобождаем разобранные объекты страницы: в памяти остаётся только результат
+    page.close()
+    return (text, found) if tables else text
+
+
+def _mp_context():
+    # fork из многопоточного процесса Flask небезопасен (копируются захваченные блокировки).
+    # forkserver порождает процессы из отдельного однопоточного сервера, в который заранее
+    # загружен этот модуль. Как и при spawn, процессы импортируют __main__ как __mp_main__,
+    # поэтому run.py поднимает приложение только под if __name__ == '__main__'.
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+_MAIN_GUARD = re.compile(r"""if\s+__name__\s*==\s*['"]__main__['"]""")
+
+
+@functools.lru_cache(maxsize=1)
+def _main_is_guarded():
+    """Можно ли запускать пул: процессы пула импортируют ``__main__`` заново (как ``__mp_main__``).
+
+    Скрипт без ``if __name__ == '__main__'`` выполнился бы в каждом процессе
+    целиком и упал бы при запуске пула. Интерактивный режим и ``python -c``
+    (у ``__main__`` нет файла) повторно не импортируются.
+    """
+    path = getattr(sys.modules.get("__main__"), "__file__", None)
+    if path is None:
+        return True
     try:
-        logger.debug(f"  Opening PDF with pdfplumber...")
-        text = ""
-        with pdfplumber.open(file_path) as pdf:
-            page_count = len(pdf.pages)
-            logger.debug(f"  Total pages: {page_count}")
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            return bool(_MAIN_GUARD.search(f.read()))
+    except OSError:
+        return False
+
+
+def page_ranges(page_count, pages_per_task):
+    return [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+
+
+def iter_pdf_pages(file_path, workers=None, pages_per_task=None, tables=False):
+    """Генератор ``(номер страницы, текст)`` в порядке страниц, по мере готовности.
+
+    С ``tables=True`` вместо текста отдаётся пара ``(текст, таблицы)``.
+
+    Большие документы делятся на диапазоны по ``pages_per_task`` страниц и
+    обрабатываются пулом из ``workers`` процессов; страница отдаётся, как
+    только готовы все предыдущие, так что начало отчёта доступно до
+    окончания разбора. Короткие документы читаются в текущем процессе.
+
+    Процессы пула заново импортируют запускающий скрипт (``forkserver``/
+    ``spawn``), поэтому он должен запускать приложение только под
+    ``if __name__ == '__main__'``; без такой проверки документ читается
+    в текущем процессе.
+    """
+    workers = PDF_WORKERS if workers is None else workers
+    pages_per_task = pages_per_task or PDF_PAGES_PER_TASK
+    with pdfplumber.open(file_path) as pdf:
+        page_count = len(pdf.pages)
+        logger.debug(f"  Total pages: {page_count}")
+        parallel = workers > 1 and page_count >= PDF_PARALLEL_MIN_PAGES
+        if parallel and not _main_is_guarded():
+            logger.warning("  ⚠️ __main__ has no `if __name__ == '__main__'` guard, "
+                           "extracting PDF pages in the current process")
+            parallel = False
+        if not parallel:
             for idx, page in enumerate(pdf.pages):
-                logger.debug(f"  Extracting text from page {idx + 1}/{page_count}")
-                text += page.extract_text()
-        logger.info(f"  ✅ PDF parsed successfully")
+                logger.debug(f"  Extracting page {idx + 1}/{page_count}")
+                yield idx, _page_content(page, tables)
+            return
+
+    ranges = page_ranges(page_count, pages_per_task)
+    logger.info(f"  Extracting {page_count} pages in {len(ranges)} ranges with {workers} processes")
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=_mp_context())
+    try:
+        futures = {pool.submit(_extract_pages, file_path, start, stop, tables): start for start, stop in ranges}
+        ready = {}
+        next_page = 0
+        for future in as_completed(futures):
+            for offset, content in enumerate(future.result()):
+                ready[futures[future] + offset] = content
+            while next_page in ready:
+                yield next_page, ready.pop(next_page)
+                next_page += 1
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+class _PageCallbackError(Exception):
+    """Исключение из ``on_page`` (например, отмена задачи) — пробрасывается как есть."""
+
+
+def parse_pdf(file_path, workers=None, mode=None, on_page=None):
+    """Текст PDF, а в режиме ``mode="tables"`` — таблицы документа как DataFrame.
+
+    Режим по умолчанию задаёт ``PDF_MODE`` (``text``). В режиме таблиц
+    текст и таблицы извлекаются за один проход по страницам: одна таблица
+    возвращается как DataFrame, несколько — списком DataFrame в порядке
+    документа; если таблиц не найдено, возвращается текст.
+
+    ``on_page(номер с 1, всего страниц, текст)`` вызывается для каждой
+    страницы по мере её готовности: загрузка получает страницы (прогресс,
+    индекс строк), пока остальные ещё извлекаются. Итоговый текст — страницы,
+    соединённые через ``\\n``.
+    """
+    mode = (mode or PDF_MODE).lower()
+    if mode not in ("text", "tables"):
+        raise ValueError(f"Unsupported PDF mode: {mode}")
+    logger.info(f"Parsing PDF file: {file_path} (mode={mode})")
+    try:
+        logger.debug("  Opening PDF with pdfplumber...")
+        page_count = None
+        if on_page is not None:
+            with pdfplumber.open(file_path) as pdf:
+                page_count = len(pdf.pages)
+        pages = []
+        page_tables = []
+        for number, content in iter_pdf_pages(file_path, workers=workers, tables=mode == "tables"):
+            text, tables = content if mode == "tables" else (content, None)
+            pages.append(text)
+            if tables is not None:
+                page_tables.append((number, tables))
+            if on_page is not None:
+                try:
+                    on_page(number + 1, page_count, text)
+                except Exception as e:
+                    raise _PageCallbackError() from e
+        if mode == "tables":
+            frames = tables_to_frames(page_tables)
+            if frames:
+                logger.info(f"  ✅ PDF tables extracted: {len(frames)} table(s) "
+                            f"({', '.join(f'{len(df)}x{df.shape[1]}' for df in frames)})")
+                return frames[0] if len(frames) == 1 else frames
+            logger.info("  No tables detected in PDF, falling back to text")
+        # Страницы собираются в список и склеиваются один раз
+        text = "\n".join(pages)
+        logger.info("  ✅ PDF parsed successfully")
         logger.debug(f"     Total text length: {len(text)} chars")
         return text
+    except _PageCallbackError as e:
+        raise e.__cause__ from None
     except Exception as e:
         error_msg = f"Ошибка при чтении PDF: {str(e)}"
         logger.error(f"  ❌ {error_msg}", exc_info=True)
-        raise ValueError(error_msg)
\ No newline at end of file
+        raise ValueError(error_msg)
@@ -0,0 +1,87 @@
+import re
+import pandas as pd
+
+# Числа в отчётах: "1 234,56", "-12.5", "(1 000)", "15%"
+_NUMBER_RE = re.compile(r"^\(?[-+−]?\d[\d\s ]*([.,]\d+)?\)?%?$")
+
+
+def _clean_cell(cell):
+    if cell is None:
+        return None
+    text = " ".join(str(cell).split())
+    return text or None
+
+
+def _is_number(cell):
+    return cell is not None and bool(_NUMBER_RE.match(cell))
+
+
+def _looks_like_header(row):
+    """Строка заголовка: есть хотя бы одна непустая ячейка и ни одного числа."""
+    return any(cell is not None for cell in row) and not any(_is_number(cell) for cell in row)
+
+
+def _column_names(header):
+    names = []
+    for index, cell in enumerate(header):
+        name = cell or f"column_{index + 1}"
+        base, suffix = name, 2
+        while name in names:
+            name = f"{base}_{suffix}"
+            suffix += 1
+        names.append(name)
+    return names
+
+
+def _to_numeric(series):
+    """Колонка чисел в формате отчёта -> float/int; иначе колонка возвращается как есть."""
+    values = series.dropna()
+    if values.empty or not values.map(_is_number).all():
+        return series
+    negative = series.str.startswith("(", na=False) & series.str.endswith(")", na=False)
+    normalized = (series.str.replace(r"[\s ()%]", "", regex=True)
+                        .str.replace("−", "-", regex=False)
+                        .str.replace(",", ".", regex=False))
+    numbers = pd.to_numeric(normalized, errors="coerce")
+    numbers = numbers.where(~negative, -numbers)
+    if numbers.notna().sum() == len(values) and (numbers.dropna() % 1 == 0).all():
+        return numbers.astype("Int64")
+    return numbers
+
+
+def rows_to_frame(header, rows):
+    """Строки ячеек таблицы -> типизированный DataFrame."""
+    df = pd.DataFrame(rows, columns=_column_names(header), dtype=object)
+    for col in df.columns:
+        df[col] = _to_numeric(df[col].astype("string"))
+    return df
+
+
+def tables_to_frames(page_tables):
+    """Таблицы страниц ``[(номер страницы, [таблица, ...]), ...]`` -> список DataFrame.
+
+    Продолжение таблицы на следующей странице (первая таблица страницы с тем
+    же числом колонок и повтором заголовка или вовсе без заголовка)
+    присоединяется к предыдущей таблице.
+    """
+    assembled = []  # [header, rows, номер последней страницы]
+    for number, tables in page_tables:
+        for position, table in enumerate(tables):
+            rows = [[_clean_cell(cell) for cell in row] for row in table]
+            rows = [row for row in rows if any(cell is not None for cell in row)]
+            if not rows:
+                continue
+            previous = assembled[-1] if assembled else None
+            continues = (previous is not None and position == 0 and previous[2] == number - 1
+                         and len(previous[0]) == len(rows[0]))
+            if continues and rows[0] == previous[0]:
+                previous[1].extend(rows[1:])
+                previous[2] = number
+            elif continues and not _looks_like_header(rows[0]):
+                previous[1].extend(rows)
+                previous[2] = number
+            elif _looks_like_header(rows[0]) and len(rows) > 1:
+                assembled.append([rows[0], rows[1:], number])
+            else:
+                assembled.append([[None] * len(rows[0]), rows, number])
+    return [rows_to_frame(header, rows) for header, rows, _ in assembled]
@@ -1,25 +1,58 @@
 from ..api.giga_chat import GigaChatAPI
 from ..api.proxy_api import ProxyAPI
-from ..processors.parser_factory import get_parser
+from ..api.llm_provider import FallbackProvider, GigaChatLibProvider, GigaChatProvider, ProxyProvider
+from ..processors.parser_factory import get_parser, resolve_file_type
 from ..utils.pdf_generator import generate_txt_report
 from ..utils.logger import logger
+from ..utils.response_cache import ResponseCache, create_response_cache
+from .columnar_store import content_hash, create_columnar_store
+from ..processors.csv_stream import stream_csv
+from ..processors.excel_parser import list_sheets
+from .pagination import LineIndexBuilder
+from .statistics import STATS_VERSION, profile_frame
+from .prompt_builder import build_prompt, build_table_prompt, estimate_tokens
+from .map_reduce import run_map_reduce
+from .llm_runner import RESULT_KEYS, LLMRunner
 import pandas as pd
 import os
+import time
 from dotenv import load_dotenv
-from typing import Optional
 
 # Try to import official gigachat client (used in working bot)
 try:
     from gigachat import GigaChat
-    from gigachat.models import Chat, Messages
     _HAS_GIGACHAT_LIB = True
 except Exception:
     _HAS_GIGACHAT_LIB = False
 
 
+def describe_schema(data):
+    """Краткая схема распарсенных данных: колонки и их типы либо длина текста."""
+    if hasattr(data, "num_rows") and hasattr(data, "schema"):
+        # Arrow Table из потоковой загрузки
+        return {
+            "data_type": "table",
+            "rows": data.num_rows,
+            "columns": [{"name": field.name, "dtype": str(field.type)} for field in data.schema]
+        }
+    if isinstance(data, pd.DataFrame):
+        return {
+            "data_type": "table",
+            "rows": len(data),
+            "columns": [{"name": str(col), "dtype": str(dtype)} for col, dtype in data.dtypes.items()]
+        }
+    return {
+        "data_type": "text",
+        "content_length": len(data) if isinstance(data, str) else 0
+    }
+
+
 class AnalysisService:
     def __init__(self):
         logger.info("Initializing AnalysisService")
+        load_dotenv()
+        self.giga_timeout = float(os.getenv('GIGACHAT_TIMEOUT', '30'))
+        self.proxy_timeout = float(os.getenv('PROXY_TIMEOUT', '30'))
         try:
             logger.info("  - Initializing GigaChat API...")
             self.giga_api = GigaChatAPI()
@@ -47,22 +80,193 @@ class AnalysisService:
                 if creds:
                     logger.info(f"  - Initializing gigachat library client (using {used_var})...")
                     # verify_ssl_certs kept False to match bot behavior (dev only)
-                    self.gigachat_client = GigaChat(credentials=creds, verify_ssl_certs=False)
+                    self.gigachat_client = GigaChat(credentials=creds, verify_ssl_certs=False, timeout=self.giga_timeout)
                     logger.info("  ✅ gigachat library client initialized")
                 else:
                     logger.debug("  No GIGACHAT_CREDENTIALS found for gigachat library client")
             except Exception as e:
                 logger.error(f"  ❌ Failed to initialize gigachat library client: {e}")
 
-    def analyze_file(self, file_path, session_id=None):
-        logger.info(f"Starting file analysis for: {file_path}")
+        logger.info(f"  Provider timeouts: giga={self.giga_timeout}s, proxy={self.proxy_timeout}s")
+
+        self.response_cache = create_response_cache()
+        self.llm = LLMRunner(self._create_providers(), response_cache=self.response_cache)
+        self.columnar_store = create_columnar_store()
+        self.csv_stream_threshold = float(os.getenv('CSV_STREAM_THRESHOLD_MB', '100')) * 1024 * 1024
+        self.csv_chunk_rows = int(os.getenv('CSV_STREAM_CHUNK_ROWS', '100000'))
+        # Точная статистика потоковых CSV: уникальные до STATS_DISTINCT_LIMIT значений
+        # (STATS_EXACT=false — только HyperLogLog); квантили — по скетчам KLL, точный проход
+        # по всей таблице только при STATS_EXACT_QUANTILES=true
+        self.stats_exact = str(os.getenv('STATS_EXACT', 'true')).lower() in ('1', 'true', 'yes')
+        self.stats_exact_quantiles = str(os.getenv('STATS_EXACT_QUANTILES', 'false')).lower() in ('1', 'true', 'yes')
+        self.stats_distinct_limit = int(os.getenv('STATS_DISTINCT_LIMIT', '100000'))
+
+    def _create_providers(self):
+        """Асинхронные провайдеры: GigaChat через пакет ``gigachat`` с fallback на REST API, Proxy API."""
+        providers = []
+        giga = []
+        if self.gigachat_client:
+            giga.append(GigaChatLibProvider(self.gigachat_client, timeout=self.giga_timeout))
+        if self.giga_api:
+            giga.append(GigaChatProvider(self.giga_api))
+        if giga:
+            providers.append(giga[0] if len(giga) == 1 else FallbackProvider(giga))
+        if self.proxy_api:
+            providers.append(ProxyProvider(self.proxy_api))
+        return providers
+
+    def ingest_file(self, file_path, progress=None, stream=None, options=None):
+        """Быстрый этап загрузки: только парсинг файла и схема данных, без нейросетей.
+
+        Распарсенные данные сохраняются в columnar store по хэшу содержимого,
+        поэтому повторная загрузка идентичного файла обходится без парсинга.
+        Большие CSV (``stream=True`` или размер от ``CSV_STREAM_THRESHOLD_MB``)
+        читаются чанками прямо в columnar store: результатом будет
+        memory-mapped Arrow Table и статистика, посчитанная по ходу чтения.
+        ``options`` — опции парсера (например, ``{"mode": "tables"}`` для PDF);
+        они входят в ключ columnar store.
+        """
+        progress = progress or (lambda stage, percent=None: None)
+        logger.info(f"Starting file ingest for: {file_path}")
         logger.info(f"  File exists: {os.path.exists(file_path)}")
         logger.info(f"  File size: {os.path.getsize(file_path) if os.path.exists(file_path) else 'N/A'} bytes")
         
-        # Определение типа файла
-        ext = file_path.split('.')[-1].lower()
+        # Определение типа файла: по расширению, для неизвестного расширения — по содержимому
+        ext = resolve_file_type(file_path)
         logger.info(f"  File extension: .{ext}")
 
+        if stream is None:
+            stream = ext == 'csv' and os.path.getsize(file_path) >= self.csv_stream_threshold
+        if stream and ext == 'csv' and self.columnar_store:
+            return self._ingest_csv_stream(file_path, progress)
+
+        # Повторная загрузка того же файла не требует парсинга
+        key = None
+        if self.columnar_store:
+            key = f"{content_hash(file_path)}-{ext}"
+            options = get_parser(ext).accepted_options(options)
+            if options:
+                # Разные опции парсинга одного файла дают разные данные
+                key += "-" + ResponseCache.make_key(ext, None, "", options)[:12]
+            try:
+                data = self.columnar_store.load(key)
+                if data is None:
+                    data = self._load_tables(key)
+            except Exception as e:
+                logger.warning(f"  ⚠️ Failed to load persisted dataset {key}: {e}")
+                data = None
+            if data is not None:
+                logger.info(f"  ⚡ Identical file already ingested, loaded {key} from columnar store")
+                return self._ingested(data, key, True, progress)
+
+        data, line_index = self._parse_file(file_path, ext, progress, options)
+
+        if self.columnar_store:
+            try:
+                if isinstance(data, list):
+                    for index, frame in enumerate(data):
+                        self.columnar_store.save(f"{key}-t{index}", frame)
+                else:
+                    self.columnar_store.save(key, data)
+            except Exception as e:
+                logger.warning(f"  ⚠️ Failed to persist dataset {key}: {type(e).__name__}: {e}")
+
+        ingested = self._ingested(data, key, False, progress)
+        if line_index is not None:
+            ingested["line_index"] = line_index
+        return ingested
+
+    def _load_tables(self, key):
+        """Несколько таблиц одного файла (PDF), сохранённые как ``<key>-t0``, ``<key>-t1``, ..."""
+        frames = []
+        while (frame := self.columnar_store.load(f"{key}-t{len(frames)}")) is not None:
+            frames.append(frame)
+        return frames or None
+
+    def _ingested(self, data, key, from_cache, progress):
+        """Результат ``ingest_file``; для нескольких таблиц — по записи на таблицу в ``tables``.
+
+        Поля верхнего уровня описывают основную (самую большую) таблицу.
+        """
+        if not isinstance(data, list):
+            return {"data": data, "schema": describe_schema(data), "content_hash": key, "from_cache": from_cache,
+                    "stats": self._profile(data, key, progress)}
+        tables = [self._ingested(frame, f"{key}-t{index}" if key else None, from_cache, progress)
+                  for index, frame in enumerate(data)]
+        primary = max(range(len(tables)), key=lambda index: tables[index]["data"].size)
+        return {**tables[primary], "tables": tables, "primary": primary}
+
+    def _profile(self, data, key, progress):
+        """Статистический профиль таблицы для /api/analysis, считается один раз на содержимое файла.
+
+        Профиль сохраняется рядом с данными в columnar store, так что
+        повторная загрузка того же файла его не пересчитывает.
+        """
+        if not isinstance(data, pd.DataFrame):
+            return None
+        if self.columnar_store and key:
+            stats = self.columnar_store.load_stats(key)
+            if stats is not None and stats.get("version") == STATS_VERSION:
+                return stats
+        progress("profiling", 35)
+        started = time.perf_counter()
+        stats = profile_frame(data)
+        logger.info(f"  📊 Column profile computed in {time.perf_counter() - started:.2f}s")
+        if self.columnar_store and key:
+            try:
+                self.columnar_store.save_stats(key, stats)
+            except Exception as e:
+                logger.warning(f"  ⚠️ Failed to persist profile {key}: {type(e).__name__}: {e}")
+        return stats
+
+    def list_sheets(self, file_path):
+        """Листы книги Excel (для остальных форматов — пустой список)."""
+        if resolve_file_type(file_path) not in ('xls', 'xlsx'):
+            return []
+        return list_sheets(file_path)
+
+    def _ingest_csv_stream(self, file_path, progress):
+        """Потоковая загрузка CSV чанками с ограниченным потреблением памяти."""
+        key = f"{content_hash(file_path)}-csv-stream"
+        stats = self.columnar_store.load_stats(key)
+        if (stats is not None and stats.get("version") == STATS_VERSION
+                and (stats.get("exact") or not self.stats_exact)
+                and (stats.get("exact_quantiles") or not self.stats_exact_quantiles)
+                and os.path.exists(self.columnar_store.table_path(key))):
+            logger.info(f"  ⚡ Identical CSV already streamed, opening {key} memory-mapped")
+            from_cache = True
+        else:
+            stats = stream_csv(file_path, self.columnar_store, key,
+                               chunk_rows=self.csv_chunk_rows, distinct_limit=self.stats_distinct_limit,
+                               exact=self.stats_exact, exact_quantiles=self.stats_exact_quantiles,
+                               progress=progress)
+            self.columnar_store.save_stats(key, stats)
+            from_cache = False
+        table = self.columnar_store.open_table(key)
+        return {"data": table, "schema": describe_schema(table), "content_hash": key,
+                "from_cache": from_cache, "stats": stats}
+
+    def _parse_file(self, file_path, ext, progress, options=None):
+        """Парсинг файла подходящим парсером.
+
+        Парсеры, которые отдают текст постранично (``on_page``, PDF), передают
+        страницы по мере готовности: по ним обновляется прогресс задачи
+        (и проверяется её отмена) и строится индекс строк текста.
+
+        Returns:
+            (данные, ``LineIndex`` текста или None)
+        """
+        lines = LineIndexBuilder()
+        reported = None
+
+        def on_page(number, page_count, text):
+            nonlocal reported
+            lines.add(text)
+            percent = 10 + 20 * number // page_count
+            if percent != reported:
+                reported = percent
+                progress("parsing", percent)
+
         # Парсинг файла
         try:
             logger.info(f"  🔍 Getting parser for extension: .{ext}")
@@ -70,8 +274,9 @@ class AnalysisService:
             logger.info(f"  ✅ Parser obtained: {parser.__class__.__name__}")
             
             logger.info("  📄 Parsing file...")
-            data = parser.parse(file_path)
-            logger.info(f"  ✅ File parsed successfully")
+            progress("parsing", 10)
+            data = parser.parse(file_path, on_page=on_page, **(options or {}))
+            logger.info("  ✅ File parsed successfully")
             logger.info(f"     Data type: {type(data).__name__}")
             
             if isinstance(data, pd.DataFrame):
@@ -87,55 +292,63 @@ class AnalysisService:
             logger.error(f"  ❌ Unexpected error during parsing: {type(e).__name__}: {e}", exc_info=True)
             raise e
 
+        return data, (lines.finish(data) if lines.parts and isinstance(data, str) else None)
+
+    def analyze_data(self, data, session_id=None, progress=None, profile=None):
+        """Этап анализа: отправка данных в нейросети и генерация отчёта.
+
+        Таблица (DataFrame или memory-mapped Arrow Table) передаётся не целиком,
+        а компактным описанием в пределах ``PROMPT_TOKEN_BUDGET``
+        (см. ``prompt_builder``); ``profile`` — уже посчитанная статистика колонок.
+        """
+        progress = progress or (lambda stage, percent=None: None)
+
         # Подготовка данных для анализа
-        if isinstance(data, pd.DataFrame):
-            data_for_api = data.to_string()
-            logger.info(f"  📊 Data converted to string for API (length: {len(data_for_api)} chars)")
-        else:
-            data_for_api = str(data)
-            logger.info(f"  📊 Data prepared for API (length: {len(data_for_api)} chars)")
+        data_for_api = build_prompt(data, profile=profile)
+        logger.info(f"  📊 Prompt built for API (length: {len(data_for_api)} chars, ~{estimate_tokens(data_for_api)} tokens)")
 
-        # Анализ через GigaChat (предпочтительно через официальную библиотеку)
-        giga_result = None
-        if self.gigachat_client:
-            try:
-                logger.info("  🤖 Sending request to GigaChat via library client...")
-                giga_result = self._call_gigachat_lib(data_for_api, session_id=session_id)
-                logger.info(f"  ✅ GigaChat (lib) analysis complete (result length: {len(str(giga_result))} chars)")
-            except Exception as e:
-                logger.error(f"  ❌ GigaChat library error: {type(e).__name__}: {e}", exc_info=True)
-                giga_result = f"Error: {str(e)}"
-        elif self.giga_api:
-            try:
-                logger.info("  🤖 Sending request to GigaChat API (wrapper)...")
-                giga_result = self.giga_api.send_analysis_request(data_for_api, session_id=session_id)
-                logger.info(f"  ✅ GigaChat analysis complete (result length: {len(str(giga_result))} chars)")
-            except Exception as e:
-                logger.error(f"  ❌ GigaChat API error: {type(e).__name__}: {e}", exc_info=True)
-                giga_result = f"Error: {str(e)}"
-        else:
-            logger.warning("  ⚠️ GigaChat API not initialized, skipping")
-            giga_result = "GigaChat API not available"
+        # Анализ через GigaChat и Proxy API параллельно
+        progress("analyzing", 40)
+        provider_results = self._run_providers(data_for_api, session_id=session_id)
+        return self._report(provider_results, progress)
 
-        # Анализ через Proxy API (если включён)
-        proxy_result = None
-        if self.proxy_api and getattr(self.proxy_api, 'enabled', True):
-            try:
-                logger.info("  🤖 Sending request to Proxy API...")
-                proxy_result = self.proxy_api.send_analysis_request(data_for_api)
-                logger.info(f"  ✅ Proxy API analysis complete (result length: {len(str(proxy_result))} chars)")
-            except Exception as e:
-                logger.error(f"  ❌ Proxy API error: {type(e).__name__}: {e}", exc_info=True)
-                proxy_result = f"Error: {str(e)}"
-        else:
-            if self.proxy_api and not getattr(self.proxy_api, 'enabled', True):
-                logger.info("  ℹ️ Proxy API calls are disabled by configuration, skipping")
-                proxy_result = "Proxy API disabled by configuration"
-            else:
-                logger.warning("  ⚠️ Proxy API not initialized, skipping")
-                proxy_result = "Proxy API not available"
+    def analyze_map_reduce(self, data, session_id=None, progress=None, profile=None, providers=None):
+        """Map-reduce анализ всей таблицы (см. ``map_reduce.run_map_reduce``).
+
+        Таблица делится на фрагменты по токенам, фрагменты анализируются
+        параллельно (не больше ``MAP_REDUCE_CONCURRENCY`` запросов на
+        провайдера), затем частичные ответы сводятся итоговым запросом.
+        ``providers`` — ``["giga_chat"]``, ``["proxy_api"]`` или оба (по умолчанию).
+        Отмена — через ``progress()`` фоновой задачи.
+        """
+        progress = progress or (lambda stage=None, percent=None: None)
+        if not (isinstance(data, pd.DataFrame) or hasattr(data, "num_rows")):
+            # Текст не делится на строки таблицы — обычный анализ
+            return self.analyze_data(data, session_id=session_id, progress=progress, profile=profile)
+
+        results, tasks = self._providers(session_id, only=providers)
+        if tasks:
+            outcome = run_map_reduce(data, tasks, self.llm.submit, profile=profile, progress=progress)
+            for name, info in outcome.items():
+                results[RESULT_KEYS[name]] = info["result"]
+                if info["error"]:
+                    results["errors"][name] = info["error"]
+            results["map_reduce"] = {name: {"chunks": info["chunks"], "failed_chunks": info["failed_chunks"]}
+                                     for name, info in outcome.items()}
+        return self._report(results, progress)
+
+    def _report(self, provider_results, progress):
+        """Текстовый отчёт по ответам провайдеров и итог анализа."""
+        errors = provider_results["errors"]
+        giga_result = provider_results["giga_result"]
+        if giga_result is None:
+            giga_result = f"Error: {errors.get('giga_chat')}"
+        proxy_result = provider_results["proxy_result"]
+        if proxy_result is None:
+            proxy_result = f"Error: {errors.get('proxy_api')}"
 
         # Генерация отчета
+        progress("reporting", 90)
         try:
             logger.info("  📝 Generating report...")
             report_path = generate_txt_report(giga_result, proxy_result)
@@ -144,25 +357,39 @@ class AnalysisService:
             logger.error(f"  ❌ Failed to generate report: {e}", exc_info=True)
             report_path = None
 
-        logger.info("✅ File analysis completed successfully")
-        return {
+        logger.info("✅ Data analysis completed successfully")
+        result = {
             "giga_result": giga_result,
             "proxy_result": proxy_result,
             "report_path": report_path,
-            "data": data
+            "errors": errors
         }
+        if "map_reduce" in provider_results:
+            result["map_reduce"] = provider_results["map_reduce"]
+        return result
 
-    def analyze_table_first_rows(self, data, rows_count=15, session_id=None):
+    def analyze_table_first_rows(self, data, rows_count=15, session_id=None, profile=None):
         """
         Анализирует первые N строк таблицы через нейросети.
         
         Args:
             data: DataFrame или список словарей/строк с данными таблицы
             rows_count: количество строк для анализа (по умолчанию 15)
+            profile: статистика колонок всего набора (добавляется к строкам в промпте)
             
         Returns:
             dict с результатами анализа от GigaChat и Proxy API
         """
+        system_prompt = self.table_analysis_prompt(data, rows_count=rows_count, profile=profile)
+        logger.info("  Sending requests to neural networks...")
+        
+        results = self._run_providers(system_prompt, session_id=session_id)
+        
+        logger.info("✅ Table analysis completed")
+        return results
+
+    def table_analysis_prompt(self, data, rows_count=15, profile=None):
+        """Промпт анализа первых N строк таблицы (см. ``analyze_table_first_rows``)."""
         logger.info(f"Starting table analysis with first {rows_count} rows")
         logger.debug(f"  Data type: {type(data).__name__}")
         
@@ -183,124 +410,47 @@ class AnalysisService:
         logger.debug(f"  Total rows in DataFrame: {len(df)}")
         logger.debug(f"  Columns: {list(df.columns)}")
         
-        # Берем первые N строк
-        first_rows = df.head(rows_count)
-        logger.info(f"  Selected first {len(first_rows)} rows for analysis")
-        
-        # Преобразуем в строку для отправки в API
-        table_data_str = first_rows.to_string(index=False)
-        logger.debug(f"  Table data converted to string (length: {len(table_data_str)} chars)")
+        # Первые N строк со схемой и статистикой колонок в пределах бюджета токенов
+        table_data_str = build_table_prompt(df, profile=profile, max_rows=rows_count, head=True)
+        logger.debug(f"  Table prompt built (length: {len(table_data_str)} chars)")
         
         # Формируем системный промпт
         system_prompt = f"""Ты - аналитическая система с большим опытом. Твоя задача - анализировать табличные данные, делать выводы и находить аномалии или интересные тенденции.
 
-Вот первые {rows_count} строк таблицы:
+Вот описание таблицы и её первые строки:
 
 {table_data_str}
 
 Проанализируй эти данные, выдели ключевые особенности, найди закономерности, аномалии и интересные тенденции. Предоставь краткий, но информативный анализ."""
         
         logger.debug(f"  System prompt created (length: {len(system_prompt)} chars)")
-        logger.info("  Sending requests to neural networks...")
-        
-        results = {
-            "giga_result": None,
-            "proxy_result": None,
-            "errors": {}
-        }
-        
-        # Анализ через GigaChat (предпочтительно через библиотеку)
-        if self.gigachat_client:
-            try:
-                logger.info("  🤖 Sending request to GigaChat via library client...")
-                results["giga_result"] = self._call_gigachat_lib(system_prompt, session_id=session_id)
-                logger.info(f"  ✅ GigaChat (lib) analysis complete (result length: {len(str(results['giga_result']))} chars)")
-            except Exception as e:
-                logger.error(f"  ❌ GigaChat library error: {type(e).__name__}: {e}", exc_info=True)
-                results["giga_result"] = None
-                results["errors"]["giga_chat"] = str(e)
-        elif self.giga_api:
-            try:
-                logger.info("  🤖 Sending request to GigaChat API (wrapper)...")
-                results["giga_result"] = self.giga_api.send_analysis_request(system_prompt, session_id=session_id)
-                logger.info(f"  ✅ GigaChat analysis complete (result length: {len(str(results['giga_result']))} chars)")
-            except Exception as e:
-                logger.error(f"  ❌ GigaChat API error: {type(e).__name__}: {e}", exc_info=True)
-                results["giga_result"] = None
-                results["errors"]["giga_chat"] = str(e)
-        else:
-            logger.warning("  ⚠️ GigaChat API not initialized")
-            results["errors"]["giga_chat"] = "GigaChat API not initialized"
+        return system_prompt
 
-        # Анализ через Proxy API (если включён)
-        if self.proxy_api and getattr(self.proxy_api, 'enabled', True):
-            try:
-                logger.info("  🤖 Sending request to Proxy API...")
-                results["proxy_result"] = self.proxy_api.send_analysis_request(system_prompt)
-                logger.info(f"  ✅ Proxy API analysis complete (result length: {len(str(results['proxy_result']))} chars)")
-            except Exception as e:
-                logger.error(f"  ❌ Proxy API error: {type(e).__name__}: {e}", exc_info=True)
-                results["proxy_result"] = None
-                results["errors"]["proxy_api"] = str(e)
-        else:
-            if self.proxy_api and not getattr(self.proxy_api, 'enabled', True):
-                logger.info("  ℹ️ Proxy API calls are disabled by configuration, skipping")
-                results["proxy_result"] = "Proxy API disabled by configuration"
-            else:
-                logger.warning("  ⚠️ Proxy API not initialized")
-                results["errors"]["proxy_api"] = "Proxy API not initialized"
-        
-        logger.info("✅ Table analysis completed")
-        return results
+    def _run_providers(self, prompt, session_id=None):
+        """Отправляет запрос в GigaChat и Proxy API одновременно (``LLMRunner.fan_out``)."""
+        return self.llm.fan_out(prompt, session_id=session_id)
+
+    def stream_providers(self, prompt, session_id=None, only=None):
+        """Потоковые ответы провайдеров параллельно (``LLMRunner.stream``)."""
+        return self.llm.stream(prompt, session_id=session_id, only=only)
 
-    def _call_gigachat_lib(self, prompt: str, session_id: Optional[str] = None):
-        """Вызов GigaChat через официальный пакет `gigachat` (синхронный).
+    def _providers(self, session_id=None, only=None):
+        """Доступные провайдеры для ``run_map_reduce``.
 
-        При наличии `session_id` пытаемся установить его в клиентской context (если библиотека поддерживает).
+        Returns:
+            (results, {имя: ask(prompt)}) — ``ask`` возвращает корутину
+            ``LLMRunner.complete``; недоступные провайдеры сразу отмечены в
+            ``results``. ``only`` — ограничить список провайдеров.
         """
-        if not _HAS_GIGACHAT_LIB or not self.gigachat_client:
-            raise Exception("gigachat library client not available")
+        results, providers = self.llm.available(only)
+        tasks = {name: (lambda prompt, name=name: self.llm.complete(name, prompt, session_id))
+                 for name in providers}
+        return results, tasks
 
-        # Если библиотека поддерживает context.session_id_cvar, попробуем установить
-        if session_id:
-            try:
-                ctx = getattr(self.gigachat_client, "context", None)
-                if ctx and hasattr(ctx, "session_id_cvar"):
-                    try:
-                        ctx.session_id_cvar.set(session_id)
-                        logger.debug(f"Set gigachat client context.session_id_cvar to {session_id}")
-                    except Exception:
-                        logger.debug("Unable to set session_id on gigachat client context.session_id_cvar")
-
-                # Также попытаемся установить через модульный контекст как в документации
-                try:
-                    import gigachat.context as _gctx
-                    if hasattr(_gctx, 'session_id_cvar'):
-                        try:
-                            _gctx.session_id_cvar.set(session_id)
-                            logger.debug(f"Set gigachat.context.session_id_cvar to {session_id}")
-                        except Exception:
-                            logger.debug("Unable to set session_id on gigachat.context.session_id_cvar")
-                except Exception:
-                    logger.debug("gigachat.context not available to set session_id")
-            except Exception:
-                logger.debug("gigachat client has no context/session_id_cvar attribute")
-
-        # Build simple chat with system + user messages
-        try:
-            messages = [
-                Messages(role="system", content="Ты - профессиональный аналитик данных. Твоя задача - анализировать табличные данные и предоставлять краткие, информативные выводы."),
-                Messages(role="user", content=f"Проанализируй следующие данные:\n{prompt}")
-            ]
-
-            chat = Chat(messages=messages, temperature=0.7, max_tokens=1000)
-            resp = self.gigachat_client.chat(chat)
-            # Expect similar structure as in bot: resp.choices[0].message.content
-            try:
-                return resp.choices[0].message.content
-            except Exception:
-                # Fallback: try to convert to string
-                return str(resp)
-        except Exception as e:
-            logger.error(f"Error calling gigachat lib: {e}", exc_info=True)
-            raise
\ No newline at end of file
+    def ask_gigachat(self, prompt, session_id=None):
+        """GigaChat: пакет ``gigachat``, при ошибке — REST API (с кэшем ответов)."""
+        return self.llm.ask("giga_chat", prompt, session_id=session_id)
+
+    def ask_proxy(self, prompt):
+        """Proxy API (с кэшем ответов)."""
+        return self.llm.ask("proxy_api", prompt)
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from ..utils.logger import logger
+
+
+class ChartCache:
+    """LRU-кэш готовых ответов /api/charts.
+
+    Ключ — (dataset_id, version, chart_type, колонки, max_points, method),
+    значение — сериализованное тело ответа. Объём ограничен ``max_bytes``;
+    записи набора удаляются через ``invalidate`` при замене или удалении
+    данных (подписка на ``DatasetStore.on_remove``). ETag выводится из
+    ключа, поэтому повторный запрос браузера проверяется без построения
+    графиков и даже без обращения к кэшу.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def etag(key):
+        return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32]
+
+    def not_modified(self):
+        with self._lock:
+            self._stats["not_modified"] += 1
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return body
+
+    def set(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = body
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, dataset_id):
+        """Удаляет все графики набора данных (первый элемент ключа — dataset_id)."""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == dataset_id]
+            for key in stale:
+                self._bytes -= len(self._entries.pop(key))
+            self._stats["invalidations"] += len(stale)
+        if stale:
+            logger.debug(f"Chart cache: dropped {len(stale)} entries for dataset {dataset_id}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+def create_chart_cache():
+    """Кэш графиков из окружения (CHART_CACHE_MAX_MB, 0 — отключён)."""
+    max_mb = float(os.getenv('CHART_CACHE_MAX_MB', '64'))
+    if max_mb <= 0:
+        logger.info("Chart cache disabled")
+        return None
+    return ChartCache(max_bytes=int(max_mb * 1024 * 1024))
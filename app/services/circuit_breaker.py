@@ -0,0 +1,151 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from ..utils.logger import logger
+
+# Сколько ошибок или медленных ответов подряд открывают выключатель и через сколько секунд
+# пропускается пробный запрос; ответ дольше CIRCUIT_SLOW_CALL_SECONDS считается медленным (0 — не считать)
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30'))
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv('CIRCUIT_SLOW_CALL_SECONDS', '20'))
+# Адаптивный таймаут: p95 последних ответов × множитель, но не меньше минимума
+# и не больше таймаута провайдера (GIGACHAT_TIMEOUT/PROXY_TIMEOUT)
+ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.getenv('ADAPTIVE_TIMEOUT_MULTIPLIER', '2'))
+ADAPTIVE_TIMEOUT_MIN = float(os.getenv('ADAPTIVE_TIMEOUT_MIN', '5'))
+# Окно замеров задержки и сколько замеров нужно, прежде чем таймаут начнёт подстраиваться
+LATENCY_WINDOW = 100
+LATENCY_MIN_SAMPLES = 10
+
+
+class CircuitOpenError(Exception):
+    """Провайдер временно отключён выключателем: запрос не отправлялся."""
+
+
+class CircuitBreaker:
+    """Автоматический выключатель провайдера и адаптивный таймаут его запросов.
+
+    ``closed`` — запросы идут как обычно; после ``failure_threshold`` ошибок,
+    таймаутов или медленных ответов подряд выключатель переходит в ``open``
+    и сразу отклоняет запросы (``CircuitOpenError``). Через ``reset_timeout``
+    секунд наступает ``half_open``: пропускается один пробный запрос, его
+    успех закрывает выключатель, ошибка снова открывает.
+
+    Таймаут запроса (``timeout()``) — p95 задержки последних ответов ×
+    ``ADAPTIVE_TIMEOUT_MULTIPLIER`` в пределах от ``ADAPTIVE_TIMEOUT_MIN``
+    до ``max_timeout``. Таймаут тоже попадает в замеры (как задержка не
+    меньше использованного таймаута), чтобы адаптивный таймаут рос, когда
+    провайдер стал медленнее; пробный запрос идёт с ``max_timeout``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, max_timeout, failure_threshold=None, reset_timeout=None, slow_call=None,
+                 clock=time.monotonic):
+        self.name = name
+        self.max_timeout = max_timeout
+        self.failure_threshold = failure_threshold or CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = CIRCUIT_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.slow_call = CIRCUIT_SLOW_CALL_SECONDS if slow_call is None else slow_call
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.state = self.CLOSED
+        self.failures = 0
+        self.short_circuited = 0
+        self._opened_at = None
+        self._probing = False
+
+    def before_call(self):
+        """Разрешает запрос и возвращает его таймаут или выбрасывает ``CircuitOpenError``."""
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - self._clock()
+                if remaining > 0:
+                    self.short_circuited += 1
+                    raise CircuitOpenError(
+                        f"{self.name} circuit is open after {self.failures} failures, retry in {remaining:.0f}s")
+                self.state = self.HALF_OPEN
+                self._probing = False
+                logger.info(f"  🔌 {self.name} circuit half-open, probing")
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    self.short_circuited += 1
+                    raise CircuitOpenError(f"{self.name} circuit is half-open, probe request in flight")
+                self._probing = True
+                return self.max_timeout
+            return self._timeout()
+
+    def record_success(self, latency=None):
+        """Успешный ответ; ``latency`` — задержка полного ответа (у потоков не замеряется)."""
+        with self._lock:
+            if latency is not None:
+                self._latencies.append(latency)
+            if self.slow_call and latency is not None and latency > self.slow_call:
+                self._failure(f"slow response {latency:.1f}s")
+                return
+            if self.state != self.CLOSED:
+                logger.info(f"  🔌 {self.name} circuit closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self, reason):
+        with self._lock:
+            self._failure(reason)
+
+    def record_timeout(self, timeout):
+        """Таймаут запроса: сбой и замер задержки не меньше ``timeout``."""
+        with self._lock:
+            self._latencies.append(timeout)
+            self._failure(f"timeout after {timeout:g}s")
+
+    def release(self):
+        """Запрос прерван без результата (клиент отключился) — пробный запрос не засчитывается."""
+        with self._lock:
+            self._probing = False
+
+    def _failure(self, reason):
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+            self.state = self.OPEN
+            self._opened_at = self._clock()
+            logger.warning(f"  🔌 {self.name} circuit opened after {self.failures} failures "
+                           f"(last: {reason}), retry in {self.reset_timeout:.0f}s")
+
+    def _p95(self):
+        latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        return latencies[max(0, math.ceil(len(latencies) * 0.95) - 1)]
+
+    def _timeout(self):
+        if len(self._latencies) < LATENCY_MIN_SAMPLES:
+            return self.max_timeout
+        adaptive = max(ADAPTIVE_TIMEOUT_MIN, self._p95() * ADAPTIVE_TIMEOUT_MULTIPLIER)
+        return min(self.max_timeout, adaptive)
+
+    def p95(self):
+        with self._lock:
+            return self._p95()
+
+    def timeout(self):
+        """Таймаут следующего запроса: по p95 задержки, пока замеров мало — ``max_timeout``."""
+        with self._lock:
+            return self._timeout()
+
+    def stats(self):
+        with self._lock:
+            p95 = self._p95()
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "short_circuited": self.short_circuited,
+                "p95_latency": round(p95, 3) if p95 is not None else None,
+                "timeout": round(self._timeout(), 3),
+                "samples": len(self._latencies),
+            }
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import uuid
+from contextlib import contextmanager
+import pandas as pd
+from ..utils.logger import logger
+
+# pyarrow необязателен: без него данные просто не сохраняются на диск
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    _HAS_PYARROW = True
+except Exception:
+    _HAS_PYARROW = False
+
+
+def content_hash(file_path, chunk_size=1024 * 1024):
+    """SHA-256 содержимого файла (читается блоками, без загрузки целиком)."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ColumnarStore:
+    """Хранилище распарсенных наборов данных в формате Arrow IPC.
+
+    Таблицы пишутся один раз по ключу (хэш содержимого файла + опции
+    парсинга) несжатым Arrow IPC и читаются через ``pa.memory_map``: страницы
+    файла разделяются между процессами-воркерами через page cache, а
+    числовые колонки без пропусков попадают в DataFrame без копирования.
+    Текст (PDF) хранится рядом обычным UTF-8 файлом.
+    """
+
+    def __init__(self, root="storage/datasets", batch_rows=65536):
+        self.root = root
+        self.batch_rows = batch_rows
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key, ext):
+        return os.path.join(self.root, f"{key}.{ext}")
+
+    def table_path(self, key):
+        return self._path(key, "arrow")
+
+    def exists(self, key):
+        return os.path.exists(self.table_path(key)) or os.path.exists(self._path(key, "txt"))
+
+    def save(self, key, data):
+        """Сохраняет DataFrame (Arrow IPC) или текст; запись атомарная через rename."""
+        if isinstance(data, pd.DataFrame):
+            path = self.table_path(key)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            table = pa.Table.from_pandas(data, preserve_index=False)
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa_ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table, max_chunksize=self.batch_rows)
+        else:
+            path = self._path(key, "txt")
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data if isinstance(data, str) else str(data))
+        os.replace(tmp_path, path)
+        logger.info(f"  💾 Dataset persisted to {path}")
+        return path
+
+    @contextmanager
+    def table_writer(self, key, metadata=None):
+        """Потоковая запись таблицы пачками: ``writer.write(df_chunk)``.
+
+        Схема берётся из первого чанка; файл появляется под ключом только
+        после успешного завершения записи.
+        """
+        path = self.table_path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        writer = _BatchWriter(tmp_path, metadata or {})
+        try:
+            yield writer
+            writer.close()
+            os.replace(tmp_path, path)
+            logger.info(f"  💾 Dataset streamed to {path} ({writer.rows} rows)")
+        except BaseException:
+            writer.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def save_stats(self, key, stats):
+        """Сохраняет статистику; запись атомарная через rename (параллельный ``load_stats`` не видит половину файла)."""
+        path = self._path(key, "stats.json")
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(stats, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load_stats(self, key):
+        """Статистика по ключу; отсутствующий или нечитаемый файл — промах кэша (``None``)."""
+        path = self._path(key, "stats.json")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"  ⚠️ Unreadable stats {path}, recomputing: {type(e).__name__}: {e}")
+            return None
+
+    def open_table(self, key):
+        """Arrow Table поверх memory-mapped файла (без чтения данных в память)."""
+        source = pa.memory_map(self.table_path(key), 'r')
+        return pa_ipc.open_file(source).read_all()
+
+    def load(self, key):
+        """Загружает ранее сохранённые данные или возвращает ``None``."""
+        if os.path.exists(self.table_path(key)):
+            return table_to_frame(self.open_table(key))
+        text_path = self._path(key, "txt")
+        if os.path.exists(text_path):
+            with open(text_path, encoding='utf-8') as f:
+                return f.read()
+        return None
+
+
+def table_to_frame(table):
+    """Arrow Table -> DataFrame; строковые колонки с низкой кардинальностью — category."""
+    metadata = table.schema.metadata or {}
+    categorical = json.loads(metadata.get(b"categorical", b"[]"))
+    return table.to_pandas(split_blocks=True, categories=categorical or None)
+
+
+class _BatchWriter:
+    def __init__(self, path, metadata):
+        self.path = path
+        self.metadata = {k: json.dumps(v) for k, v in metadata.items()}
+        self.rows = 0
+        self._sink = None
+        self._writer = None
+        self._schema = None
+
+    def write(self, df):
+        table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema.with_metadata({**(table.schema.metadata or {}), **self.metadata})
+            table = table.replace_schema_metadata(self._schema.metadata)
+            self._sink = pa.OSFile(self.path, 'wb')
+            self._writer = pa_ipc.new_file(self._sink, self._schema)
+        self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+
+def create_columnar_store():
+    """Создаёт хранилище по настройкам окружения (``None``, если отключено или нет pyarrow)."""
+    if str(os.getenv('DATASET_PERSIST', 'true')).lower() not in ('1', 'true', 'yes'):
+        logger.info("Columnar dataset persistence disabled by configuration")
+        return None
+    if not _HAS_PYARROW:
+        logger.warning("pyarrow not installed — parsed datasets will not be persisted")
+        return None
+    root = os.getenv('DATASET_STORAGE_DIR', 'storage/datasets')
+    logger.info(f"Columnar dataset store: {root}")
+    return ColumnarStore(root)
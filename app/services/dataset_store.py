@@ -0,0 +1,494 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from ..utils.logger import logger
+from .table_query import condition_mask, sort_order
+from .pagination import LineIndex, RowGroupIndex
+
+# Сколько отфильтрованных/отсортированных представлений хранить на набор
+VIEW_CACHE_SIZE = 8
+
+
+def is_arrow_table(data):
+    """Arrow Table (memory-mapped результат потоковой загрузки), без импорта pyarrow."""
+    return hasattr(data, "num_rows") and hasattr(data, "to_pandas") and hasattr(data, "slice")
+
+
+class Dataset:
+    """Загруженный набор данных: таблица (DataFrame или Arrow Table) или текст (PDF).
+
+    ``version`` увеличивается при каждой замене данных — по нему
+    инвалидируются производные кэши. ``lock`` защищает данные и кэши
+    набора при одновременных запросах. Таблица из потоковой загрузки
+    хранится как memory-mapped Arrow Table и превращается в DataFrame
+    только по требованию (``frame()``); срезы, отдельные колонки и
+    выборки строк читаются без этого. Перестановки сортировки и позиции
+    строк отфильтрованных представлений кэшируются до замены данных.
+    """
+
+    def __init__(self, dataset_id, session_id, filename, data, file_path=None, schema=None,
+                 content_hash=None, stats=None, line_index=None):
+        self.dataset_id = dataset_id
+        self.session_id = session_id
+        self.version = 0
+        self.lock = threading.RLock()
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self._set_data(filename, data, file_path, schema, content_hash, stats, line_index)
+
+    def _set_data(self, filename, data, file_path, schema, content_hash=None, stats=None, line_index=None):
+        self.filename = filename
+        self.content_hash = content_hash
+        self.file_path = file_path
+        self.schema = schema
+        self.stats = stats
+        self.table = None
+        self._sort_orders = {}
+        self._views = OrderedDict()
+        self._line_index = None
+        self._row_groups = None
+        if isinstance(data, pd.DataFrame):
+            self.data_type = "table"
+            self.dataframe = data
+            self.text_data = None
+        elif is_arrow_table(data):
+            self.data_type = "table"
+            self.table = data
+            self.dataframe = None
+            self.text_data = None
+        else:
+            self.data_type = "text"
+            self.dataframe = None
+            self.text_data = data
+        self.nbytes = estimate_nbytes(data)
+        if self.data_type == "text" and line_index is not None:
+            # Индекс строк, построенный при загрузке по мере извлечения страниц
+            self._line_index = line_index
+            self.nbytes += line_index.nbytes
+        self.version += 1
+
+    @property
+    def data(self):
+        if self.data_type != "table":
+            return self.text_data
+        return self.table if self.table is not None else self.dataframe
+
+    @property
+    def num_rows(self):
+        if self.table is not None:
+            return self.table.num_rows
+        return len(self.dataframe)
+
+    @property
+    def columns(self):
+        if self.table is not None:
+            return list(self.table.column_names)
+        return [str(c) for c in self.dataframe.columns]
+
+    def frame(self):
+        """Вся таблица как DataFrame (для Arrow-набора материализуется один раз)."""
+        with self.lock:
+            if self.dataframe is None and self.table is not None:
+                from .columnar_store import table_to_frame
+                logger.info(f"Materializing dataset {self.dataset_id} ({self.table.num_rows} rows) into memory")
+                self.dataframe = table_to_frame(self.table)
+                self.nbytes = estimate_nbytes(self.dataframe)
+            return self.dataframe
+
+    def profile(self):
+        """Статистический профиль таблицы (см. ``statistics.profile_frame``).
+
+        Обычно вычисляется при загрузке; иначе считается при первом запросе
+        и хранится до замены данных (``_set_data`` сбрасывает ``stats``).
+        """
+        with self.lock:
+            if self.stats is None and self.data_type == "table":
+                from .statistics import profile_frame
+                self.stats = profile_frame(self.frame())
+            return self.stats
+
+    def slice(self, offset, limit, columns=None):
+        """Строки [offset, offset + limit) без материализации всей таблицы."""
+        with self.lock:
+            if self.dataframe is None and self.table is not None:
+                from .columnar_store import table_to_frame
+                if self._row_groups is None:
+                    self._row_groups = RowGroupIndex(self.table)
+                return table_to_frame(self._arrow_columns(columns, self._row_groups.slice(offset, limit)))
+            return self._frame_columns(columns).iloc[offset:offset + limit]
+
+    def line_index(self):
+        """Индекс строк текстового набора (строится один раз на версию данных)."""
+        with self.lock:
+            if self._line_index is None and self.data_type == "text":
+                self._line_index = LineIndex(self.text_data if isinstance(self.text_data, str) else "")
+                self.nbytes += self._line_index.nbytes
+            return self._line_index
+
+    def text_stats(self):
+        """Символы, слова и строки текстового набора (один раз на версию данных)."""
+        with self.lock:
+            if self.stats is None and self.data_type == "text":
+                text = self.text_data if isinstance(self.text_data, str) else ""
+                self.stats = {"chars": len(text), "words": len(text.split()), "lines": len(self.line_index())}
+            return self.stats
+
+    def take(self, positions, columns=None):
+        """Строки по номерам позиций (страница отсортированного/отфильтрованного представления)."""
+        with self.lock:
+            if self.dataframe is None and self.table is not None:
+                from .columnar_store import table_to_frame
+                return table_to_frame(self._arrow_columns(columns).take(positions))
+            return self._frame_columns(columns).iloc[positions]
+
+    def column(self, name):
+        """Одна колонка как Series (из Arrow-набора читается только она)."""
+        with self.lock:
+            if self.dataframe is None and self.table is not None:
+                from .columnar_store import table_to_frame
+                return table_to_frame(self._arrow_columns([name]))[name]
+            return self.dataframe[self._column_key(name)]
+
+    def chart_frame(self, columns=()):
+        """Колонки для графиков: выбранные ``columns`` или все числовые.
+
+        Из Arrow-набора читаются только эти колонки (``table.select``), вся
+        таблица в память не загружается и DataFrame набора не кэшируется.
+        """
+        with self.lock:
+            self.last_access = time.time()
+            if self.dataframe is None and self.table is not None:
+                import pyarrow.types as pat
+                from .columnar_store import table_to_frame
+                if columns:
+                    # Неизвестные колонки отклоняет построение графиков
+                    names = [name for name in columns if name in self.table.column_names]
+                else:
+                    names = [field.name for field in self.table.schema
+                             if pat.is_integer(field.type) or pat.is_floating(field.type)]
+                return table_to_frame(self.table.select(names))
+            return self.dataframe
+
+    def _column_key(self, name):
+        for col in self.dataframe.columns:
+            if str(col) == name:
+                return col
+        raise ValueError(f"Unknown column: {name}")
+
+    def _frame_columns(self, columns):
+        if not columns:
+            return self.dataframe
+        return self.dataframe[[self._column_key(name) for name in columns]]
+
+    def _arrow_columns(self, columns, table=None):
+        table = self.table if table is None else table
+        if not columns:
+            return table
+        unknown = [name for name in columns if name not in table.column_names]
+        if unknown:
+            raise ValueError(f"Unknown column: {unknown[0]}")
+        return table.select(list(columns))
+
+    def sort_order(self, name, descending=False):
+        """Перестановка строк по колонке; считается один раз на колонку и направление."""
+        key = (name, descending)
+        with self.lock:
+            order = self._sort_orders.get(key)
+            if order is None:
+                order = self._sort_orders[key] = sort_order(self.column(name), descending)
+                self.nbytes += order.nbytes
+            return order
+
+    def view(self, filters=(), sort=None):
+        """Позиции строк представления с фильтрами и сортировкой (``None`` — исходный порядок).
+
+        ``filters`` — условия ``(колонка, оператор, значение)``, ``sort`` —
+        ``(колонка, descending)``. Результат кэшируется, поэтому глубокие
+        страницы одного представления стоят O(limit).
+        """
+        if not filters:
+            return self.sort_order(*sort) if sort else None
+        key = (tuple(filters), sort)
+        with self.lock:
+            positions = self._views.get(key)
+            if positions is not None:
+                self._views.move_to_end(key)
+                return positions
+            mask = np.ones(self.num_rows, dtype=bool)
+            for column, op, value in filters:
+                mask &= condition_mask(self.column(column), op, value)
+            if sort:
+                order = self.sort_order(*sort)
+                positions = order[mask[order]]
+            else:
+                positions = np.flatnonzero(mask)
+            self._views[key] = positions
+            self.nbytes += positions.nbytes
+            while len(self._views) > VIEW_CACHE_SIZE:
+                _, dropped = self._views.popitem(last=False)
+                self.nbytes -= dropped.nbytes
+            return positions
+
+    def snapshot(self):
+        """Согласованный снимок (data_type, dataframe, text_data) под блокировкой набора."""
+        with self.lock:
+            self.last_access = time.time()
+            if self.data_type == "table":
+                return self.data_type, self.frame(), None
+            return self.data_type, None, self.text_data
+
+    def summary(self):
+        info = {
+            "dataset_id": self.dataset_id,
+            "filename": self.filename,
+            "data_type": self.data_type,
+            "version": self.version,
+            "content_hash": self.content_hash,
+            "memory_bytes": self.nbytes,
+            "created_at": self.created_at,
+        }
+        if self.data_type == "table":
+            info["rows"] = self.num_rows
+            info["columns"] = self.columns
+            info["memory_mapped"] = self.table is not None
+        else:
+            info["content_length"] = len(self.text_data) if isinstance(self.text_data, str) else 0
+        return info
+
+
+def estimate_nbytes(data):
+    """Оценка занимаемой памяти набора данных в байтах.
+
+    Memory-mapped Arrow Table не учитывается: его страницы принадлежат
+    page cache и вытесняются ОС.
+    """
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(index=True, deep=True).sum())
+    if data is None or is_arrow_table(data):
+        return 0
+    return sys.getsizeof(data)
+
+
+class DatasetStore:
+    """Реестр наборов данных по dataset_id и сессии с LRU-вытеснением.
+
+    Суммарный объём данных ограничен ``memory_limit`` байтами; при
+    превышении вытесняются наименее недавно использованные наборы
+    (последний добавленный набор не вытесняется никогда).
+
+    С ``registry_path`` метаданные наборов (id, сессия, имя файла, ключ
+    columnar store, версия) сохраняются в SQLite, общей для всех процессов
+    приложения. Набор, которого нет в памяти этого процесса (загружен
+    другим воркером, вытеснен, приложение перезапущено), или набор, который
+    другой процесс заменил более новой версией, восстанавливается через
+    ``loader(record)`` -> ``(data, stats)`` или ``None``.
+    """
+
+    def __init__(self, memory_limit=512 * 1024 * 1024, registry_path=None, loader=None):
+        self.memory_limit = memory_limit
+        self.registry_path = registry_path
+        self.loader = loader
+        self._datasets = OrderedDict()
+        self._lock = threading.Lock()
+        self._listeners = []
+        if registry_path:
+            os.makedirs(os.path.dirname(os.path.abspath(registry_path)), exist_ok=True)
+            with self._registry() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS datasets ("
+                    "id TEXT PRIMARY KEY, session_id TEXT NOT NULL, filename TEXT, data_type TEXT, "
+                    "file_path TEXT, content_hash TEXT, version INTEGER NOT NULL, created_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS datasets_session ON datasets (session_id, created_at)")
+
+    def _registry(self):
+        return sqlite3.connect(self.registry_path, timeout=10, check_same_thread=False)
+
+    def _register(self, dataset):
+        if not self.registry_path:
+            return
+        try:
+            with self._registry() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO datasets (id, session_id, filename, data_type, file_path, content_hash, "
+                    "version, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (dataset.dataset_id, dataset.session_id, dataset.filename, dataset.data_type,
+                     dataset.file_path, dataset.content_hash, dataset.version, dataset.created_at),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to register dataset {dataset.dataset_id}: {e}")
+
+    def _records(self, where, params, limit=None):
+        if not self.registry_path:
+            return []
+        query = ("SELECT id, session_id, filename, data_type, file_path, content_hash, version, created_at "
+                 f"FROM datasets WHERE {where} ORDER BY created_at DESC")
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        try:
+            with self._registry() as conn:
+                rows = conn.execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Dataset registry lookup failed: {e}")
+            return []
+        names = ("dataset_id", "session_id", "filename", "data_type", "file_path", "content_hash",
+                 "version", "created_at")
+        return [dict(zip(names, row)) for row in rows]
+
+    def _restore(self, record):
+        """Набор по записи реестра (данные — через ``loader``) или None, если данных нет."""
+        try:
+            loaded = self.loader(record) if self.loader else None
+        except Exception as e:
+            logger.warning(f"Failed to restore dataset {record['dataset_id']}: {type(e).__name__}: {e}")
+            loaded = None
+        if loaded is None:
+            return None
+        data, stats = loaded
+        dataset = Dataset(record["dataset_id"], record["session_id"], record["filename"], data,
+                          file_path=record["file_path"], content_hash=record["content_hash"], stats=stats)
+        dataset.version = record["version"]
+        dataset.created_at = record["created_at"]
+        with self._lock:
+            replaced = dataset.dataset_id in self._datasets
+            self._datasets[dataset.dataset_id] = dataset
+            evicted = self._evict(keep=dataset.dataset_id)
+        if replaced:
+            self._notify(dataset.dataset_id)
+        for dataset_id in evicted:
+            self._notify(dataset_id)
+        logger.info(f"Dataset {dataset.dataset_id} restored from registry (version {dataset.version})")
+        return dataset
+
+    def on_remove(self, listener):
+        """Регистрирует ``listener(dataset_id)``, вызываемый при удалении/замене набора."""
+        self._listeners.append(listener)
+
+    def _notify(self, dataset_id):
+        for listener in self._listeners:
+            try:
+                listener(dataset_id)
+            except Exception as e:
+                logger.warning(f"Dataset listener failed for {dataset_id}: {e}")
+
+    def add(self, session_id, filename, data, file_path=None, schema=None, content_hash=None, stats=None,
+            line_index=None):
+        dataset = Dataset(uuid.uuid4().hex, session_id, filename, data, file_path=file_path,
+                          schema=schema, content_hash=content_hash, stats=stats, line_index=line_index)
+        with self._lock:
+            self._datasets[dataset.dataset_id] = dataset
+            evicted = self._evict(keep=dataset.dataset_id)
+        self._register(dataset)
+        for dataset_id in evicted:
+            self._notify(dataset_id)
+        logger.info(f"Dataset {dataset.dataset_id} stored ({dataset.data_type}, {dataset.nbytes} bytes, session={session_id})")
+        return dataset
+
+    def replace(self, dataset_id, session_id, filename, data, file_path=None, schema=None,
+                content_hash=None, stats=None, line_index=None):
+        """Заменяет данные существующего набора (версия увеличивается)."""
+        dataset = self.get(dataset_id, session_id)
+        if dataset is None:
+            return None
+        with dataset.lock:
+            dataset._set_data(filename, data, file_path, schema, content_hash, stats, line_index)
+        self._register(dataset)
+        with self._lock:
+            evicted = self._evict(keep=dataset_id)
+        self._notify(dataset_id)
+        for evicted_id in evicted:
+            self._notify(evicted_id)
+        logger.info(f"Dataset {dataset_id} replaced (version {dataset.version})")
+        return dataset
+
+    def get(self, dataset_id, session_id=None):
+        with self._lock:
+            dataset = self._datasets.get(dataset_id)
+        records = self._records("id = ?", (dataset_id,)) if dataset_id else []
+        if records and (dataset is None or dataset.version < records[0]["version"]):
+            # Набор загружен, вытеснен или заменён другим процессом
+            if session_id is not None and records[0]["session_id"] != session_id:
+                return None
+            dataset = self._restore(records[0]) or dataset
+        with self._lock:
+            if dataset is None or (session_id is not None and dataset.session_id != session_id):
+                return None
+            if dataset_id in self._datasets:
+                self._datasets.move_to_end(dataset_id)
+            dataset.last_access = time.time()
+            return dataset
+
+    def latest(self, session_id):
+        """Последний загруженный набор данных сессии (с реестром — среди наборов всех процессов)."""
+        records = self._records("session_id = ?", (session_id,), limit=1)
+        if records:
+            dataset = self.get(records[0]["dataset_id"], session_id)
+            if dataset is not None:
+                return dataset
+        with self._lock:
+            candidates = [d for d in self._datasets.values() if d.session_id == session_id]
+        if not candidates:
+            return None
+        return self.get(max(candidates, key=lambda d: d.created_at).dataset_id, session_id)
+
+    def resolve(self, dataset_id, session_id):
+        """Набор по dataset_id, а без него — последний набор сессии."""
+        if dataset_id:
+            return self.get(dataset_id, session_id)
+        return self.latest(session_id)
+
+    def list(self, session_id):
+        with self._lock:
+            summaries = [d.summary() for d in self._datasets.values() if d.session_id == session_id]
+        # Наборы, которых нет в памяти этого процесса, — по записям реестра
+        loaded = {summary["dataset_id"] for summary in summaries}
+        for record in reversed(self._records("session_id = ?", (session_id,))):
+            if record["dataset_id"] not in loaded:
+                summaries.append({key: record[key] for key in ("dataset_id", "filename", "data_type", "version",
+                                                               "content_hash", "created_at")})
+        return summaries
+
+    def remove(self, dataset_id, session_id=None):
+        records = self._records("id = ?", (dataset_id,))
+        with self._lock:
+            dataset = self._datasets.get(dataset_id)
+            owner = dataset.session_id if dataset is not None else (records[0]["session_id"] if records else None)
+            if owner is None or (session_id is not None and owner != session_id):
+                return False
+            self._datasets.pop(dataset_id, None)
+        if records:
+            try:
+                with self._registry() as conn:
+                    conn.execute("DELETE FROM datasets WHERE id = ?", (dataset_id,))
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to unregister dataset {dataset_id}: {e}")
+        self._notify(dataset_id)
+        return True
+
+    def _evict(self, keep):
+        evicted = []
+        total = sum(d.nbytes for d in self._datasets.values())
+        for dataset_id in list(self._datasets.keys()):
+            if total <= self.memory_limit:
+                break
+            if dataset_id == keep:
+                continue
+            dataset = self._datasets.pop(dataset_id)
+            total -= dataset.nbytes
+            evicted.append(dataset_id)
+            logger.info(f"Dataset {dataset_id} evicted (LRU), freed {dataset.nbytes} bytes")
+        return evicted
+
+    def stats(self):
+        with self._lock:
+            return {
+                "datasets": len(self._datasets),
+                "memory_bytes": sum(d.nbytes for d in self._datasets.values()),
+                "memory_limit": self.memory_limit,
+            }
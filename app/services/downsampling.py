@@ -0,0 +1,100 @@
+import numpy as np
+
+# Методы прореживания рядов для графиков
+METHODS = ("lttb", "minmax")
+
+
+def lttb_edges(n, n_out):
+    """Границы корзин LTTB: первая и последняя точки — отдельные корзины."""
+    middle = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    return np.concatenate([[0], middle, [n]])
+
+
+def minmax_edges(n, n_out):
+    """Границы корзин равного размера, по две точки (min и max) на корзину."""
+    size = int(np.ceil(n / max(1, n_out // 2)))
+    return np.append(np.arange(0, n, size), n)
+
+
+def lttb(y, edges):
+    """Largest-Triangle-Three-Buckets: по одной точке на корзину, сохраняющей форму ряда.
+
+    Площади треугольников внутри корзины и средние следующих корзин
+    считаются векторно; последовательна только цепочка выбранных точек.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    x = np.arange(len(y), dtype=np.float64)
+    valid = ~np.isnan(y)
+    # Средние (x, y) каждой корзины по непустым значениям
+    counts = np.add.reduceat(valid.astype(np.float64), edges[:-1])
+    sum_x = np.add.reduceat(np.where(valid, x, 0.0), edges[:-1])
+    sum_y = np.add.reduceat(np.where(valid, y, 0.0), edges[:-1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x = np.where(counts > 0, sum_x / counts, (edges[:-1] + edges[1:] - 1) / 2)
+        mean_y = np.where(counts > 0, sum_y / counts, 0.0)
+
+    n_buckets = len(edges) - 1
+    positions = np.empty(n_buckets, dtype=np.int64)
+    positions[0] = 0
+    positions[-1] = len(y) - 1
+    a = 0
+    for i in range(1, n_buckets - 1):
+        start, stop = edges[i], edges[i + 1]
+        ay = y[a] if valid[a] else mean_y[i - 1]
+        area = np.abs((x[a] - mean_x[i + 1]) * (y[start:stop] - ay)
+                      - (x[a] - x[start:stop]) * (mean_y[i + 1] - ay))
+        # Пропуски выбираются только если в корзине нет значений
+        area = np.where(valid[start:stop], area, -1.0)
+        a = start + int(np.argmax(area))
+        positions[i] = a
+    return positions
+
+
+def minmax(y, edges):
+    """Min/max-прореживание: минимум и максимум каждой корзины в порядке следования.
+
+    Все корзины одного размера, поэтому ряд раскладывается в матрицу и
+    argmin/argmax считаются одним вызовом для всех корзин.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n_buckets = len(edges) - 1
+    size = int(edges[1] - edges[0])
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:len(y)] = y
+    grid = padded.reshape(n_buckets, size)
+    low = np.argmin(np.where(np.isnan(grid), np.inf, grid), axis=1)
+    high = np.argmax(np.where(np.isnan(grid), -np.inf, grid), axis=1)
+    pairs = np.sort(np.stack([low, high], axis=1), axis=1) + edges[:-1, None]
+    return np.minimum(pairs, len(y) - 1).ravel()
+
+
+def label_positions(edges, method):
+    """Позиции строк для общей оси подписей: начало корзины (для min/max — начало и конец)."""
+    if method == "minmax":
+        return np.stack([edges[:-1], edges[1:] - 1], axis=1).ravel()
+    return edges[:-1]
+
+
+def downsample_positions(series_by_column, n, max_points, method="lttb"):
+    """Номера строк для каждой колонки и общие подписи оси X.
+
+    Все колонки делятся на одни и те же корзины, поэтому ``labels``
+    (позиции подписей) одинаковы для всех рядов графика, а каждая колонка
+    берёт в корзине свою точку. Если строк не больше ``max_points``,
+    данные возвращаются без прореживания.
+
+    Returns:
+        (позиции подписей, {колонка: позиции строк})
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    if not max_points or n <= max_points or max_points < 4:
+        everything = np.arange(n)
+        return everything, {col: everything for col in series_by_column}
+    if method == "minmax":
+        edges = minmax_edges(n, max_points)
+        picks = {col: minmax(values, edges) for col, values in series_by_column.items()}
+    else:
+        edges = lttb_edges(n, max_points)
+        picks = {col: lttb(values, edges) for col, values in series_by_column.items()}
+    return label_positions(edges, method), picks
@@ -0,0 +1,271 @@
+import json
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from ..utils.logger import logger
+
+
+class JobCancelled(Exception):
+    """Задача отменена через ``JobQueue.cancel``; выбрасывается из ``progress()``."""
+
+
+class JobQueue:
+    """Фоновая очередь задач с пулом потоков и хранением состояния в SQLite.
+
+    Задачи переживают перезапуск: при старте задачи ``queued`` снова ставятся
+    в очередь. Выполняющаяся задача принадлежит процессу, который её взял
+    (``owner``), и её аренда (``lease_until``) продлевается фоновым потоком
+    каждые ``lease_seconds / 3`` секунд. В очередь возвращаются только
+    задачи ``running`` с истёкшей арендой — их процесс завершился, — поэтому
+    несколько процессов (воркеры gunicorn, поэтапный перезапуск) не
+    перехватывают задачи друг друга. Обработчик задачи
+    вызывается как ``handler(job_id, payload, progress)``, где
+    ``progress(stage, percent)`` сохраняет текущий этап выполнения.
+
+    Отмена кооперативная: задача в очереди отменяется сразу, а у
+    выполняющейся задачи следующий вызов ``progress()`` выбрасывает
+    ``JobCancelled`` (``progress()`` без аргументов только проверяет отмену).
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_CANCELLING = "cancelling"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+    STATUS_CANCELLED = "cancelled"
+
+    def __init__(self, db_path="jobs/jobs.sqlite", workers=2, lease_seconds=60):
+        self.db_path = db_path
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers = {}
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+                "stage TEXT, progress REAL NOT NULL DEFAULT 0, payload TEXT NOT NULL, "
+                "result TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+                "owner TEXT, lease_until REAL)"
+            )
+            # Базы, созданные до появления аренды задач
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+
+    def register(self, kind, handler):
+        self._handlers[kind] = handler
+
+    def start(self):
+        """Запускает рабочие потоки и поток аренды, возвращает в очередь незавершённые задачи."""
+        with self._lock:
+            if self._threads:
+                return
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (self.STATUS_QUEUED,)
+                ).fetchall()
+            for (job_id,) in rows:
+                self._queue.put(job_id)
+            recovered = self._recover_expired()
+            if rows or recovered:
+                logger.info(f"Recovered {len(rows) + recovered} unfinished job(s) from {self.db_path}")
+
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._heartbeat, name="job-lease", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            logger.info(f"Job queue started with {self.workers} worker(s), owner {self.owner}")
+
+    def _recover_expired(self):
+        """Возвращает в очередь задачи с истёкшей арендой; отменяемые — завершает как отменённые."""
+        now = time.time()
+        expired = "(lease_until IS NULL OR lease_until < ?)"
+        recovered = 0
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET status = ?, stage = ?, owner = NULL, updated_at = ? "
+                f"WHERE status = ? AND {expired}",
+                (self.STATUS_CANCELLED, "cancelled", now, self.STATUS_CANCELLING, now),
+            )
+            rows = conn.execute(
+                f"SELECT id, owner FROM jobs WHERE status = ? AND {expired} ORDER BY created_at",
+                (self.STATUS_RUNNING, now),
+            ).fetchall()
+            for job_id, owner in rows:
+                # Условие повторяется: задачу мог уже вернуть в очередь другой процесс
+                cursor = conn.execute(
+                    f"UPDATE jobs SET status = ?, owner = NULL, updated_at = ? "
+                    f"WHERE id = ? AND status = ? AND {expired}",
+                    (self.STATUS_QUEUED, now, job_id, self.STATUS_RUNNING, now),
+                )
+                if cursor.rowcount == 1:
+                    logger.warning(f"Job {job_id}: lease of {owner or 'unknown owner'} expired, re-queued")
+                    self._queue.put(job_id)
+                    recovered += 1
+        return recovered
+
+    def _heartbeat(self):
+        """Продлевает аренду своих задач и подбирает задачи процессов, которые перестали её продлевать."""
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status IN (?, ?)",
+                        (time.time() + self.lease_seconds, self.owner, self.STATUS_RUNNING, self.STATUS_CANCELLING),
+                    )
+                self._recover_expired()
+            except Exception as e:
+                logger.error(f"Job lease renewal failed: {e}")
+
+    def submit(self, kind, payload):
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, stage, progress, payload, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 0, ?, ?, ?)",
+                (job_id, kind, self.STATUS_QUEUED, "queued", json.dumps(payload, ensure_ascii=False), now, now),
+            )
+        self._queue.put(job_id)
+        logger.info(f"Job {job_id} ({kind}) queued")
+        return job_id
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, kind, status, stage, progress, result, error, created_at, updated_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "stage": row[3],
+            "progress": row[4],
+            "result": json.loads(row[5]) if row[5] else None,
+            "error": row[6],
+            "created_at": row[7],
+            "updated_at": row[8],
+        }
+
+    def cancel(self, job_id):
+        """Запрашивает отмену задачи; возвращает новый статус или None, если задача не найдена.
+
+        Завершённая задача не меняется (возвращается её статус).
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (self.STATUS_CANCELLED, "cancelled", now, job_id, self.STATUS_QUEUED),
+            )
+            if cursor.rowcount != 1:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                    (self.STATUS_CANCELLING, now, job_id, self.STATUS_RUNNING),
+                )
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is not None and row[0] in (self.STATUS_CANCELLED, self.STATUS_CANCELLING):
+            logger.info(f"Job {job_id}: cancellation requested ({row[0]})")
+        return row[0] if row else None
+
+    def _status(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def _claim(self, job_id):
+        """Атомарно переводит задачу в ``running``; False, если её уже взял другой воркер."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, owner = ?, lease_until = ?, updated_at = ? "
+                "WHERE id = ? AND status = ?",
+                (self.STATUS_RUNNING, "started", self.owner, time.time() + self.lease_seconds, time.time(),
+                 job_id, self.STATUS_QUEUED),
+            )
+            if cursor.rowcount != 1:
+                return None
+            row = conn.execute("SELECT kind, payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0], json.loads(row[1])
+
+    def _worker(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            except Exception as e:
+                logger.error(f"Job worker crashed on {job_id}: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id):
+        claimed = self._claim(job_id)
+        if claimed is None:
+            return
+        kind, payload = claimed
+        handler = self._handlers.get(kind)
+        if handler is None:
+            self._update(job_id, status=self.STATUS_FAILED, error=f"No handler for job kind: {kind}")
+            return
+
+        def progress(stage=None, percent=None):
+            if self._status(job_id) == self.STATUS_CANCELLING:
+                raise JobCancelled(f"Job {job_id} was cancelled")
+            if stage is None:
+                return
+            fields = {"stage": stage}
+            if percent is not None:
+                fields["progress"] = float(percent)
+            self._update(job_id, **fields)
+            logger.debug(f"Job {job_id}: {stage} ({percent})")
+
+        logger.info(f"Job {job_id} ({kind}) started")
+        try:
+            result = handler(job_id, payload, progress)
+            self._update(
+                job_id, status=self.STATUS_COMPLETED, stage="done", progress=100.0,
+                result=json.dumps(result, ensure_ascii=False, default=str),
+            )
+            logger.info(f"✅ Job {job_id} completed")
+        except JobCancelled:
+            logger.info(f"🛑 Job {job_id} cancelled")
+            self._update(job_id, status=self.STATUS_CANCELLED, stage="cancelled")
+        except Exception as e:
+            logger.error(f"❌ Job {job_id} failed: {type(e).__name__}: {e}", exc_info=True)
+            self._update(job_id, status=self.STATUS_FAILED, stage="failed", error=str(e))
+
+    def join(self, timeout=None):
+        """Ждёт опустошения очереди (используется в тестах)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
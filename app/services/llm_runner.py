@@ -0,0 +1,266 @@
+import asyncio
+import queue
+import threading
+import time
+from ..api.llm_provider import ProviderConfigError
+from ..utils.logger import logger
+from ..utils.response_cache import ResponseCache
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# Ключ результата провайдера в ответах анализа
+RESULT_KEYS = {"giga_chat": "giga_result", "proxy_api": "proxy_result"}
+PROVIDER_LABELS = {"giga_chat": "GigaChat API", "proxy_api": "Proxy API"}
+
+
+class LLMRunner:
+    """Запросы к провайдерам нейросетей (``LLMProvider``) из синхронного кода Flask.
+
+    Все провайдеры работают в одном фоновом цикле событий, поэтому пулы
+    соединений httpx и семафоры провайдеров общие для всех маршрутов. Здесь
+    же единая логика опроса: параллельные запросы (``fan_out``), таймаут
+    провайдера, кэш ответов и потоковые ответы (``stream``). У каждого
+    провайдера свой ``CircuitBreaker``: пока провайдер недоступен, запросы
+    к нему сразу завершаются ошибкой, а таймаут подстраивается под p95
+    задержки его ответов.
+    """
+
+    def __init__(self, providers, response_cache=None):
+        self.providers = {provider.name: provider for provider in providers}
+        self.breakers = {name: CircuitBreaker(PROVIDER_LABELS.get(name, name), provider.timeout)
+                         for name, provider in self.providers.items()}
+        self.response_cache = response_cache
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def _event_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="llm-loop", daemon=True).start()
+            return self._loop
+
+    def submit(self, coro):
+        """Запускает корутину в цикле провайдеров; возвращает ``concurrent.futures.Future``."""
+        return asyncio.run_coroutine_threadsafe(coro, self._event_loop())
+
+    def run(self, coro):
+        """Выполняет корутину в цикле провайдеров и ждёт результат."""
+        return self.submit(coro).result()
+
+    def available(self, only=None):
+        """Заготовка результата и провайдеры, которым можно отправить запрос.
+
+        Returns:
+            (results, {имя: провайдер}); отсутствующие провайдеры сразу
+            отмечены в ``results["errors"]``, отключённые — в их результате.
+            ``only`` — ограничить список провайдеров.
+        """
+        results = {key: None for key in RESULT_KEYS.values()}
+        results["errors"] = {}
+        providers = {}
+        for name, key in RESULT_KEYS.items():
+            if only is not None and name not in only:
+                continue
+            provider = self.providers.get(name)
+            if provider is None:
+                logger.warning(f"  ⚠️ {PROVIDER_LABELS[name]} not initialized")
+                results["errors"][name] = f"{PROVIDER_LABELS[name]} not initialized"
+            elif not provider.enabled:
+                logger.info(f"  ℹ️ {PROVIDER_LABELS[name]} calls are disabled by configuration, skipping")
+                results[key] = f"{PROVIDER_LABELS[name]} disabled by configuration"
+            else:
+                providers[name] = provider
+        return results, providers
+
+    def _cache_key(self, provider, prompt):
+        if self.response_cache is None:
+            return None
+        return ResponseCache.make_key(provider.name, provider.cache_model, prompt, provider.cache_params)
+
+    async def _cache_call(self, method, *args):
+        # Кэш на диске (SQLite) читается и пишется в потоке, чтобы не останавливать цикл провайдеров
+        if self.response_cache.db_path:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def _cache_get(self, key):
+        return None if key is None else await self._cache_call(self.response_cache.get, key)
+
+    async def _cache_set(self, key, result):
+        await self._cache_call(self.response_cache.set, key, result)
+
+    async def _ask(self, provider, prompt, session_id=None):
+        key = self._cache_key(provider, prompt)
+        cached = await self._cache_get(key)
+        if cached is not None:
+            logger.info(f"  ⚡ {provider.name} response served from cache")
+            return cached
+        breaker = self.breakers[provider.name]
+        timeout = breaker.before_call()
+        try:
+            async with provider.semaphore():
+                started = time.monotonic()
+                result = await asyncio.wait_for(provider.complete(prompt, session_id=session_id), timeout)
+        except asyncio.TimeoutError:
+            breaker.record_timeout(timeout)
+            raise TimeoutError(f"Request timeout after {timeout:g}s") from None
+        except (asyncio.CancelledError, ProviderConfigError):
+            # Запрос не состоялся (отменён или провайдер не настроен) — это не сбой провайдера
+            breaker.release()
+            raise
+        except Exception as e:
+            breaker.record_failure(f"{type(e).__name__}: {e}")
+            raise
+        breaker.record_success(time.monotonic() - started)
+        if key is not None and result is not None:
+            await self._cache_set(key, result)
+        return result
+
+    async def complete(self, name, prompt, session_id=None):
+        """Корутина ответа одного провайдера — для запросов внутри цикла провайдеров."""
+        provider = self.providers.get(name)
+        if provider is None:
+            raise Exception(f"{PROVIDER_LABELS.get(name, name)} not initialized")
+        return await self._ask(provider, prompt, session_id)
+
+    def ask(self, name, prompt, session_id=None):
+        """Ответ одного провайдера (с кэшем, семафором и таймаутом провайдера)."""
+        return self.run(self.complete(name, prompt, session_id))
+
+    async def _fan_out(self, prompt, session_id, only):
+        results, providers = self.available(only)
+
+        async def one(name, provider):
+            logger.info(f"  🤖 Sending request to {name}...")
+            try:
+                results[RESULT_KEYS[name]] = await self._ask(provider, prompt, session_id)
+                logger.info(f"  ✅ {name} analysis complete (result length: {len(str(results[RESULT_KEYS[name]]))} chars)")
+            except Exception as e:
+                logger.error(f"  ❌ {name} error: {type(e).__name__}: {e}")
+                results["errors"][name] = str(e)
+
+        await asyncio.gather(*(one(name, provider) for name, provider in providers.items()))
+        return results
+
+    def fan_out(self, prompt, session_id=None, only=None):
+        """Один запрос ко всем провайдерам одновременно.
+
+        Задержка равна самому медленному провайдеру, а не сумме; ошибки и
+        таймауты попадают в ``errors``.
+
+        Returns:
+            ``{"giga_result", "proxy_result", "errors"}``
+        """
+        started = time.monotonic()
+        results = self.run(self._fan_out(prompt, session_id, only))
+        logger.info(f"  Providers finished in {time.monotonic() - started:.2f}s")
+        return results
+
+    async def _pump(self, name, provider, prompt, session_id, events):
+        """Читает поток провайдера и кладёт события в очередь; таймаут — между фрагментами."""
+        key = self._cache_key(provider, prompt)
+        cached = await self._cache_get(key)
+        if cached is not None:
+            logger.info(f"  ⚡ {name} response served from cache")
+            events.put(("delta", {"provider": name, "text": cached}))
+            events.put(("done", {"provider": name, "result": cached}))
+            return
+        breaker = self.breakers[provider.name]
+        parts = []
+        finished = False
+        try:
+            breaker.before_call()
+            async with provider.semaphore():
+                stream = provider.stream(prompt, session_id=session_id)
+                try:
+                    while True:
+                        try:
+                            text = await asyncio.wait_for(stream.__anext__(), provider.timeout)
+                        except StopAsyncIteration:
+                            break
+                        parts.append(text)
+                        events.put(("delta", {"provider": name, "text": text}))
+                finally:
+                    await stream.aclose()
+            finished = True
+        except asyncio.TimeoutError:
+            finished = True
+            breaker.record_failure("stream timeout")
+            logger.error(f"  ❌ {name} stream stalled for {provider.timeout}s")
+            events.put(("error", {"provider": name, "error": f"Request timeout after {provider.timeout}s"}))
+            return
+        except Exception as e:
+            finished = True
+            if isinstance(e, ProviderConfigError):
+                breaker.release()
+            elif not isinstance(e, CircuitOpenError):
+                breaker.record_failure(f"{type(e).__name__}: {e}")
+            logger.error(f"  ❌ {name} stream error: {type(e).__name__}: {e}")
+            events.put(("error", {"provider": name, "error": str(e)}))
+            return
+        finally:
+            if not finished:
+                breaker.release()
+        breaker.record_success()
+        result = "".join(parts)
+        if key is not None and parts:
+            await self._cache_set(key, result)
+        events.put(("done", {"provider": name, "result": result}))
+
+    def stream(self, prompt, session_id=None, only=None):
+        """Потоковые ответы провайдеров параллельно: генератор событий ``(event, data)``.
+
+        ``delta`` — ``{provider, text}`` по мере генерации; по каждому
+        провайдеру ``done`` (``{provider, result}``) или ``error``
+        (``{provider, error}``); в конце ``end`` (``{errors}``). Закрытие
+        генератора (клиент отключился) отменяет чтение потоков.
+        """
+        results, providers = self.available(only)
+        for name, error in results["errors"].items():
+            yield "error", {"provider": name, "error": error}
+        for name, key in RESULT_KEYS.items():
+            if name not in providers and results[key] is not None:
+                yield "done", {"provider": name, "result": results[key]}
+
+        events = queue.Queue()
+
+        async def pump_all():
+            await asyncio.gather(*(self._pump(name, provider, prompt, session_id, events)
+                                   for name, provider in providers.items()))
+
+        future = asyncio.run_coroutine_threadsafe(pump_all(), self._event_loop())
+        pending = set(providers)
+        try:
+            while pending:
+                try:
+                    event, data = events.get(timeout=0.5)
+                except queue.Empty:
+                    if future.done() and events.empty():
+                        break
+                    continue
+                if event != "delta":
+                    pending.discard(data["provider"])
+                    if event == "error":
+                        results["errors"][data["provider"]] = data["error"]
+                yield event, data
+            yield "end", {"errors": results["errors"]}
+        finally:
+            future.cancel()
+
+    def stats(self):
+        """Состояние выключателей и адаптивные таймауты провайдеров."""
+        return {name: breaker.stats() for name, breaker in self.breakers.items()}
+
+    def close(self):
+        """Закрывает клиентов провайдеров и останавливает цикл событий (тесты, бенчмарки)."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def close_all():
+            for provider in self.providers.values():
+                await provider.aclose()
+
+        asyncio.run_coroutine_threadsafe(close_all(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
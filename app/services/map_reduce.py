@@ -0,0 +1,215 @@
+import asyncio
+import math
+import os
+from concurrent.futures import wait
+from ..utils.logger import logger
+from .prompt_builder import (CHARS_PER_TOKEN, average_row_chars, build_table_prompt, build_text_prompt,
+                             estimate_tokens)
+
+# Размер фрагмента таблицы в токенах и предел числа фрагментов: у очень больших таблиц
+# фрагмент — это диапазон строк, из которого в промпт попадает статистика и выборка
+MAP_REDUCE_CHUNK_TOKENS = int(os.getenv('MAP_REDUCE_CHUNK_TOKENS', '2000'))
+MAP_REDUCE_MAX_CHUNKS = int(os.getenv('MAP_REDUCE_MAX_CHUNKS', '32'))
+# Одновременных запросов к одному провайдеру
+MAP_REDUCE_CONCURRENCY = int(os.getenv('MAP_REDUCE_CONCURRENCY', '4'))
+# Бюджет итогового (reduce) запроса; если частичных ответов больше, они сводятся по уровням
+MAP_REDUCE_REDUCE_TOKENS = int(os.getenv('MAP_REDUCE_REDUCE_TOKENS', '4000'))
+
+# Как часто проверять отмену задачи, пока запросы выполняются
+_POLL_INTERVAL = 0.5
+
+MAP_PROMPT = """Ты - аналитическая система. Это фрагмент {index} из {count} большой таблицы (строки {start}–{stop} из {total}).
+
+{table}
+
+Кратко (до 5 пунктов) опиши закономерности, аномалии и выбросы этого фрагмента с конкретными значениями. Выводы будут объединены с выводами по остальным фрагментам."""
+
+REDUCE_PROMPT = """Ты - аналитическая система с большим опытом. Таблица проанализирована по фрагментам.
+
+Общее описание таблицы:
+{overview}
+
+Выводы по фрагментам:
+{partials}
+
+Сведи выводы в единый анализ всей таблицы: ключевые особенности, закономерности, аномалии и интересные тенденции. Не повторяйся и укажи, если фрагменты противоречат друг другу."""
+
+COMBINE_PROMPT = """Ниже выводы по фрагментам {first}–{last} одной таблицы:
+
+{partials}
+
+Объедини их в краткий общий список выводов (до 10 пунктов) с конкретными значениями."""
+
+
+def _slice(data, start, stop):
+    if hasattr(data, "num_rows") and hasattr(data, "schema"):
+        from .columnar_store import table_to_frame
+        return table_to_frame(data.slice(start, stop - start))
+    return data.iloc[start:stop]
+
+
+def chunk_ranges(data, chunk_tokens=None, max_chunks=None):
+    """Диапазоны строк ``[(start, stop), ...]``, каждый примерно на ``chunk_tokens`` токенов.
+
+    Размер строки оценивается по пробным строкам; если фрагментов получается
+    больше ``max_chunks``, таблица делится на ``max_chunks`` равных диапазонов.
+    """
+    chunk_tokens = chunk_tokens or MAP_REDUCE_CHUNK_TOKENS
+    max_chunks = max_chunks or MAP_REDUCE_MAX_CHUNKS
+    rows = data.num_rows if hasattr(data, "num_rows") else len(data)
+    if not rows:
+        return []
+    # Около трети бюджета фрагмента уходит на схему и статистику
+    rows_per_chunk = max(1, int(chunk_tokens * CHARS_PER_TOKEN * 0.6 // average_row_chars(data)))
+    count = min(max_chunks, math.ceil(rows / rows_per_chunk))
+    bounds = [round(i * rows / count) for i in range(count + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(count)]
+
+
+def _chunk_prompt(data, ranges, index, chunk_tokens):
+    from .statistics import profile_frame
+    start, stop = ranges[index]
+    frame = _slice(data, start, stop)
+    table = build_table_prompt(frame, profile=profile_frame(frame), budget_tokens=chunk_tokens)
+    total = data.num_rows if hasattr(data, "num_rows") else len(data)
+    return MAP_PROMPT.format(index=index + 1, count=len(ranges), start=start + 1, stop=stop, total=total, table=table)
+
+
+async def _reduce(ask, partials, overview, budget_tokens):
+    """Итоговый запрос по частичным ответам ``[(первый фрагмент, последний фрагмент, текст), ...]``.
+
+    Если частичные ответы не помещаются в бюджет, они сначала объединяются
+    группами (промежуточные запросы), и так до тех пор, пока не поместятся.
+    """
+    budget = budget_tokens - estimate_tokens(REDUCE_PROMPT) - estimate_tokens(overview)
+    # Каждый ответ не длиннее половины бюджета — в группу входит не меньше двух
+    partials = [(first, last, build_text_prompt(text, max(budget // 2, 1)))
+                for first, last, text in partials]
+    while len(partials) > 1 and sum(estimate_tokens(text) for _, _, text in partials) > budget:
+        groups, group, used = [], [], 0
+        for item in partials:
+            cost = estimate_tokens(item[2])
+            if group and used + cost > budget:
+                groups.append(group)
+                group, used = [], 0
+            group.append(item)
+            used += cost
+        groups.append(group)
+        logger.info(f"  🔁 Combining {len(partials)} partial answers in {len(groups)} group(s)")
+
+        async def combine(group):
+            if len(group) == 1:
+                return group[0]
+            first, last = group[0][0], group[-1][1]
+            return first, last, await ask(COMBINE_PROMPT.format(first=first, last=last, partials=_join(group)))
+
+        partials = list(await asyncio.gather(*(combine(group) for group in groups)))
+    return await ask(REDUCE_PROMPT.format(overview=overview, partials=_join(partials)))
+
+
+def _join(partials):
+    return "\n\n".join(f"[Фрагменты {first}–{last}]\n{text}" if first != last else f"[Фрагмент {first}]\n{text}"
+                       for first, last, text in partials)
+
+
+async def _map_reduce(data, ranges, providers, overview, chunk_tokens, concurrency, state):
+    """Фрагменты и итоговые сводки всех провайдеров в цикле событий провайдеров.
+
+    Таймаут и очередь к провайдеру — забота ``ask`` (``LLMRunner``); здесь
+    только не больше ``concurrency`` фрагментов на провайдера одновременно.
+    Прогресс — в ``state`` (читается вызывающим потоком).
+    """
+    # Промпт фрагмента строится один раз (в потоке, чтобы не занимать цикл событий)
+    # и освобождается, когда его отправили все провайдеры
+    prompts, users = {}, {}
+
+    async def prompt(index):
+        if index not in prompts:
+            prompts[index] = asyncio.ensure_future(
+                asyncio.to_thread(_chunk_prompt, data, ranges, index, chunk_tokens))
+            users[index] = len(providers)
+        try:
+            return await prompts[index]
+        finally:
+            users[index] -= 1
+            if not users[index]:
+                del prompts[index]
+
+    async def run_provider(name, ask):
+        slots = asyncio.Semaphore(concurrency)
+        partials, failures = {}, {}
+
+        async def chunk(index):
+            async with slots:
+                try:
+                    partials[index] = await ask(await prompt(index))
+                except Exception as e:
+                    logger.warning(f"  ⚠️ {name} failed on chunk {index + 1}: {type(e).__name__}: {e}")
+                    failures[index] = str(e)
+                state["completed"] += 1
+
+        await asyncio.gather(*(chunk(index) for index in range(len(ranges))))
+        result = {"result": None, "error": None, "chunks": len(ranges), "failed_chunks": len(failures)}
+        answers = [(index + 1, index + 1, partials[index]) for index in sorted(partials)]
+        if not answers:
+            result["error"] = next(iter(failures.values()), "No chunks to analyze")
+            return result
+        try:
+            result["result"] = await _reduce(ask, answers, overview, MAP_REDUCE_REDUCE_TOKENS)
+        except Exception as e:
+            logger.error(f"  ❌ {name} summarization failed: {type(e).__name__}: {e}")
+            result["error"] = str(e)
+        return result
+
+    names = list(providers)
+    outcomes = await asyncio.gather(*(run_provider(name, providers[name]) for name in names))
+    return dict(zip(names, outcomes))
+
+
+def run_map_reduce(data, providers, submit, profile=None, progress=None,
+                   chunk_tokens=None, max_chunks=None, concurrency=None):
+    """Map-reduce анализ таблицы: фрагменты параллельно, затем итоговая сводка.
+
+    Args:
+        data: DataFrame или Arrow Table
+        providers: ``{имя: ask(prompt)}`` — корутины запроса к провайдеру
+            (таймаут, кэш и семафор провайдера — внутри ``ask``)
+        submit: запуск корутины в цикле провайдеров, возвращает
+            ``concurrent.futures.Future`` (``LLMRunner.submit``)
+        profile: статистика всей таблицы — для общего описания в итоговом запросе
+        progress: ``progress(stage, percent)``; ``progress()`` без аргументов
+            проверяет отмену задачи
+        concurrency: одновременных запросов к одному провайдеру
+
+    Returns:
+        ``{имя: {"result", "error", "chunks", "failed_chunks"}}``
+    """
+    progress = progress or (lambda stage=None, percent=None: None)
+    chunk_tokens = chunk_tokens or MAP_REDUCE_CHUNK_TOKENS
+    concurrency = concurrency or MAP_REDUCE_CONCURRENCY
+    ranges = chunk_ranges(data, chunk_tokens, max_chunks)
+    logger.info(f"  🧩 Map-reduce: {len(ranges)} chunk(s) × {len(providers)} provider(s), "
+                f"{concurrency} request(s) in flight per provider")
+
+    overview = build_table_prompt(data, profile=profile, budget_tokens=MAP_REDUCE_REDUCE_TOKENS // 4)
+    total_calls = len(ranges) * len(providers)
+    state = {"completed": 0}
+    reported = None
+    progress("mapping", 40)
+    future = submit(_map_reduce(data, ranges, providers, overview, chunk_tokens, concurrency, state))
+    try:
+        # Запросы выполняются в цикле провайдеров; здесь — прогресс и проверка отмены
+        while not wait([future], timeout=_POLL_INTERVAL).done:
+            if state["completed"] < total_calls:
+                current = ("mapping", 40 + 45 * state["completed"] / max(total_calls, 1))
+            else:
+                current = ("reducing", 88)
+            if current != reported:
+                progress(*current)
+                reported = current
+            else:
+                progress()
+        return future.result()
+    finally:
+        # Отмена задачи отменяет и запросы, которые уже выполняются
+        future.cancel()
@@ -0,0 +1,119 @@
+import base64
+import hashlib
+import json
+import re
+import numpy as np
+
+_NEWLINE = re.compile("\n")
+
+
+class LineIndex:
+    """Индекс начал строк текста: страница строк вырезается без повторного ``split``.
+
+    Строится один раз на версию набора; хранит по одному int64 на строку
+    вместо списка строк, поэтому память под индекс мала относительно текста.
+    """
+
+    def __init__(self, text, newlines=None):
+        self.text = text
+        if newlines is None:
+            newlines = _newlines(text)
+        self.starts = np.concatenate([[0], newlines + 1])
+        self.ends = np.concatenate([newlines, [len(text)]])
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def nbytes(self):
+        return self.starts.nbytes + self.ends.nbytes
+
+    def line(self, position):
+        return self.text[self.starts[position]:self.ends[position]]
+
+    def lines(self, offset, limit):
+        stop = min(offset + limit, len(self.starts))
+        return [self.text[self.starts[i]:self.ends[i]] for i in range(offset, stop)]
+
+
+class LineIndexBuilder:
+    """``LineIndex`` текста, который приходит частями (страницами PDF), соединёнными через ``\\n``.
+
+    Переводы строк каждой части ищутся сразу по её поступлении, пока
+    следующие части ещё извлекаются; ``finish(text)`` связывает индекс с
+    итоговым текстом без второго прохода по нему.
+    """
+
+    def __init__(self):
+        self._newlines = []
+        self._length = 0
+        self.parts = 0
+
+    def add(self, part):
+        if self.parts:
+            # Разделитель между частями — тоже перевод строки
+            self._newlines.append(np.array([self._length], dtype=np.int64))
+            self._length += 1
+        self._newlines.append(_newlines(part) + self._length)
+        self._length += len(part)
+        self.parts += 1
+
+    def finish(self, text):
+        if not self.parts or len(text) != self._length:
+            return LineIndex(text)
+        return LineIndex(text, np.concatenate(self._newlines))
+
+
+def _newlines(text):
+    return np.fromiter((m.start() for m in _NEWLINE.finditer(text)), dtype=np.int64)
+
+
+class RowGroupIndex:
+    """Индекс record batch'ей Arrow Table: страница читается только из нужных батчей.
+
+    ``offsets`` — номер первой строки каждого батча; поиск батча — бинарный
+    (``np.searchsorted``), так что глубокие страницы стоят O(limit).
+    """
+
+    def __init__(self, table):
+        self.batches = table.to_batches()
+        self.schema = table.schema
+        sizes = [batch.num_rows for batch in self.batches]
+        self.offsets = np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)])
+
+    def slice(self, offset, limit):
+        import pyarrow as pa
+        total = int(self.offsets[-1])
+        offset = max(0, min(offset, total))
+        stop = min(offset + limit, total)
+        if stop <= offset:
+            return self.schema.empty_table()
+        first = int(np.searchsorted(self.offsets, offset, side="right")) - 1
+        last = int(np.searchsorted(self.offsets, stop, side="left"))
+        table = pa.Table.from_batches(self.batches[first:last], schema=self.schema)
+        return table.slice(offset - int(self.offsets[first]), stop - offset)
+
+
+def view_key(*params):
+    """Короткий отпечаток параметров представления (фильтры, сортировка) для курсора."""
+    return hashlib.sha256(repr(params).encode("utf-8")).hexdigest()[:12]
+
+
+def make_cursor(version, position, key):
+    raw = json.dumps({"v": version, "p": int(position), "k": key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def read_cursor(token, version, key):
+    """Позиция из курсора; курсор другой версии данных или другого представления отклоняется."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        position = int(state["p"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if state.get("v") != version:
+        raise ValueError("Cursor is stale: the dataset has been replaced")
+    if state.get("k") != key:
+        raise ValueError("Cursor does not match the requested filter/sort")
+    return position
@@ -0,0 +1,295 @@
+import os
+import numpy as np
+import pandas as pd
+from .statistics import QUANTILES, distinct_count, is_numeric_column, quantile_key, stringify_nested
+
+# Бюджет данных в промпте (в токенах). Токенизатора провайдера у нас нет, поэтому длина
+# оценивается грубо: ~3 символа на токен для смеси кириллицы, чисел и разделителей
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '3000'))
+CHARS_PER_TOKEN = 3
+# Сколько частых значений показывать для категориальных колонок
+PROMPT_TOP_VALUES = int(os.getenv('PROMPT_TOP_VALUES', '5'))
+# Колонка с 2..STRATIFY_MAX_GROUPS значениями используется для стратификации выборки строк
+STRATIFY_MAX_GROUPS = 20
+# Длинные ячейки в выборке обрезаются
+MAX_CELL_CHARS = 60
+
+# Доли бюджета: колонки со статистикой, затем частые значения, остаток — выборка строк
+_COLUMNS_SHARE = 0.5
+_TOP_VALUES_SHARE = 0.7
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _is_arrow(data):
+    return hasattr(data, "num_rows") and hasattr(data, "schema")
+
+
+def _num_rows(data):
+    return data.num_rows if _is_arrow(data) else len(data)
+
+
+def _columns(data):
+    return list(data.column_names) if _is_arrow(data) else list(data.columns)
+
+
+def _column(data, name):
+    if _is_arrow(data):
+        return data.column(name).to_pandas()
+    return data[name]
+
+
+def _take(data, positions):
+    if _is_arrow(data):
+        from .columnar_store import table_to_frame
+        return table_to_frame(data.take(positions))
+    return data.iloc[positions]
+
+
+def _fmt(value):
+    if isinstance(value, (float, np.floating)):
+        return f"{value:.4g}"
+    if isinstance(value, pd.Timestamp) and value == value.normalize():
+        return value.date().isoformat()
+    if isinstance(value, np.ndarray):
+        # Вложенные списки из Arrow/Parquet — в том же виде, что и list
+        return str(value.tolist())
+    return str(value)
+
+
+def _cell(value):
+    if value is None or (not isinstance(value, (list, dict, np.ndarray)) and pd.isna(value)):
+        return ""
+    text = _fmt(value).replace("\n", " ")
+    return text if len(text) <= MAX_CELL_CHARS else text[:MAX_CELL_CHARS - 1] + "…"
+
+
+def _csv_line(values):
+    return ",".join(_cell(value) for value in values)
+
+
+def average_row_chars(data, columns=None, probe_rows=20):
+    """Средняя длина строки таблицы в CSV-виде промпта (по равномерно взятым пробным строкам)."""
+    rows = _num_rows(data)
+    if not rows:
+        return 1.0
+    probe = _take(data, _spread(np.arange(rows), min(rows, probe_rows)))
+    if columns is not None:
+        probe = probe[columns]
+    return float(np.mean([len(_csv_line(values)) + 1 for values in probe.itertuples(index=False, name=None)]))
+
+
+def _strata_column(data, profile):
+    """Категориальная колонка с небольшим числом значений — по ней стратифицируется выборка."""
+    stats = (profile or {}).get("columns", {})
+    for name in _columns(data):
+        info = stats.get(str(name))
+        if info is not None:
+            if "mean" not in info and 2 <= (info.get("distinct") or 0) <= STRATIFY_MAX_GROUPS:
+                return name
+            continue
+        series = _column(data, name)
+        if not is_numeric_column(series) and 2 <= distinct_count(series) <= STRATIFY_MAX_GROUPS:
+            return name
+    return None
+
+
+def _spread(positions, count):
+    """``count`` равномерно расположенных элементов из ``positions``."""
+    if count >= len(positions):
+        return positions
+    return positions[np.linspace(0, len(positions) - 1, count).round().astype(np.int64)]
+
+
+def sample_positions(data, size, profile=None):
+    """Позиции строк для промпта: строки-выбросы и стратифицированная выборка.
+
+    Для каждой числовой колонки берутся строки с её минимумом и максимумом;
+    остальные строки распределяются по значениям категориальной колонки
+    пропорционально размеру групп (не меньше одной на группу), внутри
+    группы — равномерно. Без подходящей колонки строки берутся равномерно по
+    всей таблице. Выборка детерминирована: одинаковые данные дают одинаковый
+    промпт и попадание в кэш ответов.
+
+    Returns:
+        (отсортированные позиции, колонка стратификации или None)
+    """
+    total = _num_rows(data)
+    if total <= size:
+        return np.arange(total), None
+    outliers = []
+    for name in _columns(data):
+        series = _column(data, name)
+        if not is_numeric_column(series):
+            continue
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        if np.isnan(values).all():
+            continue
+        outliers.extend((int(np.nanargmin(values)), int(np.nanargmax(values))))
+    outliers = list(dict.fromkeys(outliers))[:size // 2]
+
+    remaining = size - len(outliers)
+    strata = _strata_column(data, profile)
+    if strata is not None:
+        values = _column(data, strata)
+        try:
+            codes, _ = pd.factorize(values, use_na_sentinel=False)
+        except TypeError:
+            codes, _ = pd.factorize(stringify_nested(values), use_na_sentinel=False)
+        groups = np.bincount(codes)
+        quotas = np.maximum(1, np.floor(groups / total * remaining)).astype(np.int64)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.concatenate([[0], np.cumsum(groups)])
+        picked = [_spread(order[bounds[g]:bounds[g + 1]], quotas[g]) for g in range(len(groups))]
+        sampled = np.concatenate(picked) if picked else np.array([], dtype=np.int64)
+    else:
+        sampled = _spread(np.arange(total), remaining)
+    positions = np.unique(np.concatenate([np.asarray(outliers, dtype=np.int64), sampled]))
+    if len(positions) > size:
+        # Выбросы важнее: урезаем только стратифицированную часть
+        keep = np.isin(positions, outliers)
+        extra = _spread(positions[~keep], size - int(keep.sum()))
+        positions = np.sort(np.concatenate([positions[keep], extra]))
+    return positions, strata
+
+
+def _column_line(name, dtype, info):
+    parts = [f"- {name} ({dtype})"]
+    if info:
+        parts.append(f"непустых {info.get('count')}, пропусков {info.get('nulls')}, уникальных {info.get('distinct')}")
+        if "min" in info and info.get("min") is not None:
+            parts.append(f"min {_fmt(info['min'])}, max {_fmt(info['max'])}")
+        if info.get("mean") is not None:
+            parts.append(f"среднее {_fmt(info['mean'])}, σ {_fmt(info.get('std'))}")
+        # У потоковых таблиц без точного прохода квантили — по скетчу KLL
+        quantiles = info.get("quantiles") or info.get("quantiles_approx") or {}
+        if quantiles:
+            parts.append("/".join(quantile_key(q) for q in QUANTILES) + " "
+                         + "/".join(_fmt(quantiles.get(quantile_key(q))) for q in QUANTILES))
+    return "; ".join(parts)
+
+
+def _top_values_line(data, name, info, rows):
+    if info and ("mean" in info or (info.get("distinct") or 0) >= (info.get("count") or 0)):
+        # Числовые колонки описаны статистикой, у идентификаторов частых значений нет
+        return None
+    series = _column(data, name)
+    if is_numeric_column(series) or pd.api.types.is_datetime64_any_dtype(series):
+        return None
+    try:
+        counts = series.value_counts(dropna=True)
+    except TypeError:
+        counts = stringify_nested(series).value_counts(dropna=True)
+    counts = counts.head(PROMPT_TOP_VALUES)
+    if counts.empty or counts.iloc[0] <= 1:
+        return None
+    values = ", ".join(f"{_cell(value)} ({count / rows:.0%})" for value, count in counts.items())
+    return f"- {name}: {values}"
+
+
+def _dtypes(data):
+    if _is_arrow(data):
+        return {field.name: str(field.type) for field in data.schema}
+    return {name: str(dtype) for name, dtype in data.dtypes.items()}
+
+
+def build_table_prompt(data, profile=None, budget_tokens=None, max_rows=None, head=False):
+    """Компактное описание таблицы для нейросети в пределах бюджета токенов.
+
+    Вместо ``to_string()`` всей таблицы промпт состоит из схемы со
+    статистикой колонок (``profile`` — профиль из ``statistics``; без него
+    выводятся только типы), частых значений категориальных колонок и
+    выборки строк в CSV (``sample_positions``; с ``head=True`` — первые
+    строки). Разделы заполняются по приоритету, пока хватает бюджета.
+
+    Args:
+        data: DataFrame или Arrow Table
+        max_rows: максимум строк в выборке (по умолчанию — сколько поместится)
+    """
+    budget = (budget_tokens or PROMPT_TOKEN_BUDGET) * CHARS_PER_TOKEN
+    rows = _num_rows(data)
+    columns = _columns(data)
+    stats = (profile or {}).get("columns", {})
+    dtypes = _dtypes(data)
+    # Профиль описывает весь набор, даже если передан только его срез (первые строки)
+    total = (profile or {}).get("rows") or rows
+    lines = [f"Таблица: {total} строк × {len(columns)} колонок."]
+    used = len(lines[0]) + 1
+    notes = []
+
+    def add(line, limit):
+        nonlocal used
+        if used + len(line) + 1 > limit:
+            return False
+        lines.append(line)
+        used += len(line) + 1
+        return True
+
+    add("Колонки:", budget)
+    shown = 0
+    for name in columns:
+        if not add(_column_line(name, dtypes.get(name), stats.get(str(name))), budget * _COLUMNS_SHARE):
+            break
+        shown += 1
+    if shown < len(columns):
+        notes.append(f"показаны {shown} из {len(columns)} колонок")
+
+    top_lines = []
+    for name in columns[:shown]:
+        line = _top_values_line(data, name, stats.get(str(name)), rows)
+        if line:
+            top_lines.append(line)
+    if top_lines and add("Частые значения:", budget * _TOP_VALUES_SHARE):
+        for line in top_lines:
+            if not add(line, budget * _TOP_VALUES_SHARE):
+                break
+
+    shown_columns = columns[:shown]
+    if rows and shown_columns:
+        header = ",".join(str(name) for name in shown_columns)
+        # Размер выборки — по средней длине строки CSV на пробных строках,
+        # чтобы в бюджет вошла вся выборка, а не её начало
+        row_chars = average_row_chars(data, shown_columns)
+        room = budget - used - len(header) - 160  # заголовок раздела и примечание
+        size = min(max_rows or rows, max(1, int(room // row_chars)))
+        if head:
+            positions, strata = np.arange(min(size, rows)), None
+        else:
+            positions, strata = sample_positions(data, size, profile)
+        if head or len(positions) == rows:
+            title = f"Строки (первые из {total}):"
+        else:
+            method = f"стратификация по «{strata}»" if strata is not None else "равномерно по таблице"
+            title = f"Строки (выборка из {rows}: выбросы числовых колонок, {method}):"
+        add(title, budget)
+        add(header, budget)
+        added = 0
+        for values in _take(data, positions)[shown_columns].itertuples(index=False, name=None):
+            if not add(_csv_line(values), budget):
+                break
+            added += 1
+        if added < total:
+            notes.append(f"в промпт вошло {added} из {total} строк")
+    if notes:
+        lines.append(f"({'; '.join(notes)})")
+    return "\n".join(lines)
+
+
+def build_text_prompt(text, budget_tokens=None):
+    """Текст в пределах бюджета: начало и конец документа с пометкой о сокращении."""
+    budget = (budget_tokens or PROMPT_TOKEN_BUDGET) * CHARS_PER_TOKEN
+    if len(text) <= budget:
+        return text
+    head = int(budget * 2 / 3)
+    tail = budget - head
+    return (f"{text[:head]}\n…\n{text[-tail:]}\n"
+            f"(текст сокращён: показано {budget} из {len(text)} символов)")
+
+
+def build_prompt(data, profile=None, budget_tokens=None):
+    """Данные для нейросети: таблица (DataFrame/Arrow) — ``build_table_prompt``, иначе текст."""
+    if isinstance(data, pd.DataFrame) or _is_arrow(data):
+        return build_table_prompt(data, profile=profile, budget_tokens=budget_tokens)
+    return build_text_prompt(str(data), budget_tokens=budget_tokens)
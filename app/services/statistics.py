@@ -0,0 +1,295 @@
+import math
+import numpy as np
+import pandas as pd
+from .sketches import HyperLogLog, KLLSketch
+
+# Версия формата профиля: сохранённая статистика старого формата пересчитывается
+STATS_VERSION = 3
+
+# Квантили профиля колонки (ключи вида "p25")
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+def quantile_key(q):
+    return f"p{int(round(q * 100))}"
+
+
+def is_numeric_column(series):
+    """Числовая колонка для статистики (bool считается категориальной)."""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def stringify_nested(series):
+    """Колонка с вложенными значениями (dict, list, ndarray) в строковом виде, пропуски сохраняются.
+
+    Такие значения (вложенные записи JSON, Parquet) не хешируются, поэтому
+    уникальные значения и группы считаются по их строковому виду.
+    """
+    return series.where(series.isna(), series.astype(str))
+
+
+def distinct_count(series):
+    """Число уникальных значений колонки (вложенные значения — по строковому виду)."""
+    try:
+        return int(series.nunique())
+    except TypeError:
+        return int(stringify_nested(series).nunique())
+
+
+def _distinct_counts(df):
+    try:
+        return df.nunique()
+    except TypeError:
+        return pd.Series({col: distinct_count(df[col]) for col in df.columns}, dtype=object)
+
+
+def to_json_number(value):
+    """Приводит numpy/pandas число к int/float для JSON (NaN -> None)."""
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    try:
+        fv = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if math.isinf(fv):
+        return None
+    if fv.is_integer() and abs(fv) < 2 ** 63:
+        return int(fv)
+    return fv
+
+
+class ColumnAccumulator:
+    """Потоковая статистика одной колонки: count, nulls, sum, min, max, mean, std, distinct.
+
+    Среднее и дисперсия накапливаются через ``mean``/``m2`` (формула Чана),
+    поэтому частичные результаты чанков объединяются через ``merge`` без
+    потери точности.
+
+    Точное множество значений хранится только до ``distinct_limit``
+    элементов, чтобы память оставалась ограниченной; после этого
+    ``distinct_capped`` становится True, а число уникальных — нижней оценкой
+    (``distinct_limit=0`` отключает точный подсчёт). Параллельно всегда
+    ведутся скетчи фиксированного размера: HyperLogLog для числа
+    уникальных и KLL для квантилей числовых колонок.
+    """
+
+    def __init__(self, numeric, distinct_limit=100_000):
+        self.numeric = numeric
+        self.distinct_limit = distinct_limit
+        self.count = 0
+        self.nulls = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.quantiles = None
+        self.distinct = set()
+        self.distinct_capped = distinct_limit <= 0
+        self.hll = HyperLogLog()
+        self.kll = KLLSketch() if numeric else None
+
+    def update(self, series):
+        valid = series.dropna()
+        self.count += len(valid)
+        self.nulls += len(series) - len(valid)
+        if len(valid) == 0:
+            return
+        self.hll.update(valid.to_numpy())
+        if self.numeric:
+            values = valid.to_numpy()
+            self.kll.update(values.astype(np.float64))
+            if np.issubdtype(values.dtype, np.integer):
+                # Суммируем в Python int, чтобы не переполнить узкие типы
+                self.sum += int(values.astype(np.int64).sum(dtype=np.int64))
+            else:
+                self.sum += float(values.astype(np.float64).sum())
+            chunk_min, chunk_max = values.min(), values.max()
+            self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+            self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+            floats = values.astype(np.float64)
+            chunk_mean = float(floats.mean())
+            self._combine(len(values), chunk_mean, float(((floats - chunk_mean) ** 2).sum()))
+        if not self.distinct_capped:
+            self.distinct.update(pd.unique(valid.to_numpy()).tolist())
+            if len(self.distinct) > self.distinct_limit:
+                self.distinct_capped = True
+
+    def _combine(self, count, mean, m2):
+        # self.count уже включает count новых значений
+        previous = self.count - count
+        if previous == 0:
+            self.mean, self.m2 = mean, m2
+            return
+        delta = mean - self.mean
+        self.mean += delta * count / self.count
+        self.m2 += m2 + delta * delta * previous * count / self.count
+
+    def merge(self, other):
+        self.count += other.count
+        self.nulls += other.nulls
+        self.sum += other.sum
+        if self.numeric and other.count:
+            self._combine(other.count, other.mean, other.m2)
+        self.hll.merge(other.hll)
+        if self.kll is not None and other.kll is not None:
+            self.kll.merge(other.kll)
+        for attr, pick in (("min", min), ("max", max)):
+            mine, theirs = getattr(self, attr), getattr(other, attr)
+            setattr(self, attr, theirs if mine is None else (mine if theirs is None else pick(mine, theirs)))
+        if self.distinct_capped or other.distinct_capped:
+            self.distinct_capped = True
+        else:
+            self.distinct |= other.distinct
+            self.distinct_capped = len(self.distinct) > self.distinct_limit
+        return self
+
+    def result(self):
+        info = {
+            "count": self.count,
+            "nulls": self.nulls,
+            "distinct": len(self.distinct),
+            "distinct_exact": not self.distinct_capped,
+            "distinct_approx": self.hll.estimate(),
+        }
+        if self.numeric:
+            info.update({
+                "sum": to_json_number(self.sum),
+                "min": to_json_number(self.min),
+                "max": to_json_number(self.max),
+                "mean": to_json_number(self.mean) if self.count else None,
+                "std": to_json_number(math.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else None,
+                "quantiles": self.quantiles,
+                "quantiles_approx": {quantile_key(q): to_json_number(v)
+                                     for q, v in zip(QUANTILES, self.kll.quantiles(QUANTILES))},
+            })
+        return info
+
+
+class StatsAccumulator:
+    """Статистика таблицы, собираемая по частям (чанкам) за один проход."""
+
+    def __init__(self, distinct_limit=100_000):
+        self.distinct_limit = distinct_limit
+        self.rows = 0
+        self.columns = {}
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for col in chunk.columns:
+            acc = self.columns.get(col)
+            if acc is None:
+                numeric = is_numeric_column(chunk[col])
+                acc = self.columns[col] = ColumnAccumulator(numeric, self.distinct_limit)
+            acc.update(chunk[col])
+
+    def merge(self, other):
+        """Объединяет статистику другой части таблицы (чанка или партиции)."""
+        self.rows += other.rows
+        for col, acc in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(acc)
+            else:
+                self.columns[col] = acc
+        return self
+
+    def result(self):
+        return _profile(self.rows, {str(col): acc.result() for col, acc in self.columns.items()})
+
+
+def _profile(rows, columns):
+    return {
+        "version": STATS_VERSION,
+        "rows": rows,
+        "columns": columns,
+        "column_sums": {col: info["sum"] for col, info in columns.items() if "sum" in info},
+        "unique_counts": {col: _distinct(info, exact=True)[0] for col, info in columns.items()},
+    }
+
+
+def _distinct(info, exact):
+    # Без точного значения (или при exact=False) берём оценку HyperLogLog, если она есть
+    if "distinct_approx" in info and not (exact and info["distinct_exact"]):
+        return info["distinct_approx"], False
+    return info["distinct"], info.get("distinct_exact", True)
+
+
+def _quantiles(info, exact):
+    # Квантили по KLL, если их попросили или точных нет, иначе точные
+    if info.get("quantiles_approx") and not (exact and info.get("quantiles")):
+        return info["quantiles_approx"], False
+    return info.get("quantiles"), True
+
+
+def statistics_view(profile, exact=True):
+    """Число уникальных и квантили из профиля: точные или по скетчам (``exact=False``).
+
+    Если нужного варианта в профиле нет (точные значения не считались при
+    потоковой загрузке или скетчи не строились для таблицы в памяти),
+    возвращается имеющийся. ``exact`` в ответе описывает отданные значения:
+    ``True``, только если ни одно из них не взято из скетча.
+    """
+    served_exact = True
+    unique_counts, quantiles = {}, {}
+    for col, info in profile["columns"].items():
+        unique_counts[col], distinct_exact = _distinct(info, exact)
+        served_exact = served_exact and distinct_exact
+        if "mean" not in info:
+            continue
+        quantiles[col], quantiles_exact = _quantiles(info, exact)
+        served_exact = served_exact and quantiles_exact
+    return {
+        "exact": served_exact,
+        "unique_counts": unique_counts,
+        "quantiles": quantiles,
+    }
+
+
+def profile_frame(df, quantiles=QUANTILES):
+    """Полный профиль DataFrame в формате ``StatsAccumulator.result``.
+
+    Каждая метрика считается одной векторной операцией по всем колонкам сразу.
+    Таблица уже в памяти, поэтому всё считается точно и скетчи не строятся.
+    """
+    numeric_cols = [col for col in df.columns if is_numeric_column(df[col])]
+    counts = df.count()
+    distinct = _distinct_counts(df)
+    numeric = df[numeric_cols]
+    sums, mins, maxs = numeric.sum(), numeric.min(), numeric.max()
+    means, stds = numeric.mean(), numeric.std()
+    quantile_values = numeric.quantile(list(quantiles)) if numeric_cols else None
+
+    columns = {}
+    for col in df.columns:
+        info = {
+            "count": int(counts[col]),
+            "nulls": int(len(df) - counts[col]),
+            "distinct": int(distinct[col]),
+            "distinct_exact": True,
+        }
+        if col in numeric_cols:
+            info.update({
+                "sum": to_json_number(sums[col]),
+                "min": to_json_number(mins[col]),
+                "max": to_json_number(maxs[col]),
+                "mean": to_json_number(means[col]),
+                "std": to_json_number(stds[col]),
+                "quantiles": {quantile_key(q): to_json_number(quantile_values.at[q, col]) for q in quantiles},
+            })
+        columns[str(col)] = info
+    return _profile(len(df), columns)
+
+
+def table_quantiles(table, columns, quantiles=QUANTILES):
+    """Точные квантили колонок Arrow Table (в т.ч. memory-mapped) без перевода в pandas."""
+    import pyarrow.compute as pc
+    result = {}
+    for col in columns:
+        values = pc.quantile(table.column(col), q=list(quantiles)).to_pylist()
+        result[col] = {quantile_key(q): to_json_number(v) for q, v in zip(quantiles, values)}
+    return result
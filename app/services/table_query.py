@@ -0,0 +1,88 @@
+import re
+import numpy as np
+import pandas as pd
+
+# col>5, price<=10.5, city=Moscow, city!=Kazan, name~ivan (подстрока без учёта регистра)
+_FILTER_RE = re.compile(r"^\s*(?P<column>[^<>=!~]+?)\s*(?P<op>>=|<=|!=|==|=|>|<|~)\s*(?P<value>.*?)\s*$")
+
+_COMPARISONS = {
+    "=": np.equal, "==": np.equal, "!=": np.not_equal,
+    ">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal,
+}
+
+
+def parse_filters(expressions):
+    """Список выражений ``filter=`` -> [(колонка, оператор, значение)] (условия объединяются через И)."""
+    conditions = []
+    for expression in expressions:
+        match = _FILTER_RE.match(expression or "")
+        if not match:
+            raise ValueError(f"Invalid filter expression: {expression!r}")
+        value = match.group("value")
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+            value = value[1:-1]
+        conditions.append((match.group("column"), match.group("op"), value))
+    return conditions
+
+
+def parse_sort(value):
+    """``sort=col`` (по возрастанию) или ``sort=-col`` (по убыванию) -> (колонка, descending)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.startswith("-"):
+        return value[1:], True
+    return value.lstrip("+"), False
+
+
+def _coerce_value(series, op, value):
+    if op == "~":
+        return value
+    if pd.api.types.is_bool_dtype(series):
+        lowered = value.lower()
+        if lowered not in ("true", "false", "1", "0"):
+            raise ValueError(f"Expected true/false for column {series.name!r}, got {value!r}")
+        return lowered in ("true", "1")
+    if pd.api.types.is_numeric_dtype(series):
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError(f"Expected a number for column {series.name!r}, got {value!r}")
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.Timestamp(value)
+    return value
+
+
+def condition_mask(series, op, value):
+    """Булева маска условия по колонке (пропуски не проходят ни одно условие)."""
+    value = _coerce_value(series, op, value)
+    if op == "~":
+        return series.astype("string").str.contains(value, case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+    notna = series.notna().to_numpy()
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        values, value = series.to_numpy(), value.to_datetime64()
+    else:
+        values = series.to_numpy(dtype=object)
+    mask = np.zeros(len(series), dtype=bool)
+    try:
+        mask[notna] = _COMPARISONS[op](values[notna], value)
+    except TypeError:
+        raise ValueError(f"Cannot compare column {series.name!r} with {value!r}")
+    return mask
+
+
+def sort_order(series, descending=False):
+    """Позиции строк в порядке сортировки колонки (стабильно, пропуски в конце)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Категории Arrow идут в порядке появления — сортируем по самим значениям
+        series = series.astype(object)
+    series = series.reset_index(drop=True)
+    try:
+        ordered = series.sort_values(ascending=not descending, kind="stable", na_position="last")
+    except TypeError:
+        # Смешанные типы в колонке сравниваются как строки
+        as_text = series.where(series.isna(), series.astype(str))
+        ordered = as_text.sort_values(ascending=not descending, kind="stable", na_position="last")
+    return ordered.index.to_numpy()
@@ -1,11 +1,12 @@
 import os
 from .logger import logger
+from ..processors.parser_factory import sniff_mime_type, supported_extensions, supported_mime_types
 
 
 def validate_file(file):
     logger.info(f"Validating file: {file.filename}")
     
-    allowed_extensions = {'xlsx', 'xls', 'csv', 'pdf'}
+    allowed_extensions = supported_extensions()
     filename = file.filename
     ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
     
@@ -18,11 +19,21 @@ def validate_file(file):
         raise ValueError("Недопустимое имя файла")
     
     if ext not in allowed_extensions:
-        logger.error(f"  ❌ Extension '{ext}' not allowed")
-        raise ValueError("Недопустимый формат файла")
+        # Неизвестное расширение: формат определяется по первым байтам файла
+        head = file.stream.read(8192)
+        file.stream.seek(0)
+        mime_type = sniff_mime_type(head)
+        if mime_type not in supported_mime_types():
+            logger.error(f"  ❌ Extension '{ext}' not allowed")
+            raise ValueError("Недопустимый формат файла")
+        logger.debug(f"  Content detected as {mime_type}")
 
-    file_size = file.content_length
-    max_size = 10 * 1024 * 1024  # 10MB
+    file_size = file.content_length or 0
+    # CSV загружаются потоково, поэтому для них допустим гораздо больший размер
+    if ext == 'csv':
+        max_size = int(float(os.getenv('MAX_CSV_UPLOAD_MB', '10240')) * 1024 * 1024)
+    else:
+        max_size = int(float(os.getenv('MAX_UPLOAD_MB', '10')) * 1024 * 1024)
     logger.debug(f"  File size: {file_size} bytes (max: {max_size} bytes)")
     
     if file_size > max_size:
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from .logger import logger
+
+
+class ResponseCache:
+    """Кэш ответов нейросетей с ключом по хэшу запроса.
+
+    Два уровня: LRU в памяти и (опционально) SQLite на диске. Записи живут
+    ``ttl`` секунд; при превышении ``max_entries``/``max_disk_entries``
+    вытесняются наименее недавно использованные.
+    """
+
+    def __init__(self, max_entries=256, ttl=3600, db_path=None, max_disk_entries=5000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "sets": 0, "evictions": 0}
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                    "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+
+    @staticmethod
+    def make_key(provider, model, prompt, params=None):
+        """SHA-256 от провайдера, модели, промпта и параметров генерации."""
+        raw = json.dumps(
+            {"provider": provider, "model": model, "prompt": prompt, "params": params or {}},
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+        # К SQLite обращаемся без блокировки кэша: у базы своя блокировка,
+        # и медленный диск не задерживает попадания в память из других потоков
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute(
+                        "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row and now - row[1] < self.ttl:
+                        conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                        value = json.loads(row[0])
+                        with self._lock:
+                            self._remember(key, value, row[1])
+                            self._stats["hits"] += 1
+                            self._stats["disk_hits"] += 1
+                        return value
+                    if row:
+                        conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache disk read failed: {e}")
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._stats["sets"] += 1
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                        (key, json.dumps(value, ensure_ascii=False), now, now),
+                    )
+                    conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+                    conn.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_entries,),
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Response cache disk write failed: {e}")
+
+    def _remember(self, key, value, created_at):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self.db_path:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = None
+            if self.db_path:
+                try:
+                    with self._connect() as conn:
+                        stats["disk_entries"] = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["ttl"] = self.ttl
+        stats["max_entries"] = self.max_entries
+        return stats
+
+
+def create_response_cache():
+    """Создаёт кэш ответов по настройкам окружения (``None``, если отключён)."""
+    if str(os.getenv('LLM_CACHE_ENABLED', 'true')).lower() not in ('1', 'true', 'yes'):
+        logger.info("LLM response cache disabled by configuration")
+        return None
+    cache = ResponseCache(
+        max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', '256')),
+        ttl=float(os.getenv('LLM_CACHE_TTL', '3600')),
+        db_path=os.getenv('LLM_CACHE_DB') or None,
+        max_disk_entries=int(os.getenv('LLM_CACHE_DISK_MAX_ENTRIES', '5000')),
+    )
+    logger.info(f"LLM response cache: max_entries={cache.max_entries}, ttl={cache.ttl}s, disk={cache.db_path}")
+    return cache
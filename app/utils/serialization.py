@@ -0,0 +1,110 @@
+import json
+import math
+import numpy as np
+import pandas as pd
+
+# orjson необязателен: при наличии JSON кодируется в несколько раз быстрее
+try:
+    import orjson
+    _HAS_ORJSON = True
+except Exception:
+    _HAS_ORJSON = False
+
+
+def _offset(seconds):
+    sign = '-' if seconds < 0 else '+'
+    hours, rest = divmod(abs(int(seconds)), 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{sign}{hours:02d}:{minutes:02d}" + (f":{secs:02d}" if secs else "")
+
+
+def datetimes_to_iso(values):
+    """Массив datetime64 -> строки как у ``Timestamp.isoformat()``.
+
+    Дробная часть секунд выводится только у значений, где она есть:
+    микросекунды (6 знаков) или наносекунды (9 знаков).
+    """
+    unit, _ = np.datetime_data(values.dtype)
+    strings = np.datetime_as_string(values, unit='s').astype(object)
+    per_second = {'ms': 10 ** 3, 'us': 10 ** 6, 'ns': 10 ** 9}.get(unit)
+    if per_second:
+        fraction = values.view('int64') % per_second
+        finer = fraction % max(per_second // 10 ** 6, 1) != 0
+        for precision, mask in (('us', (fraction != 0) & ~finer), ('ns', finer)):
+            if mask.any():
+                strings[mask] = np.datetime_as_string(values[mask], unit=precision)
+    return strings
+
+
+def column_to_list(series):
+    """Колонка -> список нативных Python-значений для JSON за один векторный проход.
+
+    NaN/NaT/NA и ±inf -> None, numpy-скаляры -> int/float/bool,
+    даты -> строки ISO 8601.
+    """
+    dtype = series.dtype
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        mask = series.isna().to_numpy()
+        if isinstance(dtype, np.dtype):
+            # datetime_as_string форматирует весь массив на стороне numpy
+            values = datetimes_to_iso(series.to_numpy())
+        else:
+            # С часовым поясом: местное время и смещение "+03:00" (у каждого значения своё — переход на летнее время)
+            local = series.dt.tz_localize(None).to_numpy()
+            utc = series.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy()
+            delta = local - utc
+            delta[mask] = np.timedelta64(0, 's')
+            seconds = delta // np.timedelta64(1, 's')
+            offsets, inverse = np.unique(seconds, return_inverse=True)
+            suffixes = np.array([_offset(value) for value in offsets], dtype=object)[inverse]
+            values = datetimes_to_iso(local) + suffixes
+        values[mask] = None
+        return values.tolist()
+    if isinstance(dtype, np.dtype) and dtype.kind == 'f':
+        arr = series.to_numpy()
+        values = arr.astype(object)
+        values[~np.isfinite(arr)] = None
+        return values.tolist()
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iub':
+        # Нет пропусков — tolist() сразу даёт нативные int/bool
+        return series.to_numpy().tolist()
+    if isinstance(dtype, np.dtype):
+        values = series.to_numpy(dtype=object)
+    else:
+        # Extension-типы (Int16, category, string, boolean) сами подставляют None вместо NA
+        values = series.to_numpy(dtype=object, na_value=None)
+    mask = pd.isna(values)
+    if mask.any():
+        values = values.copy()
+        values[mask] = None
+    return values.tolist()
+
+
+def frame_to_columns(df):
+    """DataFrame -> {колонка: список значений} (колоночный формат ответа)."""
+    return {str(col): column_to_list(df[col]) for col in df.columns}
+
+
+def frame_to_records(df):
+    """DataFrame -> список словарей-строк, собранный из уже конвертированных колонок."""
+    names = [str(col) for col in df.columns]
+    columns = [column_to_list(df[col]) for col in df.columns]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def _default(value):
+    if isinstance(value, np.generic):
+        item = value.item()
+        if isinstance(item, float) and not math.isfinite(item):
+            return None
+        return item
+    if isinstance(value, (pd.Timestamp,)) or hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps(payload):
+    """Быстрая сериализация ответа в JSON (bytes): orjson, иначе стандартный json."""
+    if _HAS_ORJSON:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
@@ -0,0 +1,95 @@
+"""Бенчмарк: чтение листа Excel — pd.read_excel против parse_excel (openpyxl read_only / calamine).
+
+Книга с листом из 10 колонок (int, float, строки, даты) генерируется один
+раз на размер во временном каталоге; для каждого способа измеряется время
+до готового DataFrame, а с ``--memory`` — ещё и пик памяти Python (tracemalloc).
+
+    python benchmarks/bench_excel.py [--rows 50000 200000 500000] [--repeat 1] [--memory] [--usecols A,C]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from app.processors import excel_parser  # noqa: E402
+
+
+def _make_workbook(path, rows):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "amount": rng.random(rows) * 1000,
+        "qty": rng.integers(0, 100, rows),
+        "city": rng.choice(["Moscow", "Kazan", "Samara", "Tver"], rows),
+        "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+        "price": rng.random(rows) * 50,
+        "code": rng.choice(["A1", "B2", "C3"], rows),
+        "score": rng.normal(size=rows),
+        "flag": rng.integers(0, 2, rows),
+        "note": rng.choice(["ok", "late", None], rows),
+    })
+    # write_only: генерация 500k строк обычным режимом openpyxl заняла бы минуты
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Data")
+    sheet.append(list(df.columns))
+    for row in df.itertuples(index=False):
+        sheet.append([None if isinstance(v, float) and np.isnan(v) else v for v in row])
+    workbook.save(path)
+
+
+def _measure(fn, repeat, memory):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    if not memory:
+        return best, None
+    # Отдельный прогон: под tracemalloc чтение в разы медленнее
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50000, 200000, 500000])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--memory", action="store_true", help="также измерить пик памяти (tracemalloc)")
+    parser.add_argument("--usecols", default=None, help="например A,C — только для parse_excel")
+    args = parser.parse_args()
+
+    print(f"calamine: {'yes' if excel_parser._HAS_CALAMINE else 'no (pip install python-calamine)'}")
+    print(f"{'rows':>8}  {'method':<22}{'time, s':>9}{'peak, MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"bench_{rows}.xlsx")
+            _make_workbook(path, rows)
+            results = [("pd.read_excel", _measure(lambda: pd.read_excel(path), args.repeat, args.memory))]
+            has_calamine = excel_parser._HAS_CALAMINE
+            try:
+                excel_parser._HAS_CALAMINE = False
+                results.append(("openpyxl read_only", _measure(
+                    lambda: excel_parser.parse_excel(path, usecols=args.usecols), args.repeat, args.memory)))
+            finally:
+                excel_parser._HAS_CALAMINE = has_calamine
+            if has_calamine:
+                results.append(("calamine", _measure(
+                    lambda: excel_parser.parse_excel(path, usecols=args.usecols), args.repeat, args.memory)))
+            for name, (seconds, peak) in results:
+                peak = "-" if peak is None else f"{peak:.1f}"
+                print(f"{rows:>8}  {name:<22}{seconds:>9.2f}{peak:>10}")
+
+
+if __name__ == "__main__":
+    main()
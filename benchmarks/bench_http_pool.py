@@ -0,0 +1,93 @@
+"""Бенчмарк: bare requests.post против общего пула keep-alive соединений.
+
+Поднимает локальный stub-сервер (HTTP/1.1), который считает принятые TCP
+соединения, и отправляет одинаковое число запросов двумя способами:
+отдельным ``requests.post`` и через ``LLMRunner`` (``ProxyProvider`` на
+общем ``httpx.AsyncClient``), как это делает приложение.
+
+    python benchmarks/bench_http_pool.py [--requests 200] [--threads 8]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+
+class _Stats:
+    connections = 0
+    lock = threading.Lock()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with _Stats.lock:
+            _Stats.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        body = json.dumps({"result": "ok"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _run(label, send, total, threads):
+    _Stats.connections = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda _: send(), range(total)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12} requests={total:<5} connections={_Stats.connections:<5} "
+          f"total={elapsed:.3f}s per_request={elapsed / total * 1000:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/analyze"
+
+    os.environ["PROXY_BASE_URL"] = url
+    os.environ["PROXY_API_KEY"] = "bench"
+    os.environ["PROXY_ENABLED"] = "true"
+    os.environ["PROXY_POOL_SIZE"] = str(args.threads)
+
+    import logging
+    from app.api.llm_provider import ProxyProvider
+    from app.api.proxy_api import ProxyAPI
+    from app.services.llm_runner import LLMRunner
+    from app.utils.logger import logger
+    logger.setLevel(logging.WARNING)
+
+    runner = LLMRunner([ProxyProvider(ProxyAPI(), max_concurrency=args.threads)])
+
+    _run("bare", lambda: requests.post(url, json={"query": "x"}, timeout=5), args.requests, args.threads)
+    _run("pooled", lambda: runner.ask("proxy_api", "x"), args.requests, args.threads)
+
+    runner.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Бенчмарк: время ``import app.main`` в чистом процессе и какие тяжёлые библиотеки оно подтягивает.
+
+Каждый замер — отдельный интерпретатор (модули не кешируются между
+замерами); печатаются медиана и минимум, а также загружены ли библиотеки
+парсеров к концу импорта.
+
+    python benchmarks/bench_import.py [--repeat 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("pandas", "pyarrow", "pdfplumber", "pdfminer", "openpyxl", "gigachat")
+
+_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def _run_once():
+    env = dict(os.environ, PROXY_ENABLED="false", AUTO_ANALYZE="false", JOB_WORKERS="0")
+    output = subprocess.run([sys.executable, "-c", _PROBE], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    # Логгер приложения пишет в stdout — результат в последней строке
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [_run_once() for _ in range(args.repeat)]
+    times = [run["elapsed"] * 1000 for run in runs]
+    print(f"import app.main: median {statistics.median(times):.0f} ms, min {min(times):.0f} ms ({args.repeat} runs)")
+    print(f"loaded at import: {', '.join(runs[-1]['loaded']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
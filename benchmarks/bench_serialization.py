@@ -0,0 +1,99 @@
+"""Бенчмарк: сериализация страницы /api/data — построчный sanitize_row против колоночной.
+
+Таблица из 50 колонок (int, float с NaN, строки с пропусками, даты);
+для каждого размера страницы измеряется полное время до готового JSON.
+
+    python benchmarks/bench_serialization.py [--rows 100 1000 10000] [--columns 50] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from app.utils.serialization import _HAS_ORJSON, dumps, frame_to_columns, frame_to_records  # noqa: E402
+
+
+def _make_frame(rows, columns):
+    rng = np.random.default_rng(0)
+    data = {}
+    for i in range(columns):
+        kind = i % 4
+        if kind == 0:
+            data[f"int_{i}"] = rng.integers(0, 1000, rows)
+        elif kind == 1:
+            values = rng.random(rows)
+            values[rng.random(rows) < 0.1] = np.nan
+            data[f"float_{i}"] = values
+        elif kind == 2:
+            values = rng.choice(["alpha", "beta", "gamma", None], rows)
+            data[f"str_{i}"] = values
+        else:
+            data[f"date_{i}"] = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D")
+    return pd.DataFrame(data)
+
+
+def _legacy(df):
+    """Прежний путь get_data: to_dict(records) + sanitize_row по каждой ячейке."""
+    def sanitize_row(row):
+        sanitized = {}
+        for k, v in row.items():
+            if pd.isna(v):
+                sanitized[k] = None
+            elif isinstance(v, (np.integer,)):
+                sanitized[k] = int(v)
+            elif isinstance(v, (np.floating,)):
+                sanitized[k] = float(v)
+            elif isinstance(v, (np.bool_,)):
+                sanitized[k] = bool(v)
+            elif hasattr(v, 'item') and isinstance(v, np.generic):
+                try:
+                    sanitized[k] = v.item()
+                except Exception:
+                    sanitized[k] = str(v)
+            else:
+                sanitized[k] = v
+        return sanitized
+
+    rows = [sanitize_row(r) for r in df.to_dict(orient='records')]
+    return json.dumps({"rows": rows}, default=str).encode('utf-8')
+
+
+def _best(func, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--columns", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson' if _HAS_ORJSON else 'json'}")
+    variants = [
+        ("legacy", _legacy),
+        ("records", lambda df: dumps({"rows": frame_to_records(df)})),
+        ("columns", lambda df: dumps({"data": frame_to_columns(df)})),
+    ]
+    for rows in args.rows:
+        df = _make_frame(rows, args.columns)
+        baseline = None
+        for label, func in variants:
+            elapsed = _best(func, df, args.repeat)
+            baseline = baseline or elapsed
+            print(f"rows={rows:<6} {label:<8} {elapsed * 1000:9.2f}ms  x{baseline / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
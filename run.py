@@ -4,10 +4,13 @@ import os
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import main
 from app.utils.logger import logger
 
 if __name__ == '__main__':
+    # Приложение импортируется только при запуске: процессы пула разбора PDF
+    # заново импортируют этот модуль (как __mp_main__) и не должны поднимать сервисы
+    from app import main
+
     logger.info("=" * 80)
     logger.info("🚀 Starting Flask Application")
     logger.info("=" * 80)
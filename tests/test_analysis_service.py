@@ -0,0 +1,105 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.api.llm_provider import FallbackProvider, LLMProvider
+from app.services.analysis_service import AnalysisService
+from app.services.llm_runner import LLMRunner
+from app.utils.response_cache import ResponseCache
+
+
+class _SlowProvider(LLMProvider):
+    def __init__(self, delay, answer, timeout=5, max_concurrency=4):
+        super().__init__(timeout, max_concurrency)
+        self.delay = delay
+        self.answer = answer
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    async def complete(self, prompt, session_id=None):
+        self.calls.append(prompt)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        if isinstance(self.answer, Exception):
+            raise self.answer
+        return self.answer
+
+
+def _make_service(giga, proxy, giga_timeout=5, proxy_timeout=5, response_cache=None):
+    # Bypass __init__ so no network calls are made while building providers
+    service = AnalysisService.__new__(AnalysisService)
+    providers = []
+    for name, provider, timeout in (("giga_chat", giga, giga_timeout), ("proxy_api", proxy, proxy_timeout)):
+        if provider is not None:
+            provider.name = name
+            provider.timeout = timeout
+            providers.append(provider)
+    service.response_cache = response_cache
+    service.llm = LLMRunner(providers, response_cache=response_cache)
+    return service
+
+
+def test_providers_run_concurrently():
+    service = _make_service(_SlowProvider(0.3, "giga"), _SlowProvider(0.3, "proxy"))
+
+    started = time.monotonic()
+    results = service._run_providers("prompt")
+    elapsed = time.monotonic() - started
+
+    assert results["giga_result"] == "giga"
+    assert results["proxy_result"] == "proxy"
+    assert results["errors"] == {}
+    assert elapsed < 0.55
+
+
+def test_provider_timeout_is_reported_in_errors():
+    service = _make_service(_SlowProvider(1.0, "giga"), _SlowProvider(0.0, "proxy"), giga_timeout=0.2)
+
+    results = service._run_providers("prompt")
+
+    assert results["giga_result"] is None
+    assert "timeout" in results["errors"]["giga_chat"].lower()
+    assert results["proxy_result"] == "proxy"
+
+
+def test_repeated_prompt_is_served_from_cache():
+    proxy = _SlowProvider(0.0, "proxy")
+    service = _make_service(None, proxy, response_cache=ResponseCache(max_entries=8, ttl=60))
+
+    first = service._run_providers("same prompt")
+    second = service._run_providers("same prompt")
+
+    assert first["proxy_result"] == second["proxy_result"] == "proxy"
+    assert len(proxy.calls) == 1
+    assert service.response_cache.stats()["hits"] == 1
+
+
+def test_semaphore_bounds_requests_in_flight_across_callers():
+    proxy = _SlowProvider(0.1, "proxy", max_concurrency=2)
+    service = _make_service(None, proxy)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        answers = list(pool.map(lambda i: service.ask_proxy(f"prompt {i}"), range(6)))
+    elapsed = time.monotonic() - started
+
+    assert answers == ["proxy"] * 6
+    assert proxy.peak == 2
+    assert elapsed >= 0.29
+
+
+def test_fallback_to_next_implementation():
+    library = _SlowProvider(0.0, RuntimeError("library failed"))
+    rest = _SlowProvider(0.0, "rest")
+    service = _make_service(FallbackProvider([library, rest]), None)
+
+    results = service._run_providers("prompt")
+
+    assert results["giga_result"] == "rest"
+    assert results["errors"] == {"proxy_api": "Proxy API not initialized"}
+    assert len(library.calls) == len(rest.calls) == 1
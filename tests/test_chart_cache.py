@@ -0,0 +1,22 @@
+from app.services.chart_cache import ChartCache
+from app.services.dataset_store import DatasetStore
+
+
+def test_chart_cache_evicts_by_size_and_invalidates_on_replace():
+    store = DatasetStore()
+    cache = ChartCache(max_bytes=10)
+    store.on_remove(cache.invalidate)
+    dataset = store.add("s1", "a.txt", "text")
+
+    key = (dataset.dataset_id, dataset.version, "line", (), 2000, "lttb")
+    cache.set(key, b"12345")
+    cache.set(("other", 1, "bar", (), 2000, "minmax"), b"123456")
+    assert cache.get(key) is None  # вытеснен по объёму
+    cache.set(key, b"12345")
+    assert cache.get(key) == b"12345"
+    assert ChartCache.etag(key) == ChartCache.etag(tuple(key))
+
+    store.replace(dataset.dataset_id, "s1", "b.txt", "new text")
+    assert cache.get(key) is None
+    assert ChartCache.etag(key) != ChartCache.etag((dataset.dataset_id, dataset.version) + key[2:])
+    assert cache.stats()["invalidations"] == 1
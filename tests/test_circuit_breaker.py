@@ -0,0 +1,137 @@
+import asyncio
+import time
+
+import pytest
+
+from app.api.llm_provider import LLMProvider, ProviderConfigError
+from app.services import circuit_breaker
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.llm_runner import LLMRunner
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_then_probes_once_and_closes():
+    clock = _Clock()
+    breaker = CircuitBreaker("GigaChat API", 30, failure_threshold=3, reset_timeout=10, slow_call=5, clock=clock)
+
+    breaker.record_failure("timeout")
+    breaker.record_success(6.0)  # медленный ответ тоже считается сбоем
+    breaker.before_call()
+    breaker.record_failure("HTTP 503")
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now = 11
+    breaker.before_call()  # пробный запрос
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success(0.5)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["short_circuited"] == 2
+
+
+def test_timeout_adapts_to_p95_latency(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "ADAPTIVE_TIMEOUT_MIN", 1.0)
+    breaker = CircuitBreaker("Proxy API", 30)
+    assert breaker.timeout() == 30
+    for latency in [1.0] * 19 + [4.0]:
+        breaker.record_success(latency)
+
+    assert breaker.p95() == 1.0
+    assert breaker.timeout() == 2.0
+    breaker.record_success(40.0)
+    assert breaker.timeout() == 8.0
+
+
+class _Provider(LLMProvider):
+    def __init__(self, name, answer):
+        super().__init__(timeout=5)
+        self.name = name
+        self.answer = answer
+        self.calls = 0
+
+    async def complete(self, prompt, session_id=None):
+        self.calls += 1
+        if isinstance(self.answer, Exception):
+            raise self.answer
+        return self.answer
+
+
+def test_open_circuit_short_circuits_requests_immediately():
+    giga = _Provider("giga_chat", RuntimeError("503 Service Unavailable"))
+    runner = LLMRunner([giga, _Provider("proxy_api", "proxy")])
+    for _ in range(circuit_breaker.CIRCUIT_FAILURE_THRESHOLD):
+        runner.fan_out("prompt")
+
+    started = time.monotonic()
+    results = runner.fan_out("prompt")
+
+    assert time.monotonic() - started < 0.1
+    assert "circuit is open" in results["errors"]["giga_chat"]
+    assert results["proxy_result"] == "proxy"
+    assert giga.calls == circuit_breaker.CIRCUIT_FAILURE_THRESHOLD
+    assert runner.stats()["giga_chat"]["state"] == "open"
+
+
+def test_timeout_grows_when_provider_slows_down(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "ADAPTIVE_TIMEOUT_MIN", 0.05)
+    monkeypatch.setattr(circuit_breaker, "CIRCUIT_RESET_TIMEOUT", 0)
+    provider = _Provider("proxy_api", "ok")
+    runner = LLMRunner([provider])
+
+    async def complete(prompt, session_id=None):
+        await asyncio.sleep(provider.delay)
+        return "ok"
+
+    provider.complete = complete
+    provider.delay = 0.005
+    for i in range(10):
+        assert runner.fan_out(f"fast {i}")["proxy_result"] == "ok"
+    assert runner.breakers["proxy_api"].timeout() == 0.05
+
+    # Задержка выросла: таймауты попадают в замеры, и адаптивный таймаут растёт до новой p95
+    provider.delay = 0.2
+    results = [runner.fan_out(f"slow {i}") for i in range(6)]
+
+    assert "timeout" in results[0]["errors"]["proxy_api"].lower()
+    assert all(r["proxy_result"] == "ok" for r in results[-3:])
+    assert runner.breakers["proxy_api"].state == CircuitBreaker.CLOSED
+    assert runner.breakers["proxy_api"].timeout() >= 0.4
+
+
+def test_half_open_probe_uses_max_timeout(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "ADAPTIVE_TIMEOUT_MIN", 1)
+    clock = _Clock()
+    breaker = CircuitBreaker("Proxy API", 30, failure_threshold=2, reset_timeout=10, clock=clock)
+    for _ in range(10):
+        breaker.record_success(0.1)
+    assert breaker.before_call() == 1
+
+    breaker.record_timeout(1)
+    breaker.record_timeout(1)
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 11
+    assert breaker.before_call() == 30
+
+
+def test_configuration_errors_do_not_trip_the_breaker():
+    provider = _Provider("proxy_api", ProviderConfigError("No API key available"))
+    runner = LLMRunner([provider])
+    for _ in range(circuit_breaker.CIRCUIT_FAILURE_THRESHOLD + 2):
+        with pytest.raises(ProviderConfigError):
+            runner.ask("proxy_api", "prompt")
+    events = list(runner.stream("prompt"))
+
+    assert ("error", {"provider": "proxy_api", "error": "No API key available"}) in events
+    assert provider.calls == circuit_breaker.CIRCUIT_FAILURE_THRESHOLD + 3
+    stats = runner.stats()["proxy_api"]
+    assert stats["state"] == "closed" and stats["failures"] == 0 and stats["samples"] == 0
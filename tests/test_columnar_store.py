@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.services.analysis_service import AnalysisService
+from app.services.columnar_store import ColumnarStore
+
+
+def test_table_round_trip_is_memory_mapped(tmp_path):
+    store = ColumnarStore(str(tmp_path))
+    df = pd.DataFrame({"id": np.arange(5), "name": list("abcde"), "score": [1.5, None, 2.0, 3.0, 4.5]})
+
+    store.save("key", df)
+    loaded = store.load("key")
+
+    pd.testing.assert_frame_equal(loaded, df)
+    assert store.open_table("key").num_rows == 5
+
+
+def test_text_round_trip(tmp_path):
+    store = ColumnarStore(str(tmp_path))
+    store.save("doc", "line 1\nline 2")
+    assert store.load("doc") == "line 1\nline 2"
+    assert store.load("missing") is None
+
+
+def test_identical_upload_skips_parsing(tmp_path):
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("a,b\n1,2\n3,4\n")
+    service = AnalysisService.__new__(AnalysisService)
+    service.columnar_store = ColumnarStore(str(tmp_path / "store"))
+    service.csv_stream_threshold = float("inf")
+
+    first = service.ingest_file(str(csv_path))
+    second = service.ingest_file(str(csv_path))
+
+    assert first["from_cache"] is False
+    assert second["from_cache"] is True
+    assert first["content_hash"] == second["content_hash"]
+    pd.testing.assert_frame_equal(first["data"], second["data"])
+
+
+def test_stats_are_written_atomically_and_bad_files_are_misses(tmp_path):
+    store = ColumnarStore(str(tmp_path))
+
+    store.save_stats("key", {"rows": 3})
+    assert store.load_stats("key") == {"rows": 3}
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+    (tmp_path / "key.stats.json").write_text('{"rows": ')  # обрезанная запись
+    assert store.load_stats("key") is None
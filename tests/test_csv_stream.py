@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from app.processors.csv_stream import stream_csv
+from app.services.columnar_store import ColumnarStore
+
+
+def test_streamed_csv_matches_pandas(tmp_path):
+    rows = 5000
+    df = pd.DataFrame({
+        "small": np.arange(rows) % 50,
+        "price": np.linspace(0, 1, rows),
+        "city": np.random.default_rng(0).choice(["Moscow", "Kazan"], rows),
+    })
+    df.loc[rows - 1, "small"] = 1_000_000  # out of the sampled Int8 range
+    df.loc[10, "price"] = np.nan
+    csv_path = tmp_path / "big.csv"
+    df.to_csv(csv_path, index=False)
+    store = ColumnarStore(str(tmp_path / "store"))
+
+    stats = stream_csv(str(csv_path), store, "big", chunk_rows=700, sample_rows=100, exact_quantiles=True)
+
+    assert stats["rows"] == rows
+    assert stats["schema"]["small"] == "Int32"
+    assert stats["column_sums"]["small"] == int(df["small"].sum())
+    assert abs(stats["column_sums"]["price"] - df["price"].sum()) < 1e-6
+    assert stats["unique_counts"] == {col: int(df[col].nunique()) for col in df.columns}
+    assert stats["columns"]["price"]["nulls"] == 1
+    assert abs(stats["columns"]["price"]["std"] - df["price"].std()) < 1e-9
+    assert abs(stats["columns"]["price"]["quantiles"]["p50"] - df["price"].median()) < 1e-9
+
+    loaded = store.load("big")
+    assert len(loaded) == rows
+    assert str(loaded["city"].dtype) == "category"
+
+
+def test_non_numeric_value_widens_column_to_string(tmp_path):
+    csv_path = tmp_path / "mixed.csv"
+    csv_path.write_text("code\n" + "\n".join(str(i) for i in range(200)) + "\nA-17\n")
+    store = ColumnarStore(str(tmp_path / "store"))
+
+    stats = stream_csv(str(csv_path), store, "mixed", chunk_rows=50, sample_rows=20)
+
+    assert stats["schema"]["code"] == "string"
+    assert stats["rows"] == 201
+
+
+def test_sketch_only_statistics(tmp_path):
+    rows = 3000
+    df = pd.DataFrame({"user": np.arange(rows) % 1200, "score": np.linspace(0, 10, rows)})
+    csv_path = tmp_path / "users.csv"
+    df.to_csv(csv_path, index=False)
+    store = ColumnarStore(str(tmp_path / "store"))
+
+    stats = stream_csv(str(csv_path), store, "users", chunk_rows=500, exact=False)
+
+    user = stats["columns"]["user"]
+    assert not user["distinct_exact"] and user["quantiles"] is None
+    assert abs(stats["unique_counts"]["user"] - 1200) / 1200 < 0.03
+    assert abs(stats["columns"]["score"]["quantiles_approx"]["p50"] - 5) < 0.2
+
+
+def test_quantiles_come_from_sketches_unless_exact_pass_requested(tmp_path):
+    rows = 4000
+    df = pd.DataFrame({"score": np.linspace(0, 10, rows)})
+    csv_path = tmp_path / "scores.csv"
+    df.to_csv(csv_path, index=False)
+    store = ColumnarStore(str(tmp_path / "store"))
+
+    stats = stream_csv(str(csv_path), store, "scores", chunk_rows=500)
+
+    score = stats["columns"]["score"]
+    assert stats["exact"] and not stats["exact_quantiles"]
+    assert score["quantiles"] is None
+    assert abs(score["quantiles_approx"]["p50"] - 5) < 0.2
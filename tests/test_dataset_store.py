@@ -0,0 +1,104 @@
+import pyarrow as pa
+import pandas as pd
+
+from app.services.dataset_store import DatasetStore
+from app.services.table_query import parse_filters, parse_sort
+
+
+def _frame(rows):
+    return pd.DataFrame({"value": range(rows)})
+
+
+def test_datasets_are_isolated_per_session():
+    store = DatasetStore()
+    first = store.add("alice", "a.csv", _frame(3))
+    second = store.add("bob", "b.csv", _frame(5))
+
+    assert store.latest("alice") is first
+    assert store.latest("bob") is second
+    assert store.get(first.dataset_id, "bob") is None
+    assert store.resolve(None, "alice") is first
+
+
+def test_lru_eviction_respects_memory_limit():
+    one = _frame(1000)
+    store = DatasetStore(memory_limit=int(one.memory_usage(deep=True).sum() * 2.5))
+    removed = []
+    store.on_remove(removed.append)
+
+    first = store.add("s", "1.csv", _frame(1000))
+    second = store.add("s", "2.csv", _frame(1000))
+    store.get(first.dataset_id)  # first becomes most recently used
+    store.add("s", "3.csv", _frame(1000))
+
+    assert removed == [second.dataset_id]
+    assert store.get(first.dataset_id) is not None
+    assert store.stats()["memory_bytes"] <= store.memory_limit
+
+
+def test_replace_bumps_version_and_notifies():
+    store = DatasetStore()
+    removed = []
+    store.on_remove(removed.append)
+    dataset = store.add("s", "a.csv", _frame(2))
+
+    store.replace(dataset.dataset_id, "s", "a.csv", _frame(4))
+
+    assert dataset.version == 2
+    assert len(dataset.dataframe) == 4
+    assert removed == [dataset.dataset_id]
+
+
+def test_sorted_filtered_view_is_cached_until_replace():
+    store = DatasetStore()
+    df = pd.DataFrame({"city": ["Omsk", "Kazan", None, "Moscow", "Kazan"], "price": [5, 1, 3, None, 4]})
+    dataset = store.add("s", "a.csv", df)
+
+    view = dataset.view(parse_filters(["price>=3"]), parse_sort("-price"))
+    assert view.tolist() == [0, 4, 2]
+    assert dataset.take(view[1:], ["city"])["city"].tolist() == ["Kazan", None]
+    assert dataset.view(parse_filters(["price>=3"]), parse_sort("-price")) is view
+    assert dataset.view(sort=parse_sort("city")).tolist() == [1, 4, 3, 0, 2]
+    assert dataset.view(parse_filters(["city~kaz"])).tolist() == [1, 4]
+
+    store.replace(dataset.dataset_id, "s", "a.csv", df.iloc[:2])
+    assert dataset.view(sort=parse_sort("price")).tolist() == [1, 0]
+
+
+def test_chart_frame_reads_only_charted_arrow_columns():
+    table = pa.table({"city": ["a", "b", "c"], "amount": [1.5, None, 3.0], "count": [1, 2, 3]})
+    store = DatasetStore()
+    dataset = store.add("s", "big.csv", table)
+
+    numeric = dataset.chart_frame()
+    selected = dataset.chart_frame(("count", "missing"))
+
+    assert list(numeric.columns) == ["amount", "count"]
+    assert list(selected.columns) == ["count"]
+    assert dataset.dataframe is None  # таблица не материализована
+
+
+def test_registry_resolves_datasets_of_other_processes(tmp_path):
+    saved = {}
+
+    def loader(record):
+        return saved[record["content_hash"]], None
+
+    registry = str(tmp_path / "datasets.sqlite")
+    first = DatasetStore(registry_path=registry, loader=loader)
+    second = DatasetStore(registry_path=registry, loader=loader)
+
+    saved["k1"] = _frame(3)
+    dataset = first.add("s", "a.csv", saved["k1"], content_hash="k1")
+    assert second.get(dataset.dataset_id, "other") is None
+    restored = second.get(dataset.dataset_id, "s")
+    assert restored.num_rows == 3 and restored.version == dataset.version
+    assert second.latest("s").dataset_id == dataset.dataset_id
+
+    # Замена в одном процессе видна другому по версии в реестре
+    saved["k2"] = _frame(5)
+    first.replace(dataset.dataset_id, "s", "a.csv", saved["k2"], content_hash="k2")
+    assert second.get(dataset.dataset_id).num_rows == 5
+
+    assert second.remove(dataset.dataset_id, "s")
+    assert DatasetStore(registry_path=registry, loader=loader).get(dataset.dataset_id) is None
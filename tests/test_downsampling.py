@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from app.services.downsampling import downsample_positions
+
+
+def _series(n=100_000):
+    rng = np.random.default_rng(0)
+    y = np.cumsum(rng.normal(size=n))
+    y[12_345] = 1e6
+    y[100:200] = np.nan
+    return y
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsampling_keeps_extremes_and_shares_labels(method):
+    y = _series()
+    labels, picks = downsample_positions({"a": y, "b": -y}, len(y), 1000, method)
+
+    assert len(labels) == 1000
+    for col, values in (("a", y), ("b", -y)):
+        positions = picks[col]
+        assert len(positions) == len(labels)
+        assert np.all(np.diff(positions) >= 0)
+        assert 12_345 in positions
+        assert np.nanmax(values[positions]) == np.nanmax(values)
+
+
+def test_small_series_are_not_downsampled():
+    y = np.arange(10, dtype=float)
+    labels, picks = downsample_positions({"a": y}, len(y), 1000)
+    assert labels.tolist() == list(range(10)) and picks["a"].tolist() == list(range(10))
+    with pytest.raises(ValueError):
+        downsample_positions({"a": y}, len(y), 4, method="median")
@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from app.processors import excel_parser
+from app.processors.excel_parser import list_sheets, parse_excel
+
+
+def _make_workbook(path):
+    workbook = Workbook()
+    main = workbook.active
+    main.title = "Main"
+    main.append(["id", "city", None, "amount"])
+    for i in range(6):
+        main.append([i, ["Moscow", "Kazan"][i % 2], f"x{i}", i * 1.5 if i != 3 else None])
+    main.append([None, None, None, None])  # пустая строка пропускается
+    extra = workbook.create_sheet("Extra")
+    extra.append(["name"])
+    extra.append(["only"])
+    workbook.save(path)
+
+
+def test_streaming_read_matches_pandas(tmp_path, monkeypatch):
+    path = str(tmp_path / "book.xlsx")
+    _make_workbook(path)
+    monkeypatch.setattr(excel_parser, "EXCEL_CHUNK_ROWS", 4)
+
+    df = parse_excel(path)
+
+    pd.testing.assert_frame_equal(df, pd.read_excel(path).dropna(how="all"))
+    assert list_sheets(path) == ["Main", "Extra"]
+
+
+def test_sheet_and_usecols_selection(tmp_path):
+    path = str(tmp_path / "book.xlsx")
+    _make_workbook(path)
+
+    assert parse_excel(path, sheet="Extra")["name"].tolist() == ["only"]
+    assert parse_excel(path, sheet="1").shape == (1, 1)
+    assert list(parse_excel(path, usecols="id,D").columns) == ["id", "amount"]
+    assert list(parse_excel(path, usecols="B:C").columns) == ["city", "Unnamed: 2"]
+    with pytest.raises(ValueError, match="Sheet not found"):
+        parse_excel(path, sheet="Missing")
+
+
+class _CalamineSheet:
+    def __init__(self, rows):
+        self.rows = rows
+        self.read = 0
+
+    def iter_rows(self):
+        for row in self.rows:
+            self.read += 1
+            yield row
+
+
+class _CalamineWorkbook:
+    sheet = None
+
+    @classmethod
+    def from_path(cls, path):
+        return cls()
+
+    @property
+    def sheet_names(self):
+        return ["Main"]
+
+    def get_sheet_by_name(self, name):
+        return self.sheet
+
+
+def test_calamine_rows_are_consumed_as_an_iterator(monkeypatch):
+    sheet = _CalamineSheet([["id", "city"]] + [[i, ["Moscow", ""][i % 2]] for i in range(9)])
+    monkeypatch.setattr(excel_parser, "_HAS_CALAMINE", True)
+    monkeypatch.setattr(excel_parser, "CalamineWorkbook", _CalamineWorkbook, raising=False)
+    monkeypatch.setattr(_CalamineWorkbook, "sheet", sheet)
+    monkeypatch.setattr(excel_parser, "EXCEL_CHUNK_ROWS", 4)
+
+    df = parse_excel("book.xlsx")
+
+    assert sheet.read == 10
+    assert df["id"].tolist() == list(range(9))
+    assert df["city"].tolist()[:2] == ["Moscow", None]  # пустая ячейка calamine — ""
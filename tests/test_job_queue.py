@@ -0,0 +1,122 @@
+import sqlite3
+import threading
+import time
+
+from app.services.job_queue import JobQueue
+
+
+def test_job_runs_in_background_and_reports_result(tmp_path):
+    jobs = JobQueue(db_path=str(tmp_path / "jobs.sqlite"), workers=1)
+
+    def handler(job_id, payload, progress):
+        progress("parsing", 50)
+        return {"rows": payload["rows"]}
+
+    jobs.register("upload", handler)
+    jobs.start()
+    job_id = jobs.submit("upload", {"rows": 3})
+
+    assert jobs.join(timeout=5)
+    job = jobs.get(job_id)
+    assert job["status"] == "completed"
+    assert job["progress"] == 100.0
+    assert job["result"] == {"rows": 3}
+
+
+def test_failed_job_records_error(tmp_path):
+    jobs = JobQueue(db_path=str(tmp_path / "jobs.sqlite"), workers=1)
+
+    def handler(job_id, payload, progress):
+        raise ValueError("broken file")
+
+    jobs.register("upload", handler)
+    jobs.start()
+    job_id = jobs.submit("upload", {})
+
+    assert jobs.join(timeout=5)
+    job = jobs.get(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "broken file"
+
+
+def test_unfinished_jobs_resume_after_restart(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite")
+    before_restart = JobQueue(db_path=db_path, workers=1)
+    before_restart.register("upload", lambda job_id, payload, progress: None)
+    job_id = before_restart.submit("upload", {"value": 7})  # never started
+
+    after_restart = JobQueue(db_path=db_path, workers=1)
+    after_restart.register("upload", lambda job_id, payload, progress: payload)
+    after_restart.start()
+
+    assert after_restart.join(timeout=5)
+    assert after_restart.get(job_id)["result"] == {"value": 7}
+
+
+def test_running_job_can_be_cancelled(tmp_path):
+    jobs = JobQueue(db_path=str(tmp_path / "jobs.sqlite"), workers=1)
+    started = threading.Event()
+
+    def handler(job_id, payload, progress):
+        started.set()
+        while True:
+            progress("mapping", 50)
+            time.sleep(0.01)
+
+    jobs.register("analysis", handler)
+    jobs.start()
+    job_id = jobs.submit("analysis", {})
+    assert started.wait(timeout=5)
+
+    assert jobs.cancel(job_id) == JobQueue.STATUS_CANCELLING
+    assert jobs.join(timeout=5)
+    assert jobs.get(job_id)["status"] == JobQueue.STATUS_CANCELLED
+    assert jobs.cancel("missing") is None
+
+
+def test_restart_keeps_jobs_leased_by_live_process(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite")
+    release = threading.Event()
+    started = threading.Event()
+    runs = []
+
+    def handler(job_id, payload, progress):
+        runs.append(job_id)
+        started.set()
+        release.wait(5)
+        return {"ok": True}
+
+    first = JobQueue(db_path=db_path, workers=1)
+    first.register("upload", handler)
+    first.start()
+    job_id = first.submit("upload", {})
+    assert started.wait(timeout=5)
+
+    # Второй процесс стартует, пока первый выполняет задачу: аренда не истекла
+    second = JobQueue(db_path=db_path, workers=1)
+    second.register("upload", handler)
+    second.start()
+    assert second.join(timeout=1)
+    assert second.get(job_id)["status"] == JobQueue.STATUS_RUNNING
+
+    release.set()
+    assert first.join(timeout=5)
+    assert runs == [job_id]
+    assert first.get(job_id)["status"] == JobQueue.STATUS_COMPLETED
+
+
+def test_job_with_expired_lease_is_requeued(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite")
+    crashed = JobQueue(db_path=db_path, workers=1)
+    crashed.register("upload", lambda job_id, payload, progress: None)
+    job_id = crashed.submit("upload", {"value": 3})
+    assert crashed._claim(job_id) is not None  # процесс взял задачу и завершился
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE jobs SET lease_until = ? WHERE id = ?", (time.time() - 1, job_id))
+
+    recovered = JobQueue(db_path=db_path, workers=1)
+    recovered.register("upload", lambda job_id, payload, progress: payload)
+    recovered.start()
+
+    assert recovered.join(timeout=5)
+    assert recovered.get(job_id)["result"] == {"value": 3}
@@ -0,0 +1,73 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.api.giga_chat import GigaChatAPI
+from app.api.llm_provider import GigaChatProvider, ProxyProvider
+from app.api.proxy_api import ProxyAPI
+from app.services.llm_runner import LLMRunner
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json"):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/chat/completions":
+            if self.headers["Authorization"] != "Bearer fresh":
+                return self._send(401, '{"message": "token expired"}')
+            if payload.get("stream"):
+                events = "".join(f"data: {json.dumps({'choices': [{'delta': {'content': part}}]})}\n\n"
+                                 for part in ("Рост ", "продаж"))
+                return self._send(200, events + "data: [DONE]\n\n", "text/event-stream")
+            return self._send(200, json.dumps({"choices": [{"message": {"content": "Рост продаж"}}]}))
+        # Proxy API отвечает обычным JSON даже на потоковый запрос
+        return self._send(200, json.dumps({"result": "Аномалий нет"}))
+
+
+class _Tokens:
+    def __init__(self):
+        self.token = "stale"
+
+    def get_token(self):
+        return self.token
+
+    def invalidate(self, stale_token=None):
+        self.token = "fresh"
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def test_http_providers_refresh_token_and_stream(server):
+    giga_api = GigaChatAPI.__new__(GigaChatAPI)
+    giga_api.base_url, giga_api.timeout, giga_api.token_manager = server, 5, _Tokens()
+    proxy_api = ProxyAPI.__new__(ProxyAPI)
+    proxy_api.base_url, proxy_api.timeout, proxy_api.api_key, proxy_api.enabled = f"{server}/analyze", 5, "key", True
+    runner = LLMRunner([GigaChatProvider(giga_api), ProxyProvider(proxy_api)])
+    try:
+        results = runner.fan_out("prompt")
+        assert results == {"giga_result": "Рост продаж", "proxy_result": "Аномалий нет", "errors": {}}
+
+        events = list(runner.stream("prompt"))
+        deltas = [data["text"] for event, data in events if event == "delta" and data["provider"] == "giga_chat"]
+        assert deltas == ["Рост ", "продаж"]
+        assert ("done", {"provider": "proxy_api", "result": "Аномалий нет"}) in events
+    finally:
+        runner.close()
@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.api.llm_provider import LLMProvider
+from app.services import analysis_service as analysis_module
+from app.services.analysis_service import AnalysisService
+from app.services.llm_runner import LLMRunner
+from app.services.job_queue import JobCancelled
+from app.services.map_reduce import chunk_ranges, run_map_reduce
+
+
+class _CountingProvider(LLMProvider):
+    """Провайдер-заглушка: считает запросы и максимум одновременных."""
+
+    name = "proxy_api"
+
+    def __init__(self, delay=0.02):
+        super().__init__(timeout=5, max_concurrency=8)
+        self.delay = delay
+        self.prompts = []
+        self.active = 0
+        self.peak = 0
+
+    async def complete(self, prompt, session_id=None):
+        self.prompts.append(prompt)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        if "Сведи выводы" in prompt:
+            return "итог"
+        return f"выводы {len(self.prompts)}"
+
+
+def _make_service(proxy):
+    service = AnalysisService.__new__(AnalysisService)
+    service.response_cache = None
+    service.llm = LLMRunner([proxy])
+    return service
+
+
+def _frame(rows=20000):
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({"city": rng.choice(["Moscow", "Kazan"], rows), "amount": rng.normal(100, 10, rows)})
+
+
+def test_map_reduce_covers_all_chunks_with_bounded_concurrency(monkeypatch):
+    monkeypatch.setattr(analysis_module, "generate_txt_report", lambda giga, proxy: "report.txt")
+    proxy = _CountingProvider()
+    service = _make_service(proxy)
+    df = _frame()
+    ranges = chunk_ranges(df, chunk_tokens=500, max_chunks=6)
+    assert len(ranges) == 6 and ranges[0][0] == 0 and ranges[-1][1] == len(df)
+
+    monkeypatch.setattr("app.services.map_reduce.MAP_REDUCE_MAX_CHUNKS", 6)
+    monkeypatch.setattr("app.services.map_reduce.MAP_REDUCE_CONCURRENCY", 2)
+    result = service.analyze_map_reduce(df, providers=["proxy_api"])
+
+    assert result["proxy_result"] == "итог"
+    assert result["map_reduce"] == {"proxy_api": {"chunks": 6, "failed_chunks": 0}}
+    # 6 фрагментов + итоговая сводка, одновременно не больше двух запросов
+    assert len(proxy.prompts) == 7
+    assert proxy.peak <= 2
+    assert "строки 16668–20000 из 20000" in "".join(proxy.prompts)
+
+
+def test_chunk_timeout_excludes_time_queued_for_the_provider(monkeypatch):
+    monkeypatch.setattr(analysis_module, "generate_txt_report", lambda giga, proxy: "report.txt")
+    monkeypatch.setattr("app.services.map_reduce.MAP_REDUCE_MAX_CHUNKS", 8)
+    monkeypatch.setattr("app.services.map_reduce.MAP_REDUCE_CONCURRENCY", 4)
+    # Провайдер обслуживает один запрос за раз: фрагменты ждут в очереди дольше таймаута
+    proxy = _CountingProvider(delay=0.1)
+    proxy.timeout = 0.3
+    proxy.max_concurrency = 1
+    service = _make_service(proxy)
+
+    result = service.analyze_map_reduce(_frame(), providers=["proxy_api"])
+
+    assert result["map_reduce"] == {"proxy_api": {"chunks": 8, "failed_chunks": 0}}
+    assert len(proxy.prompts) == 9
+    assert proxy.peak == 1
+
+
+def test_map_reduce_stops_when_job_is_cancelled(monkeypatch):
+    monkeypatch.setattr("app.services.map_reduce._POLL_INTERVAL", 0.05)
+    calls = []
+    runner = LLMRunner([])
+
+    def progress(stage=None, percent=None):
+        if stage == "mapping" and percent and percent > 40:
+            raise JobCancelled("cancelled")
+
+    async def ask(prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    with pytest.raises(JobCancelled):
+        run_map_reduce(_frame(), {"proxy_api": ask}, runner.submit, progress=progress,
+                       chunk_tokens=500, max_chunks=10, concurrency=1)
+    time.sleep(0.3)
+    assert len(calls) < 5
@@ -0,0 +1,51 @@
+import pyarrow as pa
+import pytest
+
+from app.services.pagination import LineIndex, LineIndexBuilder, RowGroupIndex, make_cursor, read_cursor, view_key
+
+
+def test_line_index_matches_split():
+    text = "first\n\nтретья строка\nlast"
+    index = LineIndex(text)
+
+    assert len(index) == len(text.split("\n"))
+    assert index.lines(1, 2) == text.split("\n")[1:3]
+    assert index.lines(3, 10) == ["last"]
+
+
+def test_line_index_built_from_pages_matches_full_scan():
+    pages = ["first\nsecond", "", "третья\n", "\n\nlast"]
+    builder = LineIndexBuilder()
+    for page in pages:
+        builder.add(page)
+    text = "\n".join(pages)
+
+    index = builder.finish(text)
+
+    assert index.starts.tolist() == LineIndex(text).starts.tolist()
+    assert index.ends.tolist() == LineIndex(text).ends.tolist()
+    assert index.lines(0, 100) == text.split("\n")
+    # Текст не совпал с полученными частями — индекс строится заново
+    assert builder.finish(text + "\nextra").lines(0, 100) == (text + "\nextra").split("\n")
+
+
+def test_row_group_index_slices_across_batches():
+    batches = [pa.record_batch({"x": list(range(start, start + 10))}) for start in range(0, 50, 10)]
+    table = pa.Table.from_batches(batches)
+    index = RowGroupIndex(table)
+
+    for offset, limit in ((0, 5), (8, 5), (10, 10), (37, 100), (49, 1), (60, 5)):
+        assert index.slice(offset, limit).column("x").to_pylist() == table.slice(offset, limit).column("x").to_pylist()
+
+
+def test_cursor_is_bound_to_version_and_view():
+    key = view_key([("price", ">", "5")], ("price", True))
+    cursor = make_cursor(3, 200, key)
+
+    assert read_cursor(cursor, 3, key) == 200
+    with pytest.raises(ValueError):
+        read_cursor(cursor, 4, key)
+    with pytest.raises(ValueError):
+        read_cursor(cursor, 3, view_key([], None))
+    with pytest.raises(ValueError):
+        read_cursor("not-a-cursor", 3, key)
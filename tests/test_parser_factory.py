@@ -0,0 +1,63 @@
+import subprocess
+import sys
+import types
+
+import pandas as pd
+
+from app.processors import parser_factory
+from app.processors.parser_factory import get_parser, resolve_file_type, sniff_mime_type
+
+
+def test_parser_modules_are_imported_on_first_use():
+    code = ("import sys; import app.processors.parser_factory as f; "
+            "assert 'app.processors.pdf_parser' not in sys.modules; "
+            "f.get_parser('pdf'); assert 'pdfplumber' in sys.modules")
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+
+
+def test_content_sniffing_and_new_formats(tmp_path):
+    frame = pd.DataFrame({"city": ["Moscow", "Kazan"], "sales": [10, 20]})
+    frame.to_json(tmp_path / "rows.jsonl", orient="records", lines=True)
+    frame.to_csv(tmp_path / "rows.tsv", sep="\t", index=False)
+    frame.to_parquet(tmp_path / "rows.parquet")
+    frame.to_csv(tmp_path / "export.dat", index=False)
+
+    for name in ("rows.jsonl", "rows.tsv", "rows.parquet", "export.dat"):
+        path = str(tmp_path / name)
+        pd.testing.assert_frame_equal(get_parser(resolve_file_type(path)).parse(path), frame)
+
+    assert resolve_file_type(str(tmp_path / "export.dat")) == "csv"
+    assert sniff_mime_type(b"%PDF-1.4\n") == "application/pdf"
+    assert sniff_mime_type(b"\x00\x01binary") is None
+    assert list(get_parser("parquet").parse(str(tmp_path / "rows.parquet"), usecols="sales").columns) == ["sales"]
+
+
+def test_nested_json_lines_are_flattened(tmp_path):
+    path = tmp_path / "events.jsonl"
+    path.write_text('{"id": 1, "user": {"name": "a", "geo": {"city": "Kazan"}}, "tags": ["x", "y"]}\n'
+                    '\n'
+                    '{"id": 2, "user": {"name": "b"}, "tags": []}\n', encoding="utf-8")
+
+    df = get_parser("jsonl").parse(str(path))
+
+    assert list(df.columns) == ["id", "tags", "user.name", "user.geo.city"]
+    assert df["tags"].tolist() == ['["x", "y"]', "[]"]
+    assert df["user.name"].tolist() == ["a", "b"]
+    assert df["user.geo.city"].iloc[0] == "Kazan" and pd.isna(df["user.geo.city"].iloc[1])
+
+
+class _EntryPoint:
+    name = "rows"
+    value = "tests.plugin_parsers:parse_rows"
+
+
+def test_entry_point_plugins(monkeypatch):
+    monkeypatch.setattr(parser_factory, "_plugins_loaded", False)
+    monkeypatch.setattr(parser_factory, "_PARSERS", dict(parser_factory._PARSERS))
+    monkeypatch.setattr("importlib.metadata.entry_points", lambda group: [_EntryPoint()])
+    plugin = types.ModuleType("tests.plugin_parsers")
+    plugin.parse_rows = lambda file_path: pd.DataFrame({"path": [file_path]})
+    monkeypatch.setitem(sys.modules, "tests.plugin_parsers", plugin)
+
+    assert "rows" in parser_factory.supported_extensions()
+    assert get_parser("rows").parse("data.rows")["path"].tolist() == ["data.rows"]
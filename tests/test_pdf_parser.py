@@ -0,0 +1,127 @@
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+from fpdf import FPDF
+
+from app.processors import pdf_parser
+from app.processors.pdf_parser import iter_pdf_pages, parse_pdf
+from app.processors.pdf_tables import rows_to_frame
+
+
+def _make_pdf(path, pages):
+    pdf = FPDF()
+    pdf.set_font("Arial", size=12)
+    for number in range(pages):
+        pdf.add_page()
+        if number != 2:  # третья страница без текста
+            pdf.cell(0, 10, txt=f"Page {number + 1}")
+    pdf.output(str(path))
+
+
+def test_parallel_extraction_keeps_page_order(tmp_path, monkeypatch):
+    path = tmp_path / "report.pdf"
+    _make_pdf(path, 7)
+    monkeypatch.setattr(pdf_parser, "PDF_PARALLEL_MIN_PAGES", 1)
+
+    pages = list(iter_pdf_pages(str(path), workers=2, pages_per_task=2))
+
+    assert [number for number, _ in pages] == list(range(7))
+    assert pages[2][1] == ""
+    assert parse_pdf(str(path), workers=1) == "\n".join(text for _, text in pages)
+    assert parse_pdf(str(path)).startswith("Page 1\nPage 2\n\nPage 4")
+
+
+def test_pages_are_passed_on_as_they_are_ready(tmp_path, monkeypatch):
+    path = tmp_path / "report.pdf"
+    _make_pdf(path, 7)
+    monkeypatch.setattr(pdf_parser, "PDF_PARALLEL_MIN_PAGES", 1)
+    seen = []
+
+    text = parse_pdf(str(path), workers=2, on_page=lambda number, total, page: seen.append((number, total, page)))
+
+    assert [(number, total) for number, total, _ in seen] == [(number, 7) for number in range(1, 8)]
+    assert "\n".join(page for _, _, page in seen) == text
+
+    class Cancelled(Exception):
+        pass
+
+    def cancel(number, total, page):
+        if number == 2:
+            raise Cancelled()
+
+    # Исключение из on_page (отмена задачи) не превращается в ошибку чтения PDF
+    with pytest.raises(Cancelled):
+        parse_pdf(str(path), workers=2, on_page=cancel)
+
+
+def test_script_without_main_guard_reads_pages_in_process(tmp_path):
+    path = tmp_path / "report.pdf"
+    _make_pdf(path, 6)
+    script = tmp_path / "convert.py"
+    # Процессы пула импортируют такой скрипт заново — страницы читаются в текущем процессе
+    script.write_text(textwrap.dedent(f"""
+        from app.processors.pdf_parser import parse_pdf
+        print(parse_pdf({str(path)!r}, workers=2).count("Page"))
+    """))
+    env = {**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parents[1]), "PDF_PARALLEL_MIN_PAGES": "1"}
+
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, env=env, timeout=60)
+
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.split()[-1] == "5"
+
+
+def _make_table_pdf(path):
+    pdf = FPDF()
+    pdf.set_font("Arial", size=10)
+    for page in range(2):
+        pdf.add_page()
+        pdf.cell(0, 10, txt=f"Sales report, page {page + 1}", ln=1)
+        rows = [["City", "Sales", "Share"]] + [[f"City{page * 10 + i}", str(1000 * i + 5), f"{i},5"] for i in range(10)]
+        for row in rows:
+            for cell in row:
+                pdf.cell(40, 8, txt=cell, border=1)
+            pdf.ln()
+    pdf.output(str(path))
+
+
+def test_tables_mode_returns_typed_frame_across_pages(tmp_path):
+    path = tmp_path / "sales.pdf"
+    _make_table_pdf(path)
+
+    df = parse_pdf(str(path), mode="tables")
+
+    assert list(df.columns) == ["City", "Sales", "Share"]
+    assert len(df) == 20  # заголовок на второй странице не дублируется
+    assert str(df["Sales"].dtype) == "Int64" and df["Sales"].iloc[1] == 1005
+    assert df["Share"].iloc[3] == 3.5
+    assert isinstance(parse_pdf(str(path)), str)
+
+
+def test_report_number_formats():
+    df = rows_to_frame(["Item", "Amount"], [["a", "1 234,56"], ["b", "(1 000)"], ["c", None]])
+    assert df["Amount"].tolist()[:2] == [1234.56, -1000.0]
+    assert df["Amount"].isna().iloc[2]
+
+
+def test_tables_mode_returns_every_table(tmp_path):
+    path = tmp_path / "two_tables.pdf"
+    pdf = FPDF()
+    pdf.set_font("Arial", size=10)
+    for header, rows in ((["City", "Sales"], 6), (["Item", "Amount", "Note"], 3)):
+        pdf.add_page()
+        for row in [header] + [[f"{header[0]}{i}"] + [str(i * 10 + j) for j in range(len(header) - 1)]
+                               for i in range(rows)]:
+            for cell in row:
+                pdf.cell(40, 8, txt=cell, border=1)
+            pdf.ln()
+    pdf.output(str(path))
+
+    frames = parse_pdf(str(path), mode="tables")
+
+    assert [list(df.columns) for df in frames] == [["City", "Sales"], ["Item", "Amount", "Note"]]
+    assert [len(df) for df in frames] == [6, 3]
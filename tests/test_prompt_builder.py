@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.services.prompt_builder import build_table_prompt, build_text_prompt, estimate_tokens, sample_positions
+from app.services.statistics import profile_frame
+
+
+def _frame(rows=50000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "city": rng.choice(["Moscow", "Kazan", "Tver"], rows, p=[0.8, 0.15, 0.05]),
+        "amount": rng.normal(100, 10, rows),
+    })
+    df.loc[rows // 2, "amount"] = 1e6
+    return df
+
+
+def test_table_prompt_fits_budget_and_keeps_outliers():
+    df = _frame()
+    profile = profile_frame(df)
+
+    prompt = build_table_prompt(df, profile=profile, budget_tokens=1000)
+
+    assert estimate_tokens(prompt) <= 1000
+    assert "Таблица: 50000 строк × 3 колонок." in prompt
+    assert "city: Moscow (80%), Kazan (15%), Tver (5%)" in prompt
+    assert "\n25000," in prompt and "1e+06" in prompt
+    # Выборка детерминирована: одинаковые данные — одинаковый промпт (попадание в кэш ответов)
+    assert prompt == build_table_prompt(df, profile=profile, budget_tokens=1000)
+    arrow_prompt = build_table_prompt(pa.Table.from_pandas(df, preserve_index=False), profile=profile,
+                                      budget_tokens=1000)
+    assert estimate_tokens(arrow_prompt) <= 1000 and "\n25000," in arrow_prompt
+
+
+def test_sample_is_stratified_across_the_table():
+    df = _frame()
+    positions, strata = sample_positions(df, 100, profile_frame(df))
+
+    assert strata == "city"
+    assert len(positions) <= 100
+    assert set(df["city"].iloc[positions]) == {"Moscow", "Kazan", "Tver"}
+    assert positions.max() > 40000
+
+
+def test_head_rows_and_text_truncation():
+    df = _frame(100)
+    prompt = build_table_prompt(df.head(5), profile=profile_frame(df), max_rows=5, head=True)
+    assert "Таблица: 100 строк" in prompt
+    assert "Строки (первые из 100):" in prompt
+    assert "\n4," in prompt and "\n5," not in prompt
+
+    text = build_text_prompt("начало " + "x" * 10000 + " конец", budget_tokens=100)
+    assert text.startswith("начало") and "конец" in text and "текст сокращён" in text
+
+
+def test_nested_values_are_profiled_and_stratified_by_their_text():
+    # Вложенные записи JSON/Parquet: dict, list и ndarray не хешируются
+    df = pd.DataFrame({
+        "tags": [["x"], ["x", "y"]] * 20,
+        "user": [{"name": "a"}, {"name": "b"}] * 20,
+        "scores": [np.array([1, 2]), np.array([3])] * 20,
+    })
+    profile = profile_frame(df)
+    assert {col: info["distinct"] for col, info in profile["columns"].items()} == \
+        {"tags": 2, "user": 2, "scores": 2}
+
+    positions, strata = sample_positions(df, 10)
+    assert strata == "tags"
+    assert set(positions % 2) == {0, 1}
+    assert "- tags: ['x'] (50%), ['x', 'y'] (50%)" in build_table_prompt(df, budget_tokens=1000)
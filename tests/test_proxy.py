@@ -1,6 +1,7 @@
 import os
 import pytest
 
+from app.api.http_session import get_session
 from app.api.proxy_api import ProxyAPI
 
 
@@ -13,6 +14,16 @@ def test_proxy_disabled(monkeypatch):
     assert p.enabled is False
 
     with pytest.raises(Exception) as exc:
-        p.send_analysis_request('test')
+        p._prepare('test')
 
     assert 'disabled' in str(exc.value).lower()
+
+
+def test_clients_share_pooled_session():
+    first = get_session('GIGACHAT')
+    second = get_session('GIGACHAT')
+
+    assert first is second
+    adapter = first.get_adapter('https://ngw.devices.sberbank.ru:9443/api/v2/oauth')
+    assert adapter._pool_maxsize >= 1
+    assert adapter.max_retries.total >= 0
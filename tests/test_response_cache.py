@@ -0,0 +1,68 @@
+import time
+
+from app.api.llm_provider import LLMProvider
+from app.services.llm_runner import LLMRunner
+from app.utils.response_cache import ResponseCache
+
+
+def test_key_depends_on_all_parts():
+    base = ResponseCache.make_key("giga_chat", "GigaChat", "prompt", {"temperature": 0.7})
+    assert base == ResponseCache.make_key("giga_chat", "GigaChat", "prompt", {"temperature": 0.7})
+    assert base != ResponseCache.make_key("proxy_api", "GigaChat", "prompt", {"temperature": 0.7})
+    assert base != ResponseCache.make_key("giga_chat", "GigaChat", "prompt", {"temperature": 0.1})
+
+
+def test_lru_eviction_and_ttl():
+    cache = ResponseCache(max_entries=2, ttl=0.2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    time.sleep(0.25)
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    ResponseCache(db_path=db_path).set("key", "answer")
+
+    cache = ResponseCache(db_path=db_path)
+    assert cache.get("key") == "answer"
+    stats = cache.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["disk_entries"] == 1
+
+
+class _Provider(LLMProvider):
+    def __init__(self, name):
+        super().__init__(timeout=5)
+        self.name = name
+
+    async def complete(self, prompt, session_id=None):
+        return f"{self.name}: {prompt}"
+
+
+def test_disk_cache_does_not_block_the_provider_loop(tmp_path):
+    cache = ResponseCache(db_path=str(tmp_path / "cache.sqlite"))
+    disk_get = cache.get
+
+    def slow_get(key):
+        time.sleep(0.3)  # медленный диск
+        return disk_get(key)
+
+    cache.get = slow_get
+    runner = LLMRunner([_Provider("giga_chat"), _Provider("proxy_api")], response_cache=cache)
+    try:
+        started = time.monotonic()
+        results = runner.fan_out("prompt")
+        # Чтения кэша обоих провайдеров идут параллельно, а не по очереди в цикле событий
+        assert time.monotonic() - started < 0.55
+        assert results["giga_result"] == "giga_chat: prompt"
+        assert runner.fan_out("prompt")["proxy_result"] == "proxy_api: prompt"
+        assert cache.stats()["hits"] == 2
+    finally:
+        runner.close()
@@ -0,0 +1,141 @@
+import importlib
+import os
+import time
+from io import BytesIO
+from unittest import mock
+
+import pytest
+
+CSV = b"day,amount,qty\n1,10.5,3\n2,20.0,4\n3,7.25,1\n"
+
+
+@pytest.fixture(scope="module")
+def main(tmp_path_factory):
+    # Настройки читаются при импорте app.main: задачи, реестр и хранилище — во временной папке,
+    # нейросети отключены, анализ ставится в очередь только по явному analyze=true
+    root = tmp_path_factory.mktemp("app")
+    env = {
+        "PROXY_ENABLED": "false",
+        "AUTO_ANALYZE": "false",
+        "JOB_DB_PATH": str(root / "jobs.sqlite"),
+        "DATASET_REGISTRY_PATH": str(root / "datasets.sqlite"),
+        "DATASET_STORAGE_DIR": str(root / "datasets"),
+    }
+    with mock.patch.dict(os.environ, env):
+        module = importlib.import_module("app.main")
+    yield module
+    module.job_queue.join(timeout=10)
+
+
+@pytest.fixture
+def client(main, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # загруженные файлы — в uploads/ временной папки
+    yield main.app.test_client()
+    main.job_queue.join(timeout=10)
+
+
+def _upload(client, session, content=CSV, filename="sales.csv", **values):
+    return client.post("/api/upload", data={"file": (BytesIO(content), filename), **values},
+                       content_type="multipart/form-data", headers={"X-Session-ID": session})
+
+
+def _wait_for_job(client, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/api/jobs/{job_id}").get_json()
+        if job["status"] in ("completed", "failed", "cancelled") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def test_upload_returns_parsed_dataset_and_queues_analysis(client):
+    response = _upload(client, "sync", analyze="true")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["status"] == "success"
+    assert body["rows"] == 3
+    assert body["analysis_status_url"] == f"/api/jobs/{body['analysis_job_id']}"
+    assert _wait_for_job(client, body["analysis_job_id"])["status"] == "completed"
+
+    # Без analyze задача анализа не создаётся
+    assert "analysis_job_id" not in _upload(client, "sync").get_json()
+
+
+def test_async_upload_is_accepted_and_polled_by_job_id(client):
+    response = _upload(client, "async", **{"async": "true"})
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body["status_url"] == f"/api/jobs/{body['job_id']}"
+
+    job = _wait_for_job(client, body["job_id"])
+    assert job["status"] == "completed"
+    dataset_id = job["result"]["dataset_id"]
+    data = client.get(f"/api/data?dataset_id={dataset_id}", headers={"X-Session-ID": "async"})
+    assert data.status_code == 200
+    assert client.get("/api/jobs/unknown").status_code == 404
+
+
+def test_charts_etag_revalidates_and_changes_when_dataset_is_replaced(main, client):
+    headers = {"X-Session-ID": "charts"}
+    dataset_id = _upload(client, "charts").get_json()["dataset_id"]
+    url = f"/api/charts?dataset_id={dataset_id}&chart_type=line&columns=amount"
+
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag
+    cached = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+    invalidations = main.chart_cache.stats()["invalidations"]
+    replaced = _upload(client, "charts", content=CSV + b"4,99.0,9\n", dataset_id=dataset_id)
+    assert replaced.get_json()["dataset_id"] == dataset_id
+    assert main.chart_cache.stats()["invalidations"] > invalidations
+
+    fresh = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+    assert fresh.get_json()["charts"][0]["datasets"][0]["data"] == [10.5, 20.0, 7.25, 99.0]
+
+
+def test_upload_of_nested_records_is_profiled(client):
+    nested = (b'{"id": 1, "user": {"name": "a"}, "tags": ["x", "y"]}\n'
+              b'{"id": 2, "user": {"name": "b"}, "tags": ["x"]}\n'
+              b'{"id": 3, "user": {"name": "a"}, "tags": ["x", "y"]}\n')
+    # Второй раз набор читается из columnar store: вложенные списки приходят как ndarray
+    for _ in range(2):
+        response = _upload(client, "nested", content=nested, filename="events.jsonl")
+        assert response.status_code == 200
+        dataset_id = response.get_json()["dataset_id"]
+        analysis = client.get(f"/api/analysis?dataset_id={dataset_id}", headers={"X-Session-ID": "nested"})
+        assert analysis.status_code == 200
+        assert analysis.get_json()["columns"]["tags"]["distinct"] == 2
+
+
+def test_pdf_upload_indexes_lines_while_pages_are_extracted(main, client, tmp_path, monkeypatch):
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.set_font("Arial", size=12)
+    for number in range(3):
+        pdf.add_page()
+        pdf.cell(0, 10, txt=f"Page {number + 1}")
+    pdf.output(str(tmp_path / "report.pdf"))
+
+    body = _upload(client, "pdf", content=(tmp_path / "report.pdf").read_bytes(), filename="report.pdf").get_json()
+    dataset = main.dataset_store.get(body["dataset_id"])
+
+    assert dataset._line_index is not None  # построен при загрузке, а не первым запросом /api/data
+    data = client.get(f"/api/data?dataset_id={dataset.dataset_id}", headers={"X-Session-ID": "pdf"}).get_json()
+    assert [row["Content"] for row in data["rows"]] == ["Page 1", "Page 2", "Page 3"]
+
+    # Счётчик строк и первые строки для /api/table-analysis берутся из того же индекса
+    analysis = client.get(f"/api/analysis?dataset_id={dataset.dataset_id}", headers={"X-Session-ID": "pdf"})
+    assert analysis.get_json()["column_sums"]["Всего строк"] == 3
+    calls = []
+    monkeypatch.setattr(main.analysis_service, "analyze_table_first_rows",
+                        lambda data, rows_count, profile: calls.append((data, profile)) or {})
+    response = client.post("/api/table-analysis", json={"dataset_id": dataset.dataset_id, "rows_count": 2},
+                           headers={"X-Session-ID": "pdf"})
+    assert response.status_code == 200
+    assert calls == [([{"line": 1, "content": "Page 1"}, {"line": 2, "content": "Page 2"}], {"rows": 3})]
@@ -0,0 +1,52 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.utils import serialization
+from app.utils.serialization import column_to_list, dumps, frame_to_columns, frame_to_records
+
+
+def _frame():
+    return pd.DataFrame({
+        'i': [1, 2],
+        'f': [1.5, np.inf],
+        'o': ['a', np.nan],
+        'n': pd.array([1, None], dtype='Int16'),
+        'd': pd.to_datetime(['2024-01-02 03:04:05', None]),
+        'c': pd.Categorical(['x', None]),
+        'b': [True, False],
+    })
+
+
+def test_records_and_columns_are_json_native():
+    df = _frame()
+    assert frame_to_records(df) == [
+        {'i': 1, 'f': 1.5, 'o': 'a', 'n': 1, 'd': '2024-01-02T03:04:05', 'c': 'x', 'b': True},
+        {'i': 2, 'f': None, 'o': None, 'n': None, 'd': None, 'c': None, 'b': False},
+    ]
+    columns = frame_to_columns(df)
+    assert columns['f'] == [1.5, None]
+    assert columns['d'] == ['2024-01-02T03:04:05', None]
+
+
+def test_dumps_with_and_without_orjson(monkeypatch):
+    payload = {'rows': [{'x': np.int64(3), 'y': np.float32(0.5), 'z': 'я'}]}
+    expected = {'rows': [{'x': 3, 'y': 0.5, 'z': 'я'}]}
+    assert json.loads(dumps(payload)) == expected
+    monkeypatch.setattr(serialization, '_HAS_ORJSON', False)
+    assert json.loads(dumps(payload)) == expected
+
+
+def test_datetimes_keep_fractions_and_offsets_like_isoformat():
+    naive = pd.Series(pd.to_datetime(['2024-01-02 03:04:05', '2024-01-02 03:04:05.123456',
+                                      '2024-01-02 03:04:05.5', '2024-01-02 03:04:05.000000001', None], format='ISO8601'))
+    aware = pd.Series(pd.to_datetime(['2024-03-30 12:00:00.25', '2024-07-01 00:00:00', None], format='ISO8601')
+                      .tz_localize('UTC').tz_convert('Europe/Berlin'))
+    moscow = pd.Series(pd.to_datetime(['2024-01-02 03:04:05']).tz_localize('Europe/Moscow'))
+
+    for series in (naive, aware, moscow):
+        expected = [None if pd.isna(value) else value.isoformat() for value in series]
+        assert frame_to_columns(pd.DataFrame({'d': series}))['d'] == expected
+    assert frame_to_columns(pd.DataFrame({'d': moscow}))['d'] == ['2024-01-02T03:04:05+03:00']
+    assert column_to_list(naive)[1] == '2024-01-02T03:04:05.123456'
@@ -0,0 +1,38 @@
+import numpy as np
+
+from app.services.sketches import HyperLogLog, KLLSketch
+
+
+def test_hyperloglog_merges_partitions_within_error():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 200_000, 600_000)
+    exact = len(np.unique(values))
+
+    merged = HyperLogLog()
+    for part in np.array_split(values, 6):
+        sketch = HyperLogLog()
+        sketch.update(part)
+        merged.merge(sketch)
+
+    assert abs(merged.estimate() - exact) / exact < 0.03
+    small = HyperLogLog()
+    small.update(np.array(["a", "b", "c", "a"], dtype=object))
+    assert small.estimate() == 3
+
+
+def test_kll_quantiles_after_merge():
+    rng = np.random.default_rng(1)
+    values = rng.normal(0, 1, 200_000)
+
+    merged = KLLSketch(seed=0)
+    for i, part in enumerate(np.array_split(values, 8)):
+        sketch = KLLSketch(seed=i)
+        for chunk in np.array_split(part, 5):
+            sketch.update(chunk)
+        merged.merge(sketch)
+
+    assert merged.count == len(values)
+    assert sum(len(level) for level in merged.levels) < 2000
+    for q, estimate in zip((0.1, 0.5, 0.9), merged.quantiles((0.1, 0.5, 0.9))):
+        rank = np.mean(values <= estimate)
+        assert abs(rank - q) < 0.02
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from app.services.statistics import StatsAccumulator, profile_frame, statistics_view
+
+
+def _frame():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "amount": rng.normal(100, 15, 1000),
+        "qty": rng.integers(0, 20, 1000),
+        "city": rng.choice(["Moscow", "Kazan", "Omsk"], 1000),
+    })
+    df.loc[3, "amount"] = np.nan
+    return df
+
+
+def test_profile_frame_matches_pandas():
+    df = _frame()
+    profile = profile_frame(df)
+
+    amount = profile["columns"]["amount"]
+    assert profile["rows"] == 1000
+    assert amount["nulls"] == 1 and amount["count"] == 999
+    assert abs(amount["mean"] - df["amount"].mean()) < 1e-9
+    assert abs(amount["std"] - df["amount"].std()) < 1e-9
+    assert abs(amount["quantiles"]["p50"] - df["amount"].median()) < 1e-9
+    assert profile["column_sums"]["qty"] == int(df["qty"].sum())
+    assert profile["unique_counts"] == {col: int(df[col].nunique()) for col in df.columns}
+    assert "mean" not in profile["columns"]["city"]
+
+
+def test_chunked_accumulator_agrees_with_profile():
+    df = _frame()
+    merged = StatsAccumulator()
+    for start in range(0, len(df), 300):
+        part = StatsAccumulator()
+        part.update(df.iloc[start:start + 300])
+        merged.merge(part)
+
+    streamed = merged.result()["columns"]
+    exact = profile_frame(df)["columns"]
+    for col in ("amount", "qty"):
+        assert abs(streamed[col]["mean"] - exact[col]["mean"]) < 1e-9
+        assert abs(streamed[col]["std"] - exact[col]["std"]) < 1e-9
+        assert streamed[col]["min"] == exact[col]["min"]
+
+
+def test_statistics_view_prefers_requested_mode():
+    df = _frame()
+    acc = StatsAccumulator()
+    acc.update(df)
+    streamed = acc.result()
+
+    approx = statistics_view(streamed, exact=False)
+    assert approx["exact"] is False
+    # Точных квантилей при потоковой загрузке нет — отдаются KLL, и ответ не помечается точным
+    assert statistics_view(streamed, exact=True)["exact"] is False
+    assert approx["unique_counts"]["amount"] == streamed["columns"]["amount"]["distinct_approx"]
+    assert approx["quantiles"]["qty"] == streamed["columns"]["qty"]["quantiles_approx"]
+    # Таблица в памяти профилируется точно — exact=False возвращает точные значения и так их и помечает
+    in_memory = statistics_view(profile_frame(df), exact=False)
+    assert in_memory["exact"] is True
+    assert in_memory["unique_counts"]["city"] == 3
+    assert in_memory["quantiles"]["amount"]["p50"] == profile_frame(df)["columns"]["amount"]["quantiles"]["p50"]
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+from app.api.llm_provider import LLMProvider
+from app.api.sse import aiter_sse_data, format_event
+from app.services.analysis_service import AnalysisService
+from app.services.llm_runner import LLMRunner
+from app.utils.response_cache import ResponseCache
+
+
+class _StreamingProvider(LLMProvider):
+    def __init__(self, name, parts, delay, timeout=5):
+        super().__init__(timeout=timeout)
+        self.name = name
+        self.parts = parts
+        self.delay = delay
+        self.calls = 0
+
+    async def stream(self, prompt, session_id=None):
+        self.calls += 1
+        for part in self.parts:
+            await asyncio.sleep(self.delay)
+            yield part
+
+
+class _Response:
+    def __init__(self, lines):
+        self.lines = lines
+
+    async def aiter_lines(self):
+        for line in self.lines:
+            yield line
+
+
+def _make_service(giga, proxy, response_cache=None):
+    service = AnalysisService.__new__(AnalysisService)
+    service.response_cache = response_cache
+    service.llm = LLMRunner([giga, proxy], response_cache=response_cache)
+    return service
+
+
+def test_sse_parsing():
+    lines = ['data: {"choices": [{"delta": {"content": "При"}}]}', "", ": keep-alive", "",
+             "data: line 1", "data: line 2", "", "data: [DONE]", "", "data: after done"]
+    async def collect():
+        return [data async for data in aiter_sse_data(_Response(lines))]
+
+    assert asyncio.run(collect()) == ['{"choices": [{"delta": {"content": "При"}}]}', "line 1\nline 2"]
+    assert format_event("delta", {"text": "ё"}) == 'event: delta\ndata: {"text": "ё"}\n\n'
+
+
+def test_providers_stream_in_parallel_and_cache_full_answer():
+    giga = _StreamingProvider("giga_chat", ["Выр", "учка ", "растёт"], 0.1)
+    proxy = _StreamingProvider("proxy_api", ["Аномалий ", "нет"], 0.1)
+    service = _make_service(giga, proxy, response_cache=ResponseCache(max_entries=10))
+
+    started = time.monotonic()
+    events = []
+    first_delta = None
+    for event, data in service.stream_providers("prompt"):
+        if event == "delta" and first_delta is None:
+            first_delta = time.monotonic() - started
+        events.append((event, data))
+    elapsed = time.monotonic() - started
+
+    # Первый фрагмент приходит до конца генерации, провайдеры читаются одновременно
+    assert first_delta < 0.25
+    assert elapsed < 0.45
+    done = {data["provider"]: data["result"] for event, data in events if event == "done"}
+    assert done == {"giga_chat": "Выручка растёт", "proxy_api": "Аномалий нет"}
+    assert events[-1] == ("end", {"errors": {}})
+
+    # Дочитанный поток закэширован: повторный запрос приходит одним фрагментом без обращения к провайдеру
+    repeated = [data for event, data in service.stream_providers("prompt") if event == "delta"]
+    assert sorted(data["text"] for data in repeated) == ["Аномалий нет", "Выручка растёт"]
+    assert giga.calls == 1 and proxy.calls == 1
+
+
+def test_stalled_stream_reports_timeout():
+    giga = _StreamingProvider("giga_chat", ["a", "b"], 0.5, timeout=0.2)
+    proxy = _StreamingProvider("proxy_api", ["ok"], 0.0)
+    service = _make_service(giga, proxy)
+
+    events = list(service.stream_providers("prompt"))
+
+    assert ("error", {"provider": "giga_chat", "error": "Request timeout after 0.2s"}) in events
+    assert ("done", {"provider": "proxy_api", "result": "ok"}) in events
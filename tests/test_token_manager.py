@@ -0,0 +1,52 @@
+import threading
+import time
+
+from app.api.token_manager import TokenManager, normalize_expires_at
+
+
+def test_concurrent_refresh_is_single_flight():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return f"token-{len(calls)}", time.time() + 3600
+
+    manager = TokenManager(fetch)
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(manager.get_token())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    manager.stop()
+
+    assert len(calls) == 1
+    assert set(tokens) == {"token-1"}
+
+
+def test_invalidate_forces_new_token():
+    counter = iter(range(1, 10))
+    manager = TokenManager(lambda: (f"token-{next(counter)}", None))
+
+    first = manager.get_token()
+    manager.invalidate(first)
+    second = manager.get_token()
+
+    assert first == "token-1"
+    assert second == "token-2"
+
+
+def test_expired_token_is_refreshed():
+    counter = iter(range(1, 10))
+    manager = TokenManager(lambda: (f"token-{next(counter)}", time.time() - 5))
+
+    assert manager.get_token() == "token-1"
+    assert manager.get_token() == "token-2"
+    manager.stop()
+
+
+def test_normalize_expires_at_handles_milliseconds():
+    assert normalize_expires_at(1700000000000) == 1700000000.0
+    assert normalize_expires_at(1700000000) == 1700000000.0
+    assert normalize_expires_at(None) is None